@@ -0,0 +1,345 @@
+"""
+Labelled-intent accuracy harness for the rule-based chatbots
+Checks which rule every message matches against the intent it should match,
+and reports per-intent precision and recall together with matching latency
+
+Usage:
+    python accuracy_harness.py corpus.jsonl --processes 4 --output report.json
+    python accuracy_harness.py corpus.jsonl.gz --compare report.json
+
+Corpus lines are JSON objects with the message and the intent expected to
+match it: a name from Rulebook.intents, or null when no rule should match.
+Without a corpus the built-in cases are checked. Large corpora are
+split into chunks matched by a pool of worker processes, forked after the
+rulebook is built so they all share it.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from array import array
+from collections import deque
+from itertools import chain, islice
+
+from benchmark import percentile
+from replay import parse_records, read_lines
+from server import CHATBOTS
+
+# Label of messages that should match no rule (null in a corpus)
+NO_MATCH = "(none)"
+
+# Messages every chatbot must route to these intents
+LABELLED_CASES = [
+    ("hello", "greeting"),
+    ("hi there", "greeting"),
+    ("good morning", "greeting"),
+    ("how are you", "personal"),
+    ("what's your name", "identity"),
+    ("who are you", "identity"),
+    ("what can you do", "capabilities"),
+    ("thank you", "thanks"),
+    ("thanks a lot", "thanks"),
+    ("goodbye", "goodbye"),
+    ("see you later", "goodbye"),
+    ("yes", "agreement"),
+    ("okay sure", "agreement"),
+    ("what time is it", "time"),
+    ("current time", "time"),
+    ("how's the weather", "weather"),
+    ("is it sunny", "weather"),
+    ("xyzzy", None),
+    ("purple elephants", None),
+]
+
+# Further cases for AdvancedRuleBasedChatbot only
+ADVANCED_CASES = [
+    ("help me", "capabilities"),
+    ("i feel sad", "emotions"),
+    ("i am happy", "emotions"),
+    ("artificial intelligence", "tech"),
+    ("machine learning", "tech"),
+]
+
+# Messages no AdvancedRuleBasedChatbot rule matches, labelled with the rule the
+# fallback classifier should answer them with; intent_classifier.DEFAULT_THRESHOLD
+# is tuned on these
+FALLBACK_CASES = [
+    ("is it snowing outside", "weather"),
+    ("is it raining", "weather"),
+    ("it is freezing and raining", "weather"),
+    ("rainy days", "weather"),
+    ("the snowfall", "weather"),
+    ("computers are so cool", "tech"),
+    ("tell me about robots", "tech"),
+    ("robots are neat", "tech"),
+    ("lovely home cooked meal", "food"),
+    ("any good recipes", "food"),
+    ("cooked pasta", "food"),
+    ("my studies are hard", "work"),
+    ("working late again", "work"),
+    ("thank u so much", "thanks"),
+    ("i appreciated that", "thanks"),
+    ("i apologise", "apology"),
+    ("see ya", "goodbye"),
+    ("nice painting", None),
+    ("looking forward to the weekend", None),
+    ("looking for my keys", None),
+    ("i love my dog", None),
+    ("the meeting ran long", None),
+    ("buy milk tomorrow", None),
+    ("i'm starving", None),
+    ("traffic was terrible", None),
+    ("my car broke down", None),
+    ("hows your day", None),
+    ("i need water", None),
+    ("the cat sat on the mat", None),
+    ("booking a flight", None),
+    ("my neighbor is loud", None),
+    ("the train was late", None),
+    ("paint the fence", None),
+    ("a long walk", None),
+    ("the shop closed early", None),
+    ("my plants are growing", None),
+    ("watching the clouds", None),
+    ("lost my wallet", None),
+    ("calling my mom", None),
+]
+
+
+def read_corpus(paths, field="message", label="intent"):
+    """Yield (message, expected intent or None) for every line of JSONL corpora
+
+    Raises ValueError, naming the file and line, for a line without a message
+    or a label.
+    """
+    for source, number, record in parse_records(read_lines(paths), "jsonl", field):
+        if "error" in record:
+            raise ValueError(f"{source}:{number}: {record['error']}")
+        if label not in record:
+            raise ValueError(f"{source}:{number}: no {label!r} label")
+        yield record["message"], record[label]
+
+
+def match_messages(rulebook, messages):
+    """Return (matched intent or None, matching time in seconds) for every message"""
+    intents = rulebook.intents
+    results = []
+    for message in messages:
+        began = time.perf_counter()
+        rule = rulebook.match_message(message)
+        elapsed = time.perf_counter() - began
+        results.append((intents[rule] if rule is not None else None, elapsed))
+    return results
+
+
+_worker_rulebook = None
+
+
+def _use_rulebook(rulebook):
+    """Pool initializer: remember the rulebook the forked worker inherited"""
+    global _worker_rulebook
+    _worker_rulebook = rulebook
+
+
+def _match_chunk(messages):
+    return match_messages(_worker_rulebook, messages)
+
+
+def case_chunks(cases, chunk_size):
+    """Yield (messages, expected intents) lists of up to chunk_size cases, reading cases lazily"""
+    iterator = iter(cases)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield [message for message, _ in chunk], [intent for _, intent in chunk]
+
+
+def count_intents(counts, expected, matched):
+    """Add two parallel label lists to {intent: {support, matched, correct}} counts"""
+    for want, got in zip(expected, matched):
+        want = NO_MATCH if want is None else want
+        got = NO_MATCH if got is None else got
+        counts.setdefault(want, {"support": 0, "matched": 0, "correct": 0})["support"] += 1
+        counts.setdefault(got, {"support": 0, "matched": 0, "correct": 0})["matched"] += 1
+        if want == got:
+            counts[want]["correct"] += 1
+    return counts
+
+
+def intent_scores(expected, matched, counts=None):
+    """Return {intent: support, matched, correct, precision, recall} over two parallel label lists
+
+    None (no rule) is scored as the NO_MATCH intent. Precision is None for
+    an intent nothing matched, and recall for one no message expected.
+    counts may be count_intents() totals gathered beforehand.
+    """
+    scores = count_intents({} if counts is None else counts, expected, matched)
+    for score in scores.values():
+        score["precision"] = score["correct"] / score["matched"] if score["matched"] else None
+        score["recall"] = score["correct"] / score["support"] if score["support"] else None
+    return dict(sorted(scores.items()))
+
+
+def evaluate(rulebook, cases, processes=1, chunk_size=1000, max_mismatches=20):
+    """Match labelled (message, intent) cases and return the accuracy and latency report
+
+    cases may be any iterable, such as read_corpus(): it is read chunk_size
+    cases at a time. With more than one process, and more than one chunk,
+    the chunks are matched by a pool of forked workers with only a couple
+    per worker read ahead. Latencies are per message, measured in the
+    process that matched it; msgs_per_sec is over the wall time of the
+    whole run. Unknown expected intents are reported, since they can never
+    be matched.
+    """
+    rulebook.warm_up()
+    rulebook.cache.clear()
+    known = set(rulebook.intents)
+    counts = {}
+    latencies = array('d')
+    unknown = set()
+    mismatches = []
+
+    def add(messages, expected, results):
+        matched = [intent for intent, _ in results]
+        latencies.extend(latency for _, latency in results)
+        count_intents(counts, expected, matched)
+        unknown.update(want for want in expected if want is not None and want not in known)
+        for message, want, got in zip(messages, expected, matched):
+            if want != got and len(mismatches) < max_mismatches:
+                mismatches.append({"message": message, "expected": want, "matched": got})
+
+    began = time.perf_counter()
+    chunks = case_chunks(cases, chunk_size)
+    # A pool is only worth forking for more than one chunk
+    peeked = list(islice(chunks, 2))
+    chunks = chain(peeked, chunks)
+    if processes > 1 and len(peeked) > 1:
+        context = multiprocessing.get_context("fork")
+        with context.Pool(processes, initializer=_use_rulebook, initargs=(rulebook,)) as pool:
+            # Keep a couple of chunks queued per worker without reading ahead further
+            pending = deque()
+            for messages, expected in chunks:
+                pending.append((messages, expected, pool.apply_async(_match_chunk, (messages,))))
+                if len(pending) >= processes * 2:
+                    messages, expected, results = pending.popleft()
+                    add(messages, expected, results.get())
+            while pending:
+                messages, expected, results = pending.popleft()
+                add(messages, expected, results.get())
+    else:
+        for messages, expected in chunks:
+            add(messages, expected, match_messages(rulebook, messages))
+    elapsed = time.perf_counter() - began
+
+    latencies = sorted(latencies)
+    cases = len(latencies)
+    correct = sum(score["correct"] for score in counts.values())
+    return {
+        "cases": cases,
+        "correct": correct,
+        "accuracy": correct / cases if cases else 0.0,
+        "msgs_per_sec": cases / elapsed if elapsed > 0 else 0.0,
+        "p50_us": percentile(latencies, 0.50) * 1e6 if latencies else 0.0,
+        "p99_us": percentile(latencies, 0.99) * 1e6 if latencies else 0.0,
+        "intents": intent_scores([], [], counts),
+        "unknown_intents": sorted(unknown),
+        "mismatches": mismatches,
+    }
+
+
+def compare_reports(baseline, current, threshold=0.2):
+    """Return the regressions of current against baseline, as a list of strings
+
+    Any drop in overall accuracy, or in an intent's precision or recall, is
+    a regression; so is throughput falling, or p99 latency rising, by more
+    than threshold (a fraction).
+    """
+    regressions = []
+    if current["accuracy"] < baseline["accuracy"]:
+        regressions.append(f"accuracy {baseline['accuracy']:.2%} -> {current['accuracy']:.2%}")
+    for intent, before in baseline["intents"].items():
+        after = current["intents"].get(intent)
+        if after is None:
+            continue
+        for metric in ("precision", "recall"):
+            if before[metric] is not None and after[metric] is not None and after[metric] < before[metric]:
+                regressions.append(f"{intent}: {metric} {before[metric]:.2%} -> {after[metric]:.2%}")
+    if current["msgs_per_sec"] < baseline["msgs_per_sec"] * (1 - threshold):
+        regressions.append(f"throughput {baseline['msgs_per_sec']:.0f} -> {current['msgs_per_sec']:.0f} msgs/sec")
+    if current["p99_us"] > baseline["p99_us"] * (1 + threshold):
+        regressions.append(f"p99 {baseline['p99_us']:.1f} -> {current['p99_us']:.1f} us")
+    return regressions
+
+
+def print_report(report):
+    """Print per-intent precision and recall, the totals and the first mismatches"""
+    def ratio(value):
+        return f"{value:9.1%}" if value is not None else f"{'-':>9}"
+
+    print(f" {'intent':<16} {'support':>8} {'matched':>8} {'precision':>9} {'recall':>9}")
+    print("-" * 55)
+    for intent, score in report["intents"].items():
+        print(f" {intent:<16} {score['support']:>8} {score['matched']:>8} {ratio(score['precision'])} "
+              f"{ratio(score['recall'])}")
+    print("-" * 55)
+    print(f" Accuracy: {report['correct']}/{report['cases']} ({report['accuracy']:.1%})")
+    print(f" Matching: {report['msgs_per_sec']:.0f} msgs/sec, p50 {report['p50_us']:.1f} us, "
+          f"p99 {report['p99_us']:.1f} us")
+    if report["unknown_intents"]:
+        print(f" Labels no rule has: {', '.join(report['unknown_intents'])}")
+    for mismatch in report["mismatches"]:
+        print(f"   '{mismatch['message']}': expected {mismatch['expected'] or NO_MATCH}, "
+              f"matched {mismatch['matched'] or NO_MATCH}")
+
+
+def main():
+    """Run the accuracy harness from the command line"""
+    parser = argparse.ArgumentParser(description="Check which rules labelled messages match")
+    parser.add_argument("corpora", nargs="*", help="labelled JSONL files, optionally .gz (default: built-in cases)")
+    parser.add_argument("--bot", choices=sorted(CHATBOTS), default="advanced")
+    parser.add_argument("--config", help="config file with custom rules (default: config.py)")
+    parser.add_argument("--field", default="message", help="JSONL key holding the message")
+    parser.add_argument("--label", default="intent", help="JSONL key holding the expected intent")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="messages per worker task")
+    parser.add_argument("--mismatches", type=int, default=20, help="mismatches to list")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache enabled")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown as a fraction of the baseline (default 0.2)")
+    args = parser.parse_args()
+
+    chatbot_class = CHATBOTS[args.bot]
+    if args.config:
+        chatbot_class.config_path = args.config
+    if not args.cache:
+        chatbot_class.cache_size = 0
+    if args.corpora:
+        cases = read_corpus(args.corpora, args.field, args.label)
+    else:
+        cases = LABELLED_CASES + ADVANCED_CASES + FALLBACK_CASES if args.bot == "advanced" else LABELLED_CASES
+
+    report = evaluate(chatbot_class.get_rulebook(), cases, args.processes, args.chunk_size, args.mismatches)
+    print(f" INTENT ACCURACY ({args.bot} chatbot, {args.processes} processes)")
+    print("=" * 55)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare_reports(json.load(file), report, args.threshold)
+        for regression in regressions:
+            print(f" REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f" No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
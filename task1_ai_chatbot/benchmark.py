@@ -0,0 +1,556 @@
+"""
+Benchmarks for the chatbot rule engine
+Measures matching latency as the rulebook grows, worst-case latency on
+adversarial input, throughput/latency percentiles of both chatbots, and the
+rule evaluations best-match scoring skips
+"""
+
+import argparse
+import json
+import platform
+import random
+import string
+import sys
+import time
+
+from advanced_chatbot import AdvancedRuleBasedChatbot
+from chatbot import RuleBasedChatbot
+from config import CUSTOM_PATTERNS
+from intent_classifier import example_phrases
+from profiling import MatchProfiler
+from rule_engine import KeywordIndexMatcher, ProfiledMatcher, Rulebook, RuleMatcher
+from rulebook_config import DEFAULT_CONFIG_PATH
+
+# Everyday words that do not trigger any rule, used to pad synthetic messages
+FILLER_WORDS = [
+    "the", "a", "this", "that", "really", "maybe", "about", "with", "from",
+    "because", "very", "some", "would", "could", "should", "there", "their",
+    "something", "anything", "people", "think", "know", "going", "still",
+]
+
+# Ways people wrap what they want to say, for chat_traffic()
+TRAFFIC_TEMPLATES = [
+    "{}", "hey, {}", "{} please", "so {} today?", "i was wondering, {}", "{} and also {}",
+    "honestly i think {}", "ok {}!", "{}... {}", "well, {} i guess",
+]
+
+
+def base_patterns():
+    """Return every pattern the chatbots and config.py ship with, in order"""
+    patterns = {}
+    for source in (AdvancedRuleBasedChatbot().patterns, RuleBasedChatbot().patterns, CUSTOM_PATTERNS):
+        for pattern, responses in source.items():
+            patterns.setdefault(pattern, responses)
+    return list(patterns)
+
+
+def synthetic_rulebook(rule_count, seed=0):
+    """Return (patterns, keywords): the shipped rules padded with generated keyword rules"""
+    rng = random.Random(seed)
+    patterns = base_patterns()[:rule_count]
+    keywords = []
+
+    while len(patterns) < rule_count:
+        words = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+                 for _ in range(rng.randint(3, 6))]
+        # Some intents are phrases rather than single words
+        if rng.random() < 0.3:
+            words[0] = f"{words[0]} {rng.choice(FILLER_WORDS)}"
+        keywords.extend(word.split()[0] for word in words)
+        patterns.append(r'\b(' + '|'.join(words) + r')\b')
+    return patterns, keywords
+
+
+def synthetic_messages(keywords, count, seed=0):
+    """Return chat-sized messages, about half of which mention a rule keyword"""
+    rng = random.Random(seed)
+    vocabulary = keywords or ["hello"]
+    messages = []
+    for _ in range(count):
+        words = [rng.choice(FILLER_WORDS) for _ in range(rng.randint(2, 12))]
+        if rng.random() < 0.5:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(vocabulary))
+        messages.append(' '.join(words))
+    return messages
+
+
+def time_per_message(match, messages, repeat=3):
+    """Return the best-of-repeat average time per message in microseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in messages:
+            match(message)
+        best = min(best, time.perf_counter() - start)
+    return best / len(messages) * 1e6
+
+
+def benchmark_rulebook_growth(sizes=(20, 100, 1000, 10000, 50000), message_count=500, linear_limit=2000):
+    """Compare both matchers as the rulebook grows; returns a list of result dicts
+
+    RuleMatcher compiles one regex of every rule, so it is only measured up to
+    linear_limit rules.
+    """
+    results = []
+    for size in sizes:
+        patterns, keywords = synthetic_rulebook(size)
+        messages = synthetic_messages(keywords or ["hello", "weather", "thanks"], message_count)
+        result = {"rules": size}
+
+        matchers = [("keyword_index", KeywordIndexMatcher)]
+        if size <= linear_limit:
+            matchers.append(("linear", RuleMatcher))
+
+        for name, matcher_class in matchers:
+            start = time.perf_counter()
+            matcher = matcher_class(patterns)
+            result[f"{name}_build_ms"] = (time.perf_counter() - start) * 1e3
+            result[f"{name}_us"] = time_per_message(matcher.best_match, messages)
+
+        results.append(result)
+    return results
+
+
+def adversarial_inputs(size):
+    """Return {case name: message} of pathological messages about size characters long"""
+    filler = ' '.join(FILLER_WORDS)
+    return {
+        "whitespace_run": "hi" + " " * size + "there",
+        "mixed_whitespace": " \t\n\r" * (size // 4),
+        "repeated_keyword": "hello " * (size // 6),
+        "keyword_soup": "weather thanks sorry bye music " * (size // 31),
+        "repeated_contraction": "it's i'm don't " * (size // 15),
+        "no_match_prose": (filler + " ") * (size // (len(filler) + 1)),
+        "single_token": "a" * size,
+        "punctuation": "!?." * (size // 3),
+        "non_ascii": "\u017forry \u0130stanbul caf\u00e9 " * (size // 22),
+    }
+
+
+def unlimited(chatbot_class):
+    """Return a subclass of chatbot_class with the input size and time limits turned off"""
+    return type(f"Unlimited{chatbot_class.__name__}", (chatbot_class,),
+                {"__slots__": (), "max_input_length": None, "match_time_budget": None})
+
+
+def worst_case_latency(chatbot, message, repeat=3):
+    """Return the slowest of repeat uncached get_response() calls, in milliseconds"""
+    worst = 0.0
+    for _ in range(repeat):
+        chatbot.rulebook.cache.clear()
+        start = time.perf_counter()
+        chatbot.get_response(message)
+        worst = max(worst, time.perf_counter() - start)
+    return worst * 1e3
+
+
+def benchmark_worst_case(sizes=(1_000, 64_000, 1_000_000), repeat=3):
+    """Feed adversarial messages to both chatbots, with and without input limits"""
+    results = []
+    for chatbot_class in (RuleBasedChatbot, AdvancedRuleBasedChatbot):
+        limited, unbounded = chatbot_class(), unlimited(chatbot_class)()
+        for size in sizes:
+            for case, message in adversarial_inputs(size).items():
+                results.append({
+                    "chatbot": chatbot_class.__name__,
+                    "case": case,
+                    "chars": len(message),
+                    "limited_ms": worst_case_latency(limited, message, repeat),
+                    "unlimited_ms": worst_case_latency(unbounded, message, repeat),
+                })
+    return results
+
+
+def print_worst_case_results(results):
+    """Print the adversarial input benchmark as a table, slowest case per chatbot last"""
+    print(f"{'chatbot':>24} | {'case':>20} | {'chars':>9} | {'limited (ms)':>12} | {'no limits (ms)':>14}")
+    print("-" * 91)
+    for result in results:
+        print(f"{result['chatbot']:>24} | {result['case']:>20} | {result['chars']:>9} | "
+              f"{result['limited_ms']:12.3f} | {result['unlimited_ms']:14.3f}")
+    for chatbot in sorted({result["chatbot"] for result in results}):
+        worst = max((result for result in results if result["chatbot"] == chatbot),
+                    key=lambda result: result["limited_ms"])
+        print(f" Worst case for {chatbot}: {worst['case']} ({worst['chars']} chars) "
+              f"{worst['limited_ms']:.3f} ms")
+
+
+def with_extra_rules(chatbot_class, label, config_path, patterns):
+    """Return a subclass of chatbot_class reading config_path, with patterns appended to its rulebook"""
+    def build_rulebook(cls):
+        return chatbot_class.build_rulebook.__func__(cls).extended(patterns)
+    return type(f"{chatbot_class.__name__}[{label}]", (chatbot_class,),
+                {"__slots__": (), "config_path": config_path, "build_rulebook": classmethod(build_rulebook)})
+
+
+def rulebook_variants(synthetic_sizes=(1000, 10000)):
+    """Return [(label, config path, extra patterns)]: built-in rules, plus config.py, plus generated rules"""
+    variants = [("builtin", None, {}), ("config", DEFAULT_CONFIG_PATH, {})]
+    shipped = len(base_patterns())
+    for size in synthetic_sizes:
+        patterns, _ = synthetic_rulebook(shipped + size)
+        generated = {pattern: ["Generated rule"] for pattern in patterns[shipped:]}
+        variants.append((f"config+{size}", DEFAULT_CONFIG_PATH, generated))
+    return variants
+
+
+def fit_to_length(message, chars, filler):
+    """Pad message with filler words, or cut it, to exactly chars characters"""
+    pieces = [message]
+    length = len(message)
+    index = 0
+    while length < chars:
+        word = filler[index % len(filler)]
+        pieces.append(word)
+        length += len(word) + 1
+        index += 1
+    return ' '.join(pieces)[:chars]
+
+
+def sized_corpus(chars, count, seed=0):
+    """Return count synthetic messages of exactly chars characters"""
+    keywords = ["hello", "weather", "thanks", "music", "sorry", "food", "time", "travel", "bye"]
+    return [fit_to_length(message, chars, FILLER_WORDS)
+            for message in synthetic_messages(keywords, count, seed)]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    rank = max(1, -(-len(sorted_values) * fraction // 1))
+    return sorted_values[int(rank) - 1]
+
+
+def measure_throughput(chatbot, messages):
+    """Answer every message once; returns msgs/sec and p50/p95/p99 latency in microseconds"""
+    chatbot.rulebook.cache.clear()
+    rng = random.Random(0)
+    latencies = []
+    start = time.perf_counter()
+    for message in messages:
+        began = time.perf_counter()
+        chatbot.get_response(message, rng)
+        latencies.append(time.perf_counter() - began)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "messages": len(messages),
+        "msgs_per_sec": len(messages) / elapsed,
+        "p50_us": percentile(latencies, 0.50) * 1e6,
+        "p95_us": percentile(latencies, 0.95) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+    }
+
+
+def benchmark_suite(lengths=(1, 10, 100, 1000, 10000), synthetic_sizes=(1000, 10000), message_count=300):
+    """Measure both chatbots over every rulebook variant and message length
+
+    Returns a JSON-serializable report: environment metadata plus one result
+    per (chatbot, rulebook, length) cell, keyed by a stable name so reports
+    from different releases can be compared with compare_reports().
+    """
+    corpora = {chars: sized_corpus(chars, message_count) for chars in lengths}
+    results = []
+    for label, config_path, patterns in rulebook_variants(synthetic_sizes):
+        for chatbot_class in (RuleBasedChatbot, AdvancedRuleBasedChatbot):
+            chatbot = with_extra_rules(chatbot_class, label, config_path, patterns)()
+            rules = len(chatbot.patterns)
+            for chars, messages in corpora.items():
+                result = {
+                    "name": f"{chatbot_class.__name__}/{label}/{chars}",
+                    "chatbot": chatbot_class.__name__,
+                    "rulebook": label,
+                    "rules": rules,
+                    "chars": chars,
+                }
+                result.update(measure_throughput(chatbot, messages))
+                results.append(result)
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": results,
+    }
+
+
+def compare_reports(baseline, current, threshold=0.2):
+    """Return the regressions of current against baseline, as a list of strings
+
+    A cell regresses when its throughput falls, or its p99 latency rises, by
+    more than threshold (a fraction) relative to the baseline cell of the
+    same name. Cells missing from either report are ignored.
+    """
+    previous = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        if result["msgs_per_sec"] < before["msgs_per_sec"] * (1 - threshold):
+            regressions.append(f"{result['name']}: throughput {before['msgs_per_sec']:.0f} -> "
+                               f"{result['msgs_per_sec']:.0f} msgs/sec")
+        if result["p99_us"] > before["p99_us"] * (1 + threshold):
+            regressions.append(f"{result['name']}: p99 {before['p99_us']:.1f} -> {result['p99_us']:.1f} us")
+    return regressions
+
+
+def print_suite_results(report):
+    """Print the throughput benchmark as a table"""
+    print(f"{'chatbot':>24} | {'rulebook':>12} | {'rules':>6} | {'chars':>6} | {'msgs/sec':>10} | "
+          f"{'p50 (us)':>9} | {'p95 (us)':>9} | {'p99 (us)':>9}")
+    print("-" * 103)
+    for result in report["results"]:
+        print(f"{result['chatbot']:>24} | {result['rulebook']:>12} | {result['rules']:>6} | {result['chars']:>6} | "
+              f"{result['msgs_per_sec']:10.0f} | {result['p50_us']:9.1f} | {result['p95_us']:9.1f} | "
+              f"{result['p99_us']:9.1f}")
+
+
+def misspell(word, rng):
+    """Return word with one random typo: a dropped, swapped, doubled or replaced letter"""
+    position = rng.randrange(len(word) - 1)
+    typo = rng.choice(("drop", "swap", "double", "replace"))
+    if typo == "drop":
+        return word[:position] + word[position + 1:]
+    if typo == "swap":
+        return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+    if typo == "double":
+        return word[:position] + word[position] + word[position:]
+    return word[:position] + rng.choice(string.ascii_lowercase) + word[position + 1:]
+
+
+def benchmark_typo_correction(sizes=(20, 100, 1000, 10000), message_count=500, seed=0):
+    """Measure the cost and recall of typo correction as the rulebook grows
+
+    For each rulebook, reports the correction index build time, the time per
+    message with typo tolerance on and off for messages that match as typed,
+    messages that match nothing, and messages with one misspelled keyword,
+    plus the share of misspelled messages that still find their rule.
+    """
+    rng = random.Random(seed)
+    results = []
+    for size in sizes:
+        patterns, keywords = synthetic_rulebook(size)
+        keywords = [keyword for keyword in keywords or ["weather", "thanks", "music", "hungry"]
+                    if len(keyword) >= 5]
+        rules = {pattern: ["response"] for pattern in patterns}
+        # No intent classifier, whose guesses would blur what typo correction alone recovers
+        tolerant = Rulebook(rules, ["default"], cache_size=0, match_time_budget=None, intent_threshold=None)
+        strict = Rulebook(rules, ["default"], cache_size=0, match_time_budget=None, typo_tolerance=False,
+                          intent_threshold=None)
+
+        start = time.perf_counter()
+        tolerant.get_speller()
+        result = {"rules": size, "index_build_ms": (time.perf_counter() - start) * 1e3}
+
+        filler = [rng.choice(FILLER_WORDS) for _ in range(message_count)]
+        typed = [rng.choice(keywords) for _ in range(message_count)]
+        corpora = {
+            "matched": [f"{word} {keyword}" for word, keyword in zip(filler, typed)],
+            "unmatched": synthetic_messages([], message_count, seed),
+            "misspelled": [f"{word} {misspell(keyword, rng)}" for word, keyword in zip(filler, typed)],
+        }
+        for name, messages in corpora.items():
+            result[f"{name}_strict_us"] = time_per_message(strict.match, messages)
+            result[f"{name}_tolerant_us"] = time_per_message(tolerant.match, messages)
+        expected = [strict.match(message) for message in corpora["matched"]]
+        recovered = sum(tolerant.match(message) == rule
+                        for message, rule in zip(corpora["misspelled"], expected))
+        result["recovered"] = recovered / message_count
+        results.append(result)
+    return results
+
+
+def print_typo_results(results):
+    """Print the typo correction benchmark as a table"""
+    print(f"{'rules':>7} | {'index (ms)':>10} | {'matched (us)':>15} | {'unmatched (us)':>15} | "
+          f"{'misspelled (us)':>15} | {'recovered':>9}")
+    print(f"{'':>7} | {'':>10} | {'strict/tolerant':>15} | {'strict/tolerant':>15} | {'strict/tolerant':>15} |")
+    print("-" * 87)
+    for result in results:
+        cells = [f"{result[f'{name}_strict_us']:6.1f}/{result[f'{name}_tolerant_us']:<8.1f}"
+                 for name in ("matched", "unmatched", "misspelled")]
+        print(f"{result['rules']:>7} | {result['index_build_ms']:10.1f} | {cells[0]:>15} | {cells[1]:>15} | "
+              f"{cells[2]:>15} | {result['recovered']:9.0%}")
+
+
+def chat_traffic(patterns, count, seed=0):
+    """Return chat-like messages built around the rules' example phrases, a fifth of them off-topic"""
+    rng = random.Random(seed)
+    phrases = [phrase for pattern in patterns for phrase in example_phrases(pattern)]
+    off_topic = synthetic_messages([], count, seed)
+    messages = []
+    for number in range(count):
+        if rng.random() < 0.2:
+            messages.append(off_topic[number])
+            continue
+        template = rng.choice(TRAFFIC_TEMPLATES)
+        messages.append(template.format(*(rng.choice(phrases) for _ in range(template.count("{}")))))
+    return messages
+
+
+def exhaustive_best_match(matcher, text):
+    """Score every rule that matches, as best_match() did before it could stop early"""
+    best_rule = None
+    best_score = 0
+    for index, (start, end) in matcher.scan(text).items():
+        score = (end - start) * (1 - (start / len(text)))
+        if score > best_score:
+            best_score = score
+            best_rule = index
+    return best_rule
+
+
+def benchmark_early_exit(synthetic_sizes=(1000,), message_count=2000, padded_length=1000, linear_limit=100,
+                         seed=0):
+    """Count the rule evaluations best_match() skips on chat-like traffic
+
+    For every rulebook variant and matcher, compares the candidate rules an
+    exhaustive search evaluates with the ones best_match() runs before its
+    upper bounds rule out the rest, checks both pick the same winners and
+    times both. The traffic is measured as generated and padded with filler
+    words to padded_length characters. RuleMatcher is only measured up to
+    linear_limit rules.
+    """
+    results = []
+    for label, config_path, patterns in rulebook_variants(synthetic_sizes):
+        chatbot = with_extra_rules(AdvancedRuleBasedChatbot, label, config_path, patterns)()
+        rulebook = chatbot.rulebook
+        traffic = [chatbot.preprocess_input(message)
+                   for message in chat_traffic(list(chatbot.patterns)[:len(rulebook.intents)], message_count, seed)]
+        corpora = {"chat": traffic,
+                   padded_length: [fit_to_length(message, padded_length, FILLER_WORDS) for message in traffic]}
+        matchers = [("keyword_index", KeywordIndexMatcher)]
+        if len(rulebook.intents) <= linear_limit:
+            matchers.append(("linear", RuleMatcher))
+
+        for name, matcher_class in matchers:
+            matcher = matcher_class(rulebook.matcher.patterns)
+            for chars, messages in corpora.items():
+                exhaustive = [exhaustive_best_match(matcher, message) for message in messages]
+                candidates = 0
+                for message in messages:
+                    found = matcher._candidates(message) if message else None
+                    candidates += len(found[1]) if found is not None else 0
+
+                profiler = MatchProfiler(rulebook.intents, matcher.patterns)
+                early = [ProfiledMatcher(matcher, profiler).best_match(message) for message in messages]
+                evaluated = sum(profiler.evaluations)
+                results.append({
+                    "rulebook": label,
+                    "matcher": name,
+                    "rules": len(matcher),
+                    "chars": chars,
+                    "messages": len(messages),
+                    "exhaustive_evaluations": candidates,
+                    "early_exit_evaluations": evaluated,
+                    "skipped": 1 - evaluated / candidates if candidates else 0.0,
+                    "identical": early == exhaustive,
+                })
+                # Alternate the two so drifting machine load affects both alike
+                exhaustive_us = early_exit_us = float('inf')
+                for _ in range(5):
+                    exhaustive_us = min(exhaustive_us, time_per_message(
+                        lambda text: exhaustive_best_match(matcher, text), messages, 1))
+                    early_exit_us = min(early_exit_us, time_per_message(matcher.best_match, messages, 1))
+                results[-1].update(exhaustive_us=exhaustive_us, early_exit_us=early_exit_us)
+    return results
+
+
+def print_early_exit_results(results):
+    """Print the early-exit benchmark as a table"""
+    print(f"{'rulebook':>12} | {'matcher':>13} | {'rules':>6} | {'chars':>5} | {'evaluations':>21} | "
+          f"{'skipped':>7} | {'us/msg':>17} | {'same':>4}")
+    print(f"{'':>12} | {'':>13} | {'':>6} | {'':>5} | {'exhaustive/early exit':>21} | {'':>7} | "
+          f"{'exhaustive/early':>17} |")
+    print("-" * 108)
+    for result in results:
+        evaluations = f"{result['exhaustive_evaluations']}/{result['early_exit_evaluations']}"
+        timings = f"{result['exhaustive_us']:.1f}/{result['early_exit_us']:.1f}"
+        print(f"{result['rulebook']:>12} | {result['matcher']:>13} | {result['rules']:>6} | {result['chars']:>5} | "
+              f"{evaluations:>21} | {result['skipped']:7.0%} | {timings:>17} | "
+              f"{'yes' if result['identical'] else 'NO':>4}")
+
+
+def print_growth_results(results):
+    """Print the rulebook growth benchmark as a table"""
+    print(f"{'rules':>8} | {'index build (ms)':>16} | {'keyword index (us/msg)':>22} | {'linear scan (us/msg)':>20}")
+    print("-" * 77)
+    for result in results:
+        linear = result.get("linear_us")
+        linear = f"{linear:20.1f}" if linear is not None else f"{'-':>20}"
+        print(f"{result['rules']:>8} | {result['keyword_index_build_ms']:16.1f} | "
+              f"{result['keyword_index_us']:22.1f} | {linear}")
+
+
+def main():
+    """Run the rule engine benchmarks from the command line"""
+    parser = argparse.ArgumentParser(description="Benchmark the chatbot rule engine")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 1000, 10000, 50000],
+                        help="rulebook sizes to measure")
+    parser.add_argument("--messages", type=int, default=500, help="messages per measurement")
+    parser.add_argument("--worst-case", action="store_true",
+                        help="benchmark adversarial inputs instead of rulebook growth")
+    parser.add_argument("--typos", action="store_true",
+                        help="benchmark typo correction instead of rulebook growth")
+    parser.add_argument("--early-exit", action="store_true",
+                        help="count the rule evaluations best-match scoring skips instead of rulebook growth")
+    parser.add_argument("--suite", action="store_true",
+                        help="measure chatbot throughput and latency percentiles instead of rulebook growth")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[1, 10, 100, 1000, 10000],
+                        help="message lengths in characters for --suite")
+    parser.add_argument("--synthetic-rules", type=int, nargs="+", default=[1000, 10000],
+                        help="generated rules added on top of config.py for --suite")
+    parser.add_argument("--output", help="write the --suite report as JSON to this file")
+    parser.add_argument("--compare", help="baseline --suite JSON report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown as a fraction of the baseline (default 0.2)")
+    args = parser.parse_args()
+
+    if args.suite:
+        report = benchmark_suite(args.lengths, args.synthetic_rules, args.messages)
+        print(" CHATBOT THROUGHPUT BENCHMARK")
+        print("=" * 103)
+        print_suite_results(report)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as file:
+                json.dump(report, file, indent=2)
+        if args.compare:
+            with open(args.compare, encoding="utf-8") as file:
+                regressions = compare_reports(json.load(file), report, args.threshold)
+            for regression in regressions:
+                print(f" REGRESSION {regression}")
+            if regressions:
+                sys.exit(1)
+            print(f" No regressions beyond {args.threshold:.0%} of {args.compare}")
+        return
+
+    if args.early_exit:
+        print(" EARLY-EXIT BEST MATCH BENCHMARK")
+        print("=" * 108)
+        results = benchmark_early_exit(args.synthetic_rules, args.messages)
+        print_early_exit_results(results)
+        if not all(result["identical"] for result in results):
+            sys.exit(1)
+        return
+
+    if args.typos:
+        print(" TYPO CORRECTION BENCHMARK")
+        print("=" * 87)
+        print_typo_results(benchmark_typo_correction(args.sizes, args.messages))
+        return
+
+    if args.worst_case:
+        print(" ADVERSARIAL INPUT BENCHMARK")
+        print("=" * 91)
+        print_worst_case_results(benchmark_worst_case())
+        return
+
+    print(" RULE ENGINE BENCHMARK")
+    print("=" * 77)
+    print_growth_results(benchmark_rulebook_growth(args.sizes, args.messages))
+
+
+if __name__ == "__main__":
+    main()
@@ -109,7 +109,7 @@ CONVERSATION_STARTERS = {
 SETTINGS = {
     "max_conversation_length": 50,  # Maximum turns before suggesting a break
     "response_variation": True,     # Use random response selection
-    "show_typing_indicator": False, # Simulate typing (for future enhancement)
+    "show_typing_indicator": False, # Send a typing event before streamed replies
     "conversation_starter_frequency": 0.3,  # 30% chance of using conversation starters
     "enable_emoji": True,          # Use emojis in responses
     "case_sensitive": False,       # Pattern matching case sensitivity
@@ -0,0 +1,294 @@
+"""
+Fallback intent classifier for the rule-based chatbots
+Scores messages no rule matched against every rule's example phrases
+"""
+
+import math
+import re
+import sys
+import zlib
+from array import array
+
+try:
+    import numpy
+except ImportError:  # numpy is optional; the pure-Python scorer computes the same scores
+    numpy = None
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+# Pieces of a pattern's source between regex syntax, once escapes such as \b are removed
+PHRASE_SPLIT = re.compile(r'[|()\[\]?*+{}.^$]')
+ESCAPE = re.compile(r'\\.')
+WORD = re.compile(r'[a-z]+')
+
+# Function words that say nothing about the intent; they get no features
+STOP_WORDS = frozenset("""
+    a about am an and are as at be been but by can could do does did for from get got had
+    has have how i if in is it its just like me my of on or really so some that the
+    them there they this to very was we were what when where who why will with would
+    you your
+""".split())
+
+# Similarity needed to classify a message, tuned on accuracy_harness.FALLBACK_CASES:
+# the best accuracy there is from 0.52 to 0.55
+DEFAULT_THRESHOLD = 0.53
+
+# Largest phrase matrix (rows x features) scored densely when scipy is missing
+MAX_DENSE_CELLS = 20_000_000
+
+# A matrix product sums a score in another order than scores() and can differ
+# from it in the last bits; classify_many() hands a message whose outcome
+# depends on a difference this small to classify()
+SCORE_TOLERANCE = 1e-9
+
+
+def example_phrases(pattern):
+    """Return the literal phrases of a rule pattern: r'\\b(how are you|hi)\\b' -> ['how are you', 'hi']"""
+    phrases = []
+    for piece in PHRASE_SPLIT.split(ESCAPE.sub(' ', pattern.lower())):
+        words = WORD.findall(piece)
+        if words:
+            phrase = ' '.join(words)
+            if phrase not in phrases:
+                phrases.append(phrase)
+    return phrases
+
+
+def hashed_features(text, dimensions):
+    """Return {feature column: count} for the words and letter trigrams of a text's content words
+
+    Trigrams are taken from each word padded with spaces, so "raining" still
+    shares features with "rain". Features are hashed with CRC32, which is
+    stable across processes, into dimensions columns.
+    """
+    mask = dimensions - 1
+    counts = {}
+    for word in WORD.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        column = zlib.crc32(b'w:' + word.encode()) & mask
+        counts[column] = counts.get(column, 0) + 1
+        padded = f' {word} '
+        for i in range(len(padded) - 2):
+            column = zlib.crc32(b'c:' + padded[i:i + 3].encode()) & mask
+            counts[column] = counts.get(column, 0) + 1
+    return counts
+
+
+class IntentClassifier:
+    """Hashed TF-IDF nearest-phrase classifier over the example phrases of every rule
+
+    Each phrase becomes an L2-normalized TF-IDF vector of hashed word and
+    letter-trigram features. A message scores against a rule as the cosine
+    similarity with the rule's closest phrase, and classify() returns the best
+    rule if that score reaches threshold (ties go to the rule listed first).
+
+    Single messages use an inverted index from feature to phrases.
+    classify_many() scores a whole batch with one sparse (scipy) or dense
+    (numpy) matrix product when those are installed (requirements-optional.txt),
+    and falls back to the inverted index otherwise. Either way it returns what
+    classify() would.
+    """
+
+    def __init__(self, rule_phrases, threshold=DEFAULT_THRESHOLD, dimensions=2 ** 20):
+        self.threshold = threshold
+        self.dimensions = dimensions
+        self.rule_count = len(rule_phrases)
+
+        # One row per phrase, grouped by rule in rulebook order
+        self.row_rules = []
+        rows = []
+        for rule, phrases in enumerate(rule_phrases):
+            for phrase in phrases:
+                self.row_rules.append(rule)
+                rows.append(hashed_features(phrase, dimensions))
+
+        document_frequency = {}
+        for row in rows:
+            for column in row:
+                document_frequency[column] = document_frequency.get(column, 0) + 1
+        self.idf = {column: math.log((1 + len(rows)) / (1 + frequency)) + 1
+                    for column, frequency in document_frequency.items()}
+
+        # Feature column -> (phrase rows using it, their weights), as compact arrays
+        postings = {}
+        for row_index, row in enumerate(rows):
+            for column, weight in self._weigh(row).items():
+                rows_and_weights = postings.get(column)
+                if rows_and_weights is None:
+                    rows_and_weights = postings[column] = (array('i'), array('d'))
+                rows_and_weights[0].append(row_index)
+                rows_and_weights[1].append(weight)
+        self.postings = postings
+
+        self._matrix = None
+
+    def tables(self):
+        """Return the classifier's weights as a dict of plain values (marshal-able), for from_tables()
+
+        The postings arrays are saved as raw bytes, which load back without
+        creating an object per weight.
+        """
+        return {
+            "dimensions": self.dimensions,
+            "rule_count": self.rule_count,
+            "row_rules": self.row_rules,
+            "idf": self.idf,
+            "byteorder": sys.byteorder,
+            "postings": {column: (rows.tobytes(), weights.tobytes())
+                         for column, (rows, weights) in self.postings.items()},
+        }
+
+    @classmethod
+    def from_tables(cls, tables, threshold=DEFAULT_THRESHOLD):
+        """Return a classifier with the weights of tables() output, without computing any"""
+        classifier = cls.__new__(cls)
+        classifier.threshold = threshold
+        classifier.dimensions = tables["dimensions"]
+        classifier.rule_count = tables["rule_count"]
+        classifier.row_rules = tables["row_rules"]
+        classifier.idf = tables["idf"]
+        swap = tables["byteorder"] != sys.byteorder
+        postings = {}
+        for column, (row_bytes, weight_bytes) in tables["postings"].items():
+            rows, weights = array('i'), array('d')
+            rows.frombytes(row_bytes)
+            weights.frombytes(weight_bytes)
+            if swap:
+                rows.byteswap()
+                weights.byteswap()
+            postings[column] = (rows, weights)
+        classifier.postings = postings
+        classifier._matrix = None
+        return classifier
+
+    def _weigh(self, counts):
+        """Return the L2-normalized TF-IDF vector of known feature counts"""
+        idf = self.idf
+        vector = {column: count * idf[column] for column, count in counts.items() if column in idf}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if not norm:
+            return {}
+        return {column: weight / norm for column, weight in vector.items()}
+
+    def vector(self, text):
+        """Return the TF-IDF vector of a message over the features the phrases use"""
+        return self._weigh(hashed_features(text, self.dimensions))
+
+    def scores(self, text):
+        """Return {rule index: similarity of its closest phrase} for the rules sharing a feature"""
+        row_scores = {}
+        postings = self.postings
+        for column, weight in self.vector(text).items():
+            rows_and_weights = postings.get(column)
+            if rows_and_weights is None:
+                continue
+            for row, row_weight in zip(*rows_and_weights):
+                row_scores[row] = row_scores.get(row, 0.0) + weight * row_weight
+
+        rule_scores = {}
+        row_rules = self.row_rules
+        for row, score in row_scores.items():
+            rule = row_rules[row]
+            if score > rule_scores.get(rule, 0.0):
+                rule_scores[rule] = score
+        return rule_scores
+
+    def _pick(self, rule_scores):
+        """Return the best rule of {rule: score} if it reaches the threshold, else None"""
+        best_rule = None
+        best_score = 0.0
+        for rule, score in rule_scores.items():
+            if score > best_score or (score == best_score and best_rule is not None and rule < best_rule):
+                best_rule, best_score = rule, score
+        if best_rule is None or best_score < self.threshold:
+            return None
+        return best_rule
+
+    def classify(self, text):
+        """Return the index of the rule the message is closest to, or None below the threshold"""
+        return self._pick(self.scores(text))
+
+    def classify_many(self, texts):
+        """classify() every message of a list, with one matrix product when numpy is available"""
+        texts = list(texts)
+        matrix = self._phrase_matrix() if texts else None
+        if matrix is None:
+            return [self.classify(text) for text in texts]
+
+        phrases, columns, row_starts, row_owners = matrix
+        queries = [self.vector(text) for text in texts]
+        if sparse is not None:
+            data, indices, indptr = [], [], [0]
+            for vector in queries:
+                for column, weight in vector.items():
+                    indices.append(columns[column])
+                    data.append(weight)
+                indptr.append(len(indices))
+            query_matrix = sparse.csr_matrix((data, indices, indptr), shape=(len(texts), len(columns)))
+            row_scores = (query_matrix @ phrases.T).toarray()
+        else:
+            query_matrix = numpy.zeros((len(texts), len(columns)))
+            for position, vector in enumerate(queries):
+                for column, weight in vector.items():
+                    query_matrix[position, columns[column]] = weight
+            row_scores = query_matrix @ phrases.T
+
+        # Score of a rule = score of its closest phrase; argmax keeps the first (lowest) rule on ties
+        rule_scores = numpy.maximum.reduceat(row_scores, row_starts, axis=1)
+        best = rule_scores.argmax(axis=1)
+        best_scores = rule_scores[numpy.arange(len(texts)), best]
+        if rule_scores.shape[1] > 1:
+            runner_up_scores = numpy.partition(rule_scores, -2, axis=1)[:, -2]
+        else:
+            runner_up_scores = numpy.zeros(len(texts))
+
+        rules = []
+        for text, choice, score, runner_up in zip(texts, best, best_scores, runner_up_scores):
+            if score <= 0:
+                rules.append(None)
+            elif abs(score - self.threshold) <= SCORE_TOLERANCE or score - runner_up <= SCORE_TOLERANCE:
+                rules.append(self.classify(text))  # At the threshold or a near tie: score exactly as classify()
+            elif score >= self.threshold:
+                rules.append(int(row_owners[choice]))
+            else:
+                rules.append(None)
+        return rules
+
+    def _phrase_matrix(self):
+        """Return (phrase matrix, column ids, first row of each rule, rule of each group), or None
+
+        None when numpy is not installed, there are no phrases, or the dense
+        matrix scipy would have avoided is too large.
+        """
+        if self._matrix is None:
+            self._matrix = False
+            if numpy is not None and self.row_rules:
+                self._matrix = self._build_matrix() or False
+        return self._matrix or None
+
+    def _build_matrix(self):
+        columns = {column: position for position, column in enumerate(self.idf)}
+        shape = (len(self.row_rules), len(columns))
+        if sparse is None and shape[0] * shape[1] > MAX_DENSE_CELLS:
+            return None
+        data, row_indices, column_indices = [], [], []
+        for column, (rows, weights) in self.postings.items():
+            row_indices.extend(rows)
+            column_indices.extend([columns[column]] * len(rows))
+            data.extend(weights)
+        if sparse is not None:
+            phrases = sparse.csr_matrix((data, (row_indices, column_indices)), shape=shape)
+        else:
+            phrases = numpy.zeros(shape)
+            phrases[row_indices, column_indices] = data
+
+        row_starts, row_owners = [], []
+        for row, rule in enumerate(self.row_rules):
+            if not row_owners or row_owners[-1] != rule:
+                row_starts.append(row)
+                row_owners.append(rule)
+        return phrases, columns, numpy.array(row_starts), numpy.array(row_owners)
@@ -0,0 +1,144 @@
+"""
+Local load test for the pre-forked chat server
+Measures replies per second and latency percentiles for several worker counts
+
+Usage:
+    python load_test.py --workers 1 2 4 --duration 5
+
+Every run starts a PreforkServer on a free port and drives it from separate
+client processes, each keeping several connections busy with one message in
+flight at a time. The response cache is disabled unless --cache is given, so
+every message goes through the rule engine. Scaling is only meaningful up to
+the number of CPU cores, and the clients need cores of their own.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+
+from benchmark import percentile, sized_corpus
+from prefork_server import PreforkServer
+from server import CHATBOTS
+
+
+async def _drive_connection(port, messages, offset, deadline, latencies):
+    """Send messages over one connection, one at a time, until the deadline"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        index = offset
+        while time.perf_counter() < deadline:
+            request = json.dumps({"message": messages[index % len(messages)]}).encode() + b"\n"
+            index += 1
+            began = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            reply = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - began)
+            if reply.get("exit"):
+                break
+    finally:
+        writer.close()
+
+
+def client_load(port, connections, duration, messages, offset):
+    """Keep connections busy for duration seconds; returns every reply latency (runs in a client process)"""
+    latencies = []
+
+    async def drive():
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(_drive_connection(port, messages, offset + number * 997, deadline, latencies)
+                               for number in range(connections)))
+
+    asyncio.run(drive())
+    return latencies
+
+
+def measure_server(port, clients, connections, duration, messages):
+    """Load a running server from clients processes; returns replies/sec and latency percentiles"""
+    context = multiprocessing.get_context("fork")
+    with context.Pool(clients) as pool:
+        batches = pool.starmap(client_load, [(port, connections, duration, messages, client * 7919)
+                                             for client in range(clients)])
+
+    latencies = sorted(latency for batch in batches for latency in batch)
+    if not latencies:
+        return {"replies": 0, "replies_per_sec": 0.0, "p50_ms": 0.0, "p99_ms": 0.0}
+    return {
+        "replies": len(latencies),
+        "replies_per_sec": len(latencies) / duration,
+        "p50_ms": percentile(latencies, 0.50) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+    }
+
+
+def load_test(chatbot_class, worker_counts=(1, 2, 4), clients=None, connections=16, duration=5.0,
+              message_count=5000, chars=100, reuse_port=False):
+    """Measure a fresh PreforkServer for every worker count; returns one result per count
+
+    Speedup and efficiency are relative to the first worker count.
+    """
+    # Goodbyes would close the connections, so they are left out
+    chatbot = chatbot_class()
+    messages = [message for message in sized_corpus(chars, message_count) if not chatbot.is_exit_command(message)]
+    clients = clients or os.cpu_count() or 1
+    results = []
+    for workers in worker_counts:
+        server = PreforkServer(chatbot_class, port=0, workers=workers, reuse_port=reuse_port)
+        port = server.start()
+        try:
+            result = measure_server(port, clients, connections, duration, messages)
+        finally:
+            server.stop()
+        result["workers"] = workers
+        results.append(result)
+
+    baseline = results[0]
+    for result in results:
+        speedup = result["replies_per_sec"] / baseline["replies_per_sec"] if baseline["replies_per_sec"] else 0.0
+        result["speedup"] = speedup
+        result["efficiency"] = speedup * baseline["workers"] / result["workers"]
+    return results
+
+
+def print_load_results(results):
+    """Print the load test results as a table"""
+    print(f" {'workers':>7} {'replies':>9} {'replies/s':>11} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'speedup':>8} {'efficiency':>10}")
+    for result in results:
+        print(f" {result['workers']:>7} {result['replies']:>9} {result['replies_per_sec']:>11.0f} "
+              f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['speedup']:>7.2f}x "
+              f"{result['efficiency']:>10.0%}")
+
+
+def main():
+    """Run the load test from the command line"""
+    parser = argparse.ArgumentParser(description="Load test the pre-forked chat server")
+    parser.add_argument("--bot", choices=sorted(CHATBOTS), default="advanced")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+                        help="worker counts to measure")
+    parser.add_argument("--clients", type=int, help="client processes (default: one per CPU)")
+    parser.add_argument("--connections", type=int, default=16, help="connections per client process")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per worker count")
+    parser.add_argument("--messages", type=int, default=5000, help="distinct messages to send")
+    parser.add_argument("--chars", type=int, default=100, help="characters per message")
+    parser.add_argument("--reuse-port", action="store_true", help="use one SO_REUSEPORT socket per worker")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache enabled")
+    args = parser.parse_args()
+
+    chatbot_class = CHATBOTS[args.bot]
+    if not args.cache:
+        chatbot_class.cache_size = 0
+    print(" PRE-FORKED SERVER LOAD TEST")
+    print(f" {args.bot} chatbot, {os.cpu_count()} CPUs, {args.clients or os.cpu_count()} client processes x "
+          f"{args.connections} connections, {args.duration:g}s per run")
+    print("=" * 70)
+    print_load_results(load_test(chatbot_class, args.workers, args.clients, args.connections, args.duration,
+                                 args.messages, args.chars, args.reuse_port))
+
+
+if __name__ == "__main__":
+    main()
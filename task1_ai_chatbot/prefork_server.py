@@ -0,0 +1,202 @@
+"""
+Pre-forked multi-process chat server for the rule-based chatbots
+Builds the rulebook once, then forks worker processes that share it copy-on-write
+
+Each worker runs an asyncio ChatServer (same protocol as server.py) on a
+listening socket created by the parent, or on its own SO_REUSEPORT socket
+so the kernel spreads connections across workers. The parent supervises the
+workers and restarts any that die.
+
+Usage:
+    python prefork_server.py --workers 4
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+from advanced_chatbot import AdvancedRuleBasedChatbot
+from server import CHATBOTS, ChatServer
+
+
+def listening_socket(host, port, backlog=1024, reuse_port=False, listen=True):
+    """Return a non-blocking TCP socket bound to (host, port), listening unless listen is False"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    if listen:
+        sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+class PreforkServer:
+    """Supervisor for worker processes forked after the rulebook is built
+
+    start() builds and warms up the chatbot class's rulebook, moves every
+    object allocated so far out of the garbage collector's reach (gc.freeze),
+    so collections in the workers don't touch and un-share those pages, then
+    forks the workers. supervise() waits for workers to exit and replaces
+    them; a worker that dies within min_uptime seconds of starting is
+    replaced only after restart_delay seconds, so a crash loop can't spin.
+    stop() sends SIGTERM, which workers answer with a graceful ChatServer
+    shutdown, and kills whatever is left after grace_period seconds.
+
+    With reuse_port the parent only reserves the port, and every worker binds
+    and listens on its own SO_REUSEPORT socket; otherwise all workers accept
+    on one shared listening socket.
+    """
+
+    def __init__(self, chatbot_class=AdvancedRuleBasedChatbot, host="127.0.0.1", port=8765, workers=None,
+                 reuse_port=False, idle_timeout=300, backlog=1024, min_uptime=1.0, restart_delay=1.0):
+        self.chatbot_class = chatbot_class
+        self.host = host
+        self.port = port
+        self.worker_count = workers or os.cpu_count() or 1
+        self.reuse_port = reuse_port
+        self.idle_timeout = idle_timeout
+        self.backlog = backlog
+        self.min_uptime = min_uptime
+        self.restart_delay = restart_delay
+        self.workers = {}  # pid -> (slot, start time)
+        self.restarts = 0
+        self._socket = None
+        self._stopping = False
+
+    def start(self):
+        """Build the rulebook, open the socket and fork the workers; returns the bound port"""
+        self.chatbot_class.get_rulebook().warm_up()
+        self._socket = listening_socket(self.host, self.port, self.backlog, self.reuse_port,
+                                        listen=not self.reuse_port)
+        self.port = self._socket.getsockname()[1]
+        gc.collect()
+        gc.freeze()
+        for slot in range(self.worker_count):
+            self._spawn(slot)
+        return self.port
+
+    def _spawn(self, slot):
+        pid = os.fork()
+        if pid == 0:
+            os._exit(self._run_worker(slot))
+        self.workers[pid] = (slot, time.monotonic())
+
+    def _run_worker(self, slot):
+        """Serve in a forked worker until SIGTERM/SIGINT; returns the exit status"""
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            if self.reuse_port:
+                self._socket.close()  # only held to reserve the port
+                sock = listening_socket(self.host, self.port, self.backlog, reuse_port=True)
+            else:
+                sock = self._socket
+            server = ChatServer(self.chatbot_class, idle_timeout=self.idle_timeout, backlog=self.backlog)
+            asyncio.run(server.serve_forever(sock))
+            return 0
+        except BaseException:
+            traceback.print_exc()
+            return 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+
+    def reap(self):
+        """Collect exited workers without blocking and start their replacements; returns how many"""
+        replaced = 0
+        # Wait on the workers by pid so other children of this process are left alone
+        for pid in list(self.workers):
+            try:
+                waited, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                waited, status = pid, 0
+            if waited == 0:
+                continue
+            slot, started = self.workers.pop(pid)
+            if self._stopping:
+                continue
+            print(f" Worker {slot} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}; "
+                  f"restarting it", file=sys.stderr)
+            if time.monotonic() - started < self.min_uptime:
+                time.sleep(self.restart_delay)
+            self._spawn(slot)
+            self.restarts += 1
+            replaced += 1
+        return replaced
+
+    def supervise(self, poll_interval=0.1):
+        """Keep the workers running until SIGINT/SIGTERM, then stop them"""
+        def request_stop(signum, frame):
+            self._stopping = True
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+        try:
+            while not self._stopping:
+                self.reap()
+                time.sleep(poll_interval)
+        finally:
+            self.stop()
+
+    def stop(self, grace_period=5):
+        """Ask every worker to shut down gracefully, kill stragglers and close the socket"""
+        self._stopping = True
+        for pid in self.workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + grace_period
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.02)
+        for pid in self.workers:
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self.workers.clear()
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+def main():
+    """Run the pre-forked chat server from the command line"""
+    parser = argparse.ArgumentParser(description="Serve the rule-based chatbot from several worker processes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--bot", choices=sorted(CHATBOTS), default="advanced")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--reuse-port", action="store_true",
+                        help="give every worker its own SO_REUSEPORT socket instead of sharing one")
+    parser.add_argument("--idle-timeout", type=float, default=300, help="seconds before idle sessions close")
+    parser.add_argument("--config", help="config file with custom rules (default: config.py)")
+    parser.add_argument("--artifact", help="precompiled rulebook to load (see rulebook_artifact.py)")
+    args = parser.parse_args()
+
+    chatbot_class = CHATBOTS[args.bot]
+    if args.config:
+        chatbot_class.config_path = args.config
+    if args.artifact:
+        chatbot_class.artifact_path = args.artifact
+    server = PreforkServer(chatbot_class, args.host, args.port, args.workers, args.reuse_port,
+                           idle_timeout=args.idle_timeout)
+    port = server.start()
+    print(f" Chat server listening on {args.host}:{port} "
+          f"({args.bot} chatbot, {server.worker_count} workers)")
+    server.supervise()
+
+
+if __name__ == "__main__":
+    main()
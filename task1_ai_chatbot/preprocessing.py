@@ -0,0 +1,100 @@
+"""
+Input preprocessing for the rule-based chatbots
+Normalizes messages in linear time before they reach the rule engine
+"""
+
+import re
+
+# Words, as delimited by \b
+WORD_PATTERN = re.compile(r'\w+')
+
+# Joins a batch of messages into one string for process_many()
+BATCH_SEPARATOR = '\x00'
+
+
+def contraction_pattern(contractions):
+    """Compile one regex matching any of the contractions as a whole word
+
+    Group i+1 matches the i-th contraction of the returned list. When every
+    contraction has an apostrophe after its first word (as in "i'm"), the
+    regex starts at the apostrophe and checks the word before it with a
+    lookbehind, so the regex engine can jump from one apostrophe to the next
+    instead of trying every position of the text.
+    """
+    contractions = sorted(contractions, key=len, reverse=True)
+    split = [contraction.partition("'") for contraction in contractions]
+    if all(stem and WORD_PATTERN.fullmatch(stem) and apostrophe for stem, apostrophe, _ in split):
+        alternatives = [f"({re.escape(rest)}(?<=\\b{re.escape(contraction)}))"
+                        for contraction, (_, _, rest) in zip(contractions, split)]
+        return re.compile("'(?:" + '|'.join(alternatives) + r')(?!\w)'), contractions
+
+    alternatives = [f'({re.escape(contraction)})' for contraction in contractions]
+    return re.compile(r'(?<!\w)(?:' + '|'.join(alternatives) + r')(?!\w)'), contractions
+
+
+class Preprocessor:
+    """Compiled normalization pipeline: lowercase, collapse whitespace, expand contractions
+
+    Lowercasing and whitespace collapsing run as single C-level string
+    operations; every contraction is expanded in one pass of one compiled
+    regex, and only where it is a whole word ("it's" but not "bandit's").
+    strip_trailing lists characters to drop from the end of the message.
+    Every step is linear in the length of the message.
+    """
+
+    def __init__(self, contractions=None, strip_trailing=''):
+        self.contractions = dict(contractions or {})
+        self.strip_trailing = strip_trailing
+
+        self._contraction_pattern = None
+        if self.contractions:
+            self._contraction_pattern, self._contraction_order = contraction_pattern(self.contractions)
+
+    def _expand_contractions(self, text):
+        """Expand every whole-word contraction in one pass over the text"""
+        if self._contraction_pattern is None:
+            return text
+
+        pieces = []
+        position = 0
+        for match in self._contraction_pattern.finditer(text):
+            contraction = self._contraction_order[match.lastindex - 1]
+            end = match.end()
+            pieces.append(text[position:end - len(contraction)])
+            pieces.append(self.contractions[contraction])
+            position = end
+        if not pieces:
+            return text
+        pieces.append(text[position:])
+        return ''.join(pieces)
+
+    def _finish(self, text):
+        """Collapse whitespace and strip trailing characters of one lowercased message"""
+        processed = ' '.join(text.split())
+        if self.strip_trailing:
+            processed = processed.rstrip(self.strip_trailing)
+        return processed
+
+    def __call__(self, user_input):
+        """Return the normalized form of one message"""
+        processed = ' '.join(user_input.lower().split())
+        processed = self._expand_contractions(processed)
+        if self.strip_trailing:
+            processed = processed.rstrip(self.strip_trailing)
+        return processed
+
+    def process_many(self, user_inputs):
+        """Return the normalized form of every message in a list
+
+        The batch is lowercased and contraction-expanded as one joined string,
+        so those steps cost one call for the whole batch instead of one per
+        message.
+        """
+        user_inputs = list(user_inputs)
+        if not user_inputs:
+            return []
+        if any(BATCH_SEPARATOR in user_input for user_input in user_inputs):
+            return [self(user_input) for user_input in user_inputs]
+
+        joined = self._expand_contractions(BATCH_SEPARATOR.join(user_inputs).lower())
+        return [self._finish(processed) for processed in joined.split(BATCH_SEPARATOR)]
@@ -0,0 +1,123 @@
+"""
+Per-rule match profiling for the rule-based chatbots
+Counts which rules are evaluated and fire, and how long matching takes
+"""
+
+import time
+
+
+def escape_label(value):
+    """Escape a Prometheus label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    """Render a dict of labels as {name="value",...} (empty for no labels)"""
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in labels.items()) + '}'
+
+
+class MatchProfiler:
+    """Per-rule evaluation, match and hit counters plus match timings for one Rulebook
+
+    An evaluation is one regex search of a rule, a match is a search that
+    found something, and a hit is a message the rule won (including answers
+    served from the response cache, which evaluate nothing). Messages that no
+    rule won count as fallbacks; the chatbot reports the fallbacks it answered
+    with a conversation starter.
+    """
+
+    def __init__(self, intents, patterns):
+        self.intents = tuple(intents)
+        self.patterns = tuple(patterns)
+        self.reset()
+
+    def reset(self):
+        """Zero every counter"""
+        rules = len(self.intents)
+        self.evaluations = [0] * rules
+        self.matches = [0] * rules
+        self.hits = [0] * rules
+        self.rule_seconds = [0.0] * rules
+        self.messages = 0
+        self.fallbacks = 0
+        self.conversation_starters = 0
+        self.match_seconds = 0.0
+
+    def timed_search(self, index, search):
+        """Wrap one rule's search method so its calls are counted and timed"""
+        def profiled_search(text, start):
+            began = time.perf_counter()
+            match = search(text, start)
+            self.rule_seconds[index] += time.perf_counter() - began
+            self.evaluations[index] += 1
+            if match:
+                self.matches[index] += 1
+            return match
+        return profiled_search
+
+    def record_message(self, rule, seconds):
+        """Count one message won by rule (None for a fallback) that took seconds to match"""
+        self.match_seconds += seconds
+        self.messages += 1
+        if rule is None:
+            self.fallbacks += 1
+        else:
+            self.hits[rule] += 1
+
+    def record_conversation_starter(self):
+        """Count a fallback answered with a conversation starter"""
+        self.conversation_starters += 1
+
+    def snapshot(self):
+        """Return every counter as a dict, with one entry per rule"""
+        messages = self.messages
+        return {
+            "messages": messages,
+            "fallbacks": self.fallbacks,
+            "fallback_rate": self.fallbacks / messages if messages else 0.0,
+            "conversation_starters": self.conversation_starters,
+            "conversation_starter_rate": self.conversation_starters / messages if messages else 0.0,
+            "match_seconds": self.match_seconds,
+            "rules": [
+                {
+                    "rule": index,
+                    "intent": intent,
+                    "pattern": pattern,
+                    "evaluations": self.evaluations[index],
+                    "matches": self.matches[index],
+                    "hits": self.hits[index],
+                    "seconds": self.rule_seconds[index],
+                }
+                for index, (intent, pattern) in enumerate(zip(self.intents, self.patterns))
+            ],
+        }
+
+    def prometheus(self, prefix="chatbot", labels=None):
+        """Return the counters in the Prometheus text exposition format"""
+        labels = dict(labels or {})
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for sample_labels, value in samples:
+                lines.append(f"{prefix}_{name}{format_labels({**labels, **sample_labels})} {value}")
+
+        metric("messages_total", "Messages matched against the rulebook.", [({}, self.messages)])
+        metric("fallbacks_total", "Messages no rule matched.", [({}, self.fallbacks)])
+        metric("conversation_starters_total", "Fallbacks answered with a conversation starter.",
+               [({}, self.conversation_starters)])
+        metric("match_seconds_total", "Time spent preprocessing and matching messages.",
+               [({}, repr(self.match_seconds))])
+
+        rule_labels = [{"intent": intent, "rule": str(index)} for index, intent in enumerate(self.intents)]
+        metric("rule_evaluations_total", "Regex searches run per rule.",
+               zip(rule_labels, self.evaluations))
+        metric("rule_matches_total", "Regex searches that matched per rule.",
+               zip(rule_labels, self.matches))
+        metric("rule_hits_total", "Messages won per rule.", zip(rule_labels, self.hits))
+        metric("rule_seconds_total", "Time spent in regex searches per rule.",
+               zip(rule_labels, map(repr, self.rule_seconds)))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,157 @@
+"""
+Transcript replay for the rule-based chatbots
+Streams JSONL or plain-text transcripts through a chatbot and writes JSONL results
+
+Usage:
+    python replay.py transcripts.jsonl more.txt.gz > results.jsonl
+    cat transcript.txt | python replay.py --bot basic
+
+Every input line is read, answered and written before the next one is read,
+so memory use does not depend on the size of the transcripts.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+from rule_engine import item_rng
+from server import CHATBOTS
+
+
+def open_transcript(path):
+    """Open a transcript for reading text lines; '-' is stdin and .gz files are decompressed"""
+    if path == "-":
+        return sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+
+def read_lines(paths):
+    """Yield (source, line number, line) for every line of every transcript, lazily"""
+    for path in paths:
+        transcript = open_transcript(path)
+        try:
+            for number, line in enumerate(transcript, 1):
+                yield path, number, line.rstrip("\r\n")
+        finally:
+            if transcript is not sys.stdin:
+                transcript.close()
+
+
+def parse_records(lines, input_format="auto", field="message"):
+    """Yield (source, line number, record) with the message to replay, skipping blank lines
+
+    JSONL lines are objects holding the message under field (other keys, such
+    as an id, are carried over) or bare JSON strings; text lines are the
+    message itself. In auto format a line is JSON when it parses as a JSON
+    string or object. Unusable lines become records with an "error" and no
+    message.
+    """
+    for source, number, line in lines:
+        if not line.strip():
+            continue
+        if input_format == "text":
+            yield source, number, {"message": line}
+            continue
+
+        try:
+            value = json.loads(line)
+        except ValueError:
+            if input_format == "jsonl":
+                yield source, number, {"error": "invalid JSON"}
+            else:
+                yield source, number, {"message": line}
+            continue
+
+        if isinstance(value, str):
+            yield source, number, {"message": value}
+        elif isinstance(value, dict) and isinstance(value.get(field), str):
+            record = {key: item for key, item in value.items() if key != field}
+            record["message"] = value[field]
+            yield source, number, record
+        elif input_format == "jsonl" or isinstance(value, dict):
+            yield source, number, {"error": f"expected a string or an object with a {field!r} string"}
+        else:
+            yield source, number, {"message": line}
+
+
+def replay(records, chatbot, seed=None):
+    """Yield one result dict per record: the winning rule, the reply and how long each step took
+
+    With a seed, the reply to the n-th record is reproducible (see
+    rule_engine.item_rng).
+    """
+    for index, (source, number, record) in enumerate(records):
+        result = {"source": source, "line": number}
+        if "message" not in record:
+            result.update(record)
+            yield result
+            continue
+
+        message = record.pop("message")
+        rulebook = chatbot.rulebook
+        started = time.perf_counter()
+        rule = rulebook.match_message(message)
+        matched = time.perf_counter()
+        response = chatbot.respond(rulebook, rule, item_rng(seed, index))
+        answered = time.perf_counter()
+
+        result.update(record)
+        result.update({
+            "message": message,
+            "rule": rule,
+            "intent": rulebook.intents[rule] if rule is not None else None,
+            "response": response,
+            "match_us": round((matched - started) * 1e6, 1),
+            "total_us": round((answered - started) * 1e6, 1),
+        })
+        yield result
+
+
+def write_results(results, output):
+    """Write results as JSON lines; returns how many were written"""
+    count = 0
+    for result in results:
+        output.write(json.dumps(result) + "\n")
+        count += 1
+    output.flush()
+    return count
+
+
+def main():
+    """Replay transcripts from the command line"""
+    parser = argparse.ArgumentParser(description="Replay chat transcripts through a rule-based chatbot")
+    parser.add_argument("transcripts", nargs="*", default=["-"],
+                        help="JSONL or text files, optionally .gz ('-' or nothing for stdin)")
+    parser.add_argument("--bot", choices=sorted(CHATBOTS), default="advanced")
+    parser.add_argument("--format", choices=["auto", "jsonl", "text"], default="auto",
+                        help="input format (default: detect per line)")
+    parser.add_argument("--field", default="message", help="JSONL key holding the message")
+    parser.add_argument("--seed", type=int, help="make the chosen replies reproducible")
+    parser.add_argument("--output", help="write results here instead of stdout")
+    args = parser.parse_args()
+
+    chatbot = CHATBOTS[args.bot]()
+    # Build the lazily built parts up front so they don't show up in the first timings
+    chatbot.rulebook.warm_up()
+    records = parse_records(read_lines(args.transcripts), args.format, args.field)
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        count = write_results(replay(records, chatbot, args.seed), output)
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head): stop quietly, and point
+        # stdout at devnull so flushing it at exit doesn't raise again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f" Replayed {count} messages", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
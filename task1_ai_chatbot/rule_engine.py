@@ -0,0 +1,1129 @@
+"""
+Rule matching engine for the rule-based chatbots
+Compiles a rulebook of regex patterns once and reuses it for every message
+"""
+
+import asyncio
+import marshal
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+from types import MappingProxyType
+
+from preprocessing import Preprocessor
+from profiling import MatchProfiler
+from rulebook_artifact import (ArtifactError, LazyIndex, read_artifact, shard_index, source_fingerprint,
+                               write_artifact)
+from rulebook_config import DEFAULT_CONFIG_PATH, RulebookConfig
+from intent_classifier import DEFAULT_THRESHOLD, IntentClassifier, example_phrases
+from spelling import SymSpellIndex, pattern_vocabulary
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Messages that end a conversation
+EXIT_PATTERN = re.compile(r'\b(quit|exit|bye|goodbye)\b')
+
+# Word tokens, as delimited by the \b anchors in the rules
+WORD_PATTERN = re.compile(r'\w+')
+
+# The only non-ASCII characters IGNORECASE treats as equal to an ASCII letter
+IGNORECASE_FOLD = str.maketrans({'\u0130': 'i', '\u0131': 'i', '\u017f': 's', '\u212a': 'k'})
+
+# Pieces a streamed reply is cut at: a word and the whitespace after it
+STREAM_PIECE = re.compile(r'\s*\S+\s*')
+
+# Rules with more keyword variants than this are checked on every message
+MAX_KEYWORDS_PER_RULE = 1000
+
+# Most rules RuleMatcher scans with one combined regex first: the combined
+# scan gets slower than trying the rules one by one at about 150 rules
+GATE_MAX_RULES = 120
+
+# Fewest candidate rules best_match() ranks by their score bounds to stop
+# early; below this, sorting the bounds costs more than the searches it saves
+EARLY_EXIT_MIN_CANDIDATES = 4
+
+
+def _leading_words(items, prefix=''):
+    """Return every word a match of the parsed items must start with, or None if unknown
+
+    A word only counts when the pattern also pins down where it ends (a
+    non-word literal or a \\b after it), so it always shows up as a whole
+    token of the matched text.
+    """
+    for position, (op, av) in enumerate(items):
+        if op is sre_parse.LITERAL:
+            char = chr(av)
+            if WORD_PATTERN.fullmatch(char):
+                prefix += char
+                continue
+            return {prefix} if prefix else None
+
+        if op is sre_parse.AT and av is sre_parse.AT_BOUNDARY:
+            if prefix:
+                return {prefix}
+            continue
+
+        rest = list(items[position + 1:])
+        if op is sre_parse.SUBPATTERN:
+            _, add_flags, del_flags, pattern = av
+            if add_flags or del_flags:
+                return None
+            alternatives = [pattern]
+        elif op is sre_parse.BRANCH:
+            alternatives = av[1]
+        elif op is sre_parse.IN and all(item_op is sre_parse.LITERAL for item_op, _ in av):
+            alternatives = [[item] for item in av]
+        else:
+            return None
+
+        words = set()
+        for alternative in alternatives:
+            alternative_words = _leading_words(list(alternative) + rest, prefix)
+            if alternative_words is None:
+                return None
+            words |= alternative_words
+            if len(words) > MAX_KEYWORDS_PER_RULE:
+                return None
+        return words
+
+    # The pattern ends right after the word, so the text may carry on past it
+    return None
+
+
+@lru_cache(maxsize=65536)
+def compile_rule(pattern, flags=re.IGNORECASE):
+    """Return the compiled regex of one rule, reusing it across rulebook rebuilds"""
+    return re.compile(pattern, flags)
+
+
+@lru_cache(maxsize=65536)
+def extract_keywords(pattern, flags=re.IGNORECASE):
+    """Return the set of words one of which every match of pattern contains, or None
+
+    Works for rules shaped like ``\\b(hello|hi|good morning)\\b``: the keywords
+    are the first word of each alternative. Rules that are not anchored on a
+    word boundary or that start with anything but literal text return None.
+    """
+    items = sre_parse.parse(pattern, flags)
+    if not items or items[0] != (sre_parse.AT, sre_parse.AT_BOUNDARY):
+        return None
+
+    words = _leading_words(list(items))
+    if words is None or not all(word.isascii() for word in words):
+        return None
+    if flags & re.IGNORECASE:
+        words = {word.lower() for word in words}
+    return frozenset(words)
+
+
+@lru_cache(maxsize=65536)
+def max_match_length(pattern, flags=re.IGNORECASE):
+    """Return the most characters a match of pattern can span (sys.maxsize if unbounded)"""
+    _, longest = sre_parse.parse(pattern, flags).getwidth()
+    return longest if longest < sre_parse.MAXREPEAT else sys.maxsize
+
+
+class RuleMatcher:
+    """Precompiled matcher over an ordered list of regex rules
+
+    Every rule is compiled once up front. Up to GATE_MAX_RULES rules, so is a
+    combined alternation of all of them, which scans the message a single
+    time to find the leftmost position where any rule matches: messages that
+    match nothing are rejected by that one scan, and the individual rules only
+    search from that position onwards. Larger rulebooks try every rule from
+    the start of the message, which is faster than the combined scan there.
+    Results are identical to calling ``re.search`` with each raw pattern string.
+    """
+
+    def __init__(self, patterns, flags=re.IGNORECASE):
+        self.patterns = tuple(patterns)
+        self.flags = flags
+
+        # Lowercase patterns match ASCII text case-insensitively exactly as they
+        # match its lowercased form, which lets us skip the slower IGNORECASE path
+        self._ascii_lower = bool(flags & re.IGNORECASE) and \
+            all(pattern == pattern.lower() for pattern in self.patterns)
+        self._compiled = {}
+        self._max_lengths = [None] * len(self.patterns)
+        self._length_order = None
+        self._warm_up()
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def _warm_up(self):
+        """Compile the rules for the common (ASCII) case ahead of the first message"""
+        self._candidates('')
+
+    def _searches(self, flags):
+        """Return the per-rule search methods for flags, compiling them on first use"""
+        searches = self._compiled.get(flags)
+        if searches is None:
+            searches = tuple(compile_rule(pattern, flags).search for pattern in self.patterns)
+            self._compiled[flags] = searches
+        return searches
+
+    def _prepare(self, text):
+        """Return the text and flags to match with"""
+        if self._ascii_lower and text.isascii():
+            return text.lower(), self.flags & ~re.IGNORECASE
+        return text, self.flags
+
+    def _candidates(self, text):
+        """Return (text, [(index, search, start), ...]) for the rules to try, in rule order, or None
+
+        None means no rule can match; a rule's start is the earliest position
+        where its match can begin, and where its search begins.
+        """
+        text, flags = self._prepare(text)
+        if len(self.patterns) > GATE_MAX_RULES:
+            return text, [(index, search, 0) for index, search in enumerate(self._searches(flags))]
+
+        gate = self._compiled.get(('gate', flags))
+        if gate is None:
+            gate = re.compile('|'.join(f'(?:{pattern})' for pattern in self.patterns), flags) \
+                if self.patterns else re.compile(r'(?!)')
+            self._compiled[('gate', flags)] = gate
+
+        first = gate.search(text)
+        if first is None:
+            return None
+        # No rule can match before the first position the combined regex found
+        start = first.start()
+        return text, [(index, search, start) for index, search in enumerate(self._searches(flags))]
+
+    def _ranked(self, candidates, length):
+        """Yield (bound, index, search, start) for the candidates, highest bound first
+
+        The bound is the best score a rule's match could reach: its longest
+        possible match, capped by the text left after its start, times the
+        position factor at its start. Every candidate here has the same start,
+        so the order is that of the rules' longest possible matches, worked
+        out once.
+        """
+        lengths = self._max_lengths
+        order = self._length_order
+        if order is None:
+            for rule, pattern in enumerate(self.patterns):
+                if lengths[rule] is None:
+                    lengths[rule] = max_match_length(pattern, self.flags)
+            order = self._length_order = sorted(range(len(lengths)), key=lambda rule: (-lengths[rule], rule))
+
+        start = candidates[0][2] if candidates else 0
+        room = length - start
+        factor = 1 - (start / length)
+        for rule in order:
+            index, search, start = candidates[rule]
+            yield min(lengths[rule], room) * factor, index, search, start
+
+    def scan(self, text, deadline=None):
+        """Return {rule_index: (start, end)} of the leftmost match of every matching rule
+
+        With a deadline (a time.perf_counter() value), rules left unchecked when
+        it passes are skipped and the matches found so far are returned.
+        """
+        found = {}
+        candidates = self._candidates(text)
+        if candidates is None:
+            return found
+
+        text, candidates = candidates
+        for index, search, start in candidates:
+            match = search(text, start)
+            if match:
+                found[index] = match.span()
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+        return found
+
+    def best_match(self, text, deadline=None):
+        """Return the index of the highest scoring rule, or None if nothing matches
+
+        A match scores its length times how close it starts to the beginning of
+        the text; ties go to the rule listed first. A rule can score at most its
+        longest possible match (capped by the text left after its earliest
+        start) times the position factor at that start. Rules are tried from
+        the highest bound down and the search stops once no remaining rule can
+        beat the best match so far, so the winner is the same as when every
+        rule is scored. Fewer than EARLY_EXIT_MIN_CANDIDATES candidates are
+        simply all scored, in rule order.
+        """
+        length = len(text)
+        candidates = self._candidates(text) if length else None
+        if candidates is None:
+            return None
+
+        text, candidates = candidates
+        if len(candidates) < EARLY_EXIT_MIN_CANDIDATES:
+            ranked = [(sys.maxsize, index, search, start) for index, search, start in candidates]
+        else:
+            ranked = self._ranked(candidates, length)
+        best_rule = None
+        best_score = 0
+        for bound, index, search, start in ranked:
+            if best_rule is not None:
+                if bound < best_score:
+                    break
+                if bound == best_score and index > best_rule:
+                    continue  # could at most tie, and ties go to the earlier rule
+            match = search(text, start)
+            if match:
+                match_start, match_end = match.span()
+                # Score based on match length and position
+                score = (match_end - match_start) * (1 - (match_start / length))
+                if score > best_score or (score == best_score and best_rule is not None and index < best_rule):
+                    best_score = score
+                    best_rule = index
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+        return best_rule
+
+    def first_match(self, text, deadline=None):
+        """Return the index of the first rule (in rulebook order) that matches, or None"""
+        candidates = self._candidates(text)
+        if candidates is None:
+            return None
+
+        text, candidates = candidates
+        for index, search, start in candidates:
+            if search(text, start):
+                return index
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+        return None
+
+
+class KeywordIndexMatcher(RuleMatcher):
+    """Matcher that only runs the rules whose keywords appear in the message
+
+    Keywords are pulled out of each rule with extract_keywords() into an
+    inverted index from word to rule indices. A message is split into words
+    once, the index yields the handful of candidate rules, and only those are
+    confirmed with their regex, so the cost per message depends on the words
+    it contains rather than on the size of the rulebook. Each rule's regex is
+    compiled the first time it becomes a candidate. Rules without extractable
+    keywords are always checked. Results are identical to RuleMatcher.
+
+    An indexed rule's match begins with one of its keywords, so its search
+    starts at the first of them in the message.
+    """
+
+    def __init__(self, patterns, flags=re.IGNORECASE):
+        super().__init__(patterns, flags)
+
+        self.index = {}
+        unindexed = []
+        for rule, pattern in enumerate(self.patterns):
+            keywords = extract_keywords(pattern, flags)
+            if keywords is None:
+                unindexed.append(rule)
+                continue
+            for keyword in keywords:
+                self.index.setdefault(keyword, []).append(rule)
+        self.unindexed = tuple(unindexed)
+
+    @classmethod
+    def from_index(cls, patterns, index, unindexed, max_lengths=None, flags=re.IGNORECASE):
+        """Rebuild a matcher from a saved keyword index, without parsing any pattern"""
+        matcher = cls.__new__(cls)
+        RuleMatcher.__init__(matcher, patterns, flags)
+        matcher.index = index
+        matcher.unindexed = tuple(unindexed)
+        if max_lengths is not None:
+            matcher._max_lengths = list(max_lengths)
+        return matcher
+
+    def _candidates(self, text):
+        if self.flags & re.IGNORECASE:
+            folded = text.lower() if text.isascii() else text.translate(IGNORECASE_FOLD).lower()
+        else:
+            folded = text
+
+        # Position of each word's first occurrence, if folding kept every character in place
+        aligned = len(folded) == len(text)
+        first_seen = {}
+        for word in WORD_PATTERN.finditer(folded):
+            first_seen.setdefault(word.group(), word.start() if aligned else 0)
+
+        index = self.index
+        starts = dict.fromkeys(self.unindexed, 0)
+        for word, position in first_seen.items():
+            for rule in index.get(word, ()):
+                # Words come in order of appearance, so the first one seen is the rule's earliest
+                starts.setdefault(rule, position)
+        if not starts:
+            return None
+
+        text, flags = self._prepare(text)
+        searches = self._compiled.get(flags)
+        if searches is None:
+            searches = self._compiled[flags] = [None] * len(self.patterns)
+
+        candidates = []
+        for rule in sorted(starts):
+            search = searches[rule]
+            if search is None:
+                search = searches[rule] = compile_rule(self.patterns[rule], flags).search
+                self._max_lengths[rule] = max_match_length(self.patterns[rule], self.flags)
+            candidates.append((rule, search, starts[rule]))
+        return text, candidates
+
+    def _ranked(self, candidates, length):
+        lengths = self._max_lengths
+        ranked = [(min(lengths[rule], length - start) * (1 - (start / length)), rule, search, start)
+                  for rule, search, start in candidates]
+        if len(ranked) > 1:
+            # Stable, so candidates with the same bound stay in rule order
+            ranked.sort(key=itemgetter(0), reverse=True)
+        return ranked
+
+    def _warm_up(self):
+        # Rules are compiled lazily, the first time they become a candidate
+        pass
+
+
+class ProfiledMatcher(RuleMatcher):
+    """View of a matcher that reports every rule evaluation to a MatchProfiler
+
+    Only wraps the candidate searches, so winners are exactly those of the
+    wrapped matcher.
+    """
+
+    def __init__(self, matcher, profiler):
+        self.matcher = matcher
+        self.profiler = profiler
+        self._ranked = matcher._ranked
+
+    def _candidates(self, text):
+        candidates = self.matcher._candidates(text)
+        if candidates is None:
+            return None
+        text, candidates = candidates
+        timed = self.profiler.timed_search
+        return text, [(index, timed(index, search), start) for index, search, start in candidates]
+
+
+def item_rng(seed, index):
+    """Return the random source for the index-th message of a seeded batch"""
+    if seed is None:
+        return random
+    return random.Random(f"{seed}:{index}")
+
+
+def _chunks(items, size):
+    """Yield (index of first item, list of items) chunks of an iterable"""
+    iterator = iter(items)
+    first = 0
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield first, chunk
+        first += len(chunk)
+
+
+def split_reply(reply, chunk_size):
+    """Yield a reply in chunks of about chunk_size characters, cut between words"""
+    chunk = ''
+    for piece in STREAM_PIECE.findall(reply):
+        if chunk and len(chunk) + len(piece) > chunk_size:
+            yield chunk
+            chunk = ''
+        chunk += piece
+    if chunk:
+        yield chunk
+
+
+def _respond_chunk(chatbot_class, first, user_inputs, seed):
+    """Answer one chunk of a batch; runs inside pool worker processes"""
+    chatbot = chatbot_class()
+    rulebook = chatbot.rulebook
+    rules = rulebook.match_many(user_inputs)
+    return [chatbot.respond(rulebook, rule, item_rng(seed, index)) for index, rule in enumerate(rules, first)]
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with hit/miss/eviction counters"""
+
+    MISSING = object()
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=MISSING):
+        """Return the cached value for key (marking it recently used), or default"""
+        try:
+            value = self._data[key]
+            self._data.move_to_end(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Cache value under key, evicting the least recently used entry if full"""
+        if self.maxsize <= 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def resize(self, maxsize):
+        """Change the capacity, evicting the oldest entries if needed"""
+        self.maxsize = maxsize
+        while len(self._data) > max(maxsize, 0):
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        self._data.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Return the cache counters as a dict"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class Rulebook:
+    """Compiled, read-only rulebook: patterns, responses and their matcher
+
+    Built once per process and shared by every chatbot instance, so creating
+    a chatbot costs nothing and holds no copy of the rules.
+
+    preprocessor normalizes raw messages before matching. scoring picks the
+    winning rule: 'best' for the highest scoring match, 'first' for the first
+    matching rule in rulebook order. Winners are memoized per preprocessed
+    message in an LRU cache of cache_size entries; messages longer than
+    max_cached_length characters are not cached.
+
+    Raw messages are cut to max_input_length characters before preprocessing,
+    and matching one message stops after match_time_budget seconds (None for
+    no limit), answering with the best rule found so far. Such a cut-short
+    answer depends on machine load: it is never cached, and the message is
+    not retried with typos corrected or classified. matcher may be an
+    already built matcher over patterns, used instead of matcher_class.
+
+    intents names every rule, in rulebook order, for reports and metrics.
+    While a MatchProfiler is attached as profiler, every message is counted
+    and timed; without one, matching pays a single ``is None`` check.
+    settings holds the SETTINGS of the config the rulebook was built from.
+
+    With typo_tolerance, a message that no rule matches is retried once with
+    misspelled rule words corrected ("wether" -> "weather"). The correction
+    index is built on the first such message and never touches messages that
+    match as typed.
+
+    With an intent_threshold, a message still unmatched after that goes to
+    the rule whose example phrases it is most similar to, if the similarity
+    (0 to 1) reaches the threshold; None leaves it unmatched.
+    """
+
+    __slots__ = ('patterns', 'responses', 'intents', 'default_responses', 'conversation_starters',
+                 'matcher', 'preprocessor', 'scoring', 'cache', 'max_cached_length', 'max_input_length',
+                 'match_time_budget', 'profiler', 'settings', 'typo_tolerance', 'speller', 'intent_threshold',
+                 'classifier', 'saved_tables')
+
+    def __init__(self, patterns, default_responses, conversation_starters=(), matcher_class=KeywordIndexMatcher,
+                 preprocessor=None, scoring='best', cache_size=4096, max_cached_length=512,
+                 max_input_length=4096, match_time_budget=0.05, intents=None, settings=None,
+                 typo_tolerance=True, intent_threshold=DEFAULT_THRESHOLD, matcher=None):
+        if scoring not in ('best', 'first'):
+            raise ValueError(f"Unknown scoring {scoring!r}; expected 'best' or 'first'")
+        rules = {pattern: tuple(responses) for pattern, responses in patterns.items()}
+        if intents is None:
+            intents = [f"rule_{index}" for index in range(len(rules))]
+        if len(intents) != len(rules):
+            raise ValueError(f"Got {len(intents)} intent names for {len(rules)} rules")
+        self.patterns = MappingProxyType(rules)
+        self.intents = tuple(intents)
+        self.responses = tuple(rules.values())
+        self.default_responses = tuple(default_responses)
+        self.conversation_starters = tuple(conversation_starters)
+        self.matcher = matcher if matcher is not None else matcher_class(rules)
+        self.preprocessor = preprocessor or Preprocessor()
+        self.scoring = scoring
+        self.cache = LRUCache(cache_size)
+        self.max_cached_length = max_cached_length
+        self.max_input_length = max_input_length
+        self.match_time_budget = match_time_budget
+        self.profiler = None
+        self.settings = MappingProxyType(dict(settings or {}))
+        self.typo_tolerance = typo_tolerance
+        self.speller = None
+        self.intent_threshold = intent_threshold
+        self.classifier = None
+        # Marshaled typo corrector and classifier tables from an artifact, used instead of building them
+        self.saved_tables = {}
+
+    def extended(self, patterns, intents=None, **options):
+        """Return a new Rulebook with the rules of patterns appended to this one's
+
+        Settings are carried over unless overridden in options; the new rules
+        get intents, or rule_N names by default.
+        """
+        rules = {**self.patterns, **patterns}
+        if intents is None:
+            intents = [f"rule_{index}" for index in range(len(self.patterns), len(rules))]
+        settings = {
+            "matcher_class": type(self.matcher),
+            "preprocessor": self.preprocessor,
+            "scoring": self.scoring,
+            "cache_size": self.cache.maxsize,
+            "max_cached_length": self.max_cached_length,
+            "max_input_length": self.max_input_length,
+            "match_time_budget": self.match_time_budget,
+            "settings": self.settings,
+            "typo_tolerance": self.typo_tolerance,
+            "intent_threshold": self.intent_threshold,
+        }
+        settings.update(options)
+        return Rulebook(rules, self.default_responses, self.conversation_starters,
+                        intents=self.intents + tuple(intents), **settings)
+
+    def artifact_payload(self, source=None, runtime_responses=None):
+        """Return the rules, keyword index and response tables as a dict for write_artifact()
+
+        source is the fingerprint of the files the rulebook was built from.
+        Needs a KeywordIndexMatcher. Equal response strings are made one
+        object, which marshal stores once and loads back shared. The typo
+        corrector and classifier are built if need be and saved too, each
+        as one marshaled blob, so a process loading the artifact doesn't
+        rebuild them. Rules whose
+        replies are the ones in runtime_responses ({pattern: replies}
+        computed when a process starts) are saved without replies, for
+        from_artifact_payload() to fill in.
+        """
+        matcher = self.matcher
+        if not isinstance(matcher, KeywordIndexMatcher):
+            raise TypeError(f"Only rulebooks with a KeywordIndexMatcher can be saved, not {type(matcher).__name__}")
+
+        strings = {}
+        def intern(texts):
+            return tuple(strings.setdefault(text, text) for text in texts)
+
+        runtime_responses = runtime_responses or {}
+        def saved(pattern, responses):
+            if pattern in runtime_responses and tuple(runtime_responses[pattern]) == responses:
+                return ()
+            return intern(responses)
+
+        return {
+            "source": source,
+            "patterns": matcher.patterns,
+            "flags": int(matcher.flags),
+            "index": shard_index(matcher.index),
+            "unindexed": matcher.unindexed,
+            "max_lengths": tuple(max_match_length(pattern, matcher.flags) for pattern in matcher.patterns),
+            "intents": self.intents,
+            "responses": tuple(saved(pattern, responses) for pattern, responses in self.patterns.items()),
+            "default_responses": intern(self.default_responses),
+            "conversation_starters": intern(self.conversation_starters),
+            "contractions": self.preprocessor.contractions,
+            "strip_trailing": self.preprocessor.strip_trailing,
+            "scoring": self.scoring,
+            "settings": dict(self.settings),
+            "speller": marshal.dumps(self.get_speller().tables()),
+            "classifier": marshal.dumps(self.get_classifier().tables()),
+        }
+
+    @classmethod
+    def from_artifact_payload(cls, payload, runtime_responses=None, **options):
+        """Rebuild a rulebook from artifact_payload() output; options are further Rulebook arguments
+
+        Nothing is parsed or compiled: each rule's regex is compiled the first
+        time it becomes a candidate, and the keyword index is unpacked as
+        messages need it (see LazyIndex). Rules saved without replies take
+        them from runtime_responses, so they are this process's; raises
+        ArtifactError if one is missing there.
+        """
+        patterns = payload["patterns"]
+        runtime_responses = runtime_responses or {}
+        rules = {}
+        for pattern, responses in zip(patterns, payload["responses"]):
+            if not responses:
+                if pattern not in runtime_responses:
+                    raise ArtifactError(f"no replies saved or given for {pattern!r}")
+                responses = runtime_responses[pattern]
+            rules[pattern] = responses
+        matcher = KeywordIndexMatcher.from_index(patterns, LazyIndex(payload["index"]), payload["unindexed"],
+                                                 payload["max_lengths"], re.RegexFlag(payload["flags"]))
+        rulebook = cls(rules, payload["default_responses"],
+                       payload["conversation_starters"],
+                       preprocessor=Preprocessor(payload["contractions"], payload["strip_trailing"]),
+                       scoring=payload["scoring"], intents=payload["intents"], settings=payload["settings"],
+                       matcher=matcher, **options)
+        rulebook.saved_tables = {"speller": payload["speller"], "classifier": payload["classifier"]}
+        return rulebook
+
+    def same_rules(self, other):
+        """Check whether other picks the same winning rule as this rulebook for every message"""
+        return (self.matcher.patterns == other.matcher.patterns and self.matcher.flags == other.matcher.flags
+                and self.scoring == other.scoring)
+
+    def take_over(self, previous):
+        """Carry the response cache, profiler, typo corrector and classifier over from the rulebook this one replaces
+
+        The cache maps messages to rule indices, so it is only kept when the
+        rules are unchanged; a profiler restarts its counters when they change.
+        The typo corrector and classifier are built from the rules, so they are
+        kept under the same condition (the classifier also needs the same
+        intent_threshold).
+        """
+        if self.same_rules(previous):
+            cache_size = self.cache.maxsize
+            self.cache = previous.cache
+            self.cache.resize(cache_size)
+            self.profiler = previous.profiler
+            if self.typo_tolerance:
+                self.speller = previous.speller
+            if self.intent_threshold is not None and self.intent_threshold == previous.intent_threshold:
+                self.classifier = previous.classifier
+        elif previous.profiler is not None:
+            self.profiler = MatchProfiler(self.intents, self.patterns)
+
+    def match(self, processed_input, matcher=None):
+        """Return the index of the winning rule for a preprocessed message, or None"""
+        if matcher is None:
+            matcher = self.matcher
+        cacheable = len(processed_input) <= self.max_cached_length
+        if cacheable:
+            rule = self.cache.get(processed_input)
+            if rule is not LRUCache.MISSING:
+                return rule
+
+        rule, finished = self._search_rules(processed_input, matcher)
+        if rule is None and finished and self.intent_threshold is not None:
+            rule = self.get_classifier().classify(processed_input)
+
+        # A match cut short by the time budget may not be the real winner
+        if cacheable and finished:
+            self.cache.put(processed_input, rule)
+        return rule
+
+    def _search_rules(self, processed_input, matcher):
+        """Run the rules on a message; returns (winning rule or None, finished within the time budget)"""
+        deadline = None
+        if self.match_time_budget is not None:
+            deadline = time.perf_counter() + self.match_time_budget
+
+        search = matcher.best_match if self.scoring == 'best' else matcher.first_match
+        rule = search(processed_input, deadline)
+        finished = deadline is None or time.perf_counter() <= deadline
+        if rule is None and finished and self.typo_tolerance:
+            # Nothing matched: retry once with misspelled rule words corrected
+            corrected = self.get_speller().correct(processed_input)
+            if corrected != processed_input:
+                rule = search(corrected, deadline)
+                finished = deadline is None or time.perf_counter() <= deadline
+        return rule, finished
+
+    def match_many(self, user_inputs):
+        """Return match_message() of every raw message in a list
+
+        The batch is preprocessed in one pass, and the messages no rule
+        matches are classified together with one classify_many() call.
+        """
+        user_inputs = list(user_inputs)
+        if self.profiler is not None:
+            return [self.match_message(user_input) for user_input in user_inputs]
+
+        processed = self.preprocessor.process_many(user_input[:self.max_input_length]
+                                                   for user_input in user_inputs)
+        rules = [None] * len(processed)
+        unmatched = []
+        for position, text in enumerate(processed):
+            cacheable = len(text) <= self.max_cached_length
+            if cacheable:
+                rule = self.cache.get(text)
+                if rule is not LRUCache.MISSING:
+                    rules[position] = rule
+                    continue
+
+            rule, finished = self._search_rules(text, self.matcher)
+            if rule is None and finished and self.intent_threshold is not None:
+                unmatched.append((position, cacheable))
+                continue
+            rules[position] = rule
+            if cacheable and finished:
+                self.cache.put(text, rule)
+
+        if unmatched:
+            classified = self.get_classifier().classify_many(processed[position] for position, _ in unmatched)
+            for (position, cacheable), rule in zip(unmatched, classified):
+                rules[position] = rule
+                if cacheable:
+                    self.cache.put(processed[position], rule)
+        return rules
+
+    def warm_up(self):
+        """Build the typo corrector and intent classifier, and unpack a saved keyword index, now"""
+        index = getattr(self.matcher, 'index', None)
+        if isinstance(index, LazyIndex):
+            index.load()
+        if self.typo_tolerance:
+            self.get_speller()
+        if self.intent_threshold is not None:
+            self.get_classifier()
+
+    def get_speller(self):
+        """Return the typo corrector over the rules' words, building (or unpacking a saved one) on first use"""
+        speller = self.speller
+        if speller is None:
+            saved = self.saved_tables.get("speller")
+            if saved is not None:
+                speller = SymSpellIndex.from_tables(marshal.loads(saved))
+            else:
+                speller = SymSpellIndex(pattern_vocabulary(self.matcher.patterns))
+            self.speller = speller
+        return speller
+
+    def get_classifier(self):
+        """Return the fallback intent classifier over the rules' phrases, building (or unpacking a saved one) on first use"""
+        classifier = self.classifier
+        if classifier is None:
+            saved = self.saved_tables.get("classifier")
+            if saved is not None:
+                classifier = IntentClassifier.from_tables(marshal.loads(saved), self.intent_threshold)
+            else:
+                classifier = IntentClassifier([example_phrases(pattern) for pattern in self.matcher.patterns],
+                                              self.intent_threshold)
+            self.classifier = classifier
+        return classifier
+
+    def match_message(self, user_input):
+        """Return the index of the winning rule for a raw message, or None"""
+        if self.profiler is not None:
+            return self._profiled_match_message(user_input)
+        return self.match(self.preprocessor(user_input[:self.max_input_length]))
+
+    def _profiled_match_message(self, user_input):
+        """match_message() with every rule evaluation and the total time recorded"""
+        profiler = self.profiler
+        began = time.perf_counter()
+        processed = self.preprocessor(user_input[:self.max_input_length])
+        rule = self.match(processed, ProfiledMatcher(self.matcher, profiler))
+        profiler.record_message(rule, time.perf_counter() - began)
+        return rule
+
+    def record_conversation_starter(self):
+        """Tell the profiler, if any, that a fallback got a conversation starter"""
+        if self.profiler is not None:
+            self.profiler.record_conversation_starter()
+
+
+class SharedRulebookChatbot:
+    """Base class for chatbots whose instances share one Rulebook per class
+
+    Subclasses implement build_rulebook(); it runs once, on first use, and the
+    result is reused by every instance. Instances carry no state of their own.
+    With an artifact_path, the rulebook is loaded from that precompiled file
+    instead, as long as it was built from the current sources.
+    """
+
+    __slots__ = ()
+
+    # Entries in the per-class cache of preprocessed message -> winning rule
+    cache_size = 4096
+    # Longest message (in characters) that is matched; the rest is ignored
+    max_input_length = 4096
+    # Seconds allowed for matching one message (None for no limit)
+    match_time_budget = 0.05
+    # Retry unmatched messages with misspelled rule words corrected
+    typo_tolerance = True
+    # Similarity needed to answer an unmatched message with its closest rule (None to disable)
+    intent_threshold = DEFAULT_THRESHOLD
+    # Config file with custom rules and settings (None for the built-in rules only)
+    config_path = DEFAULT_CONFIG_PATH
+    # Characters per chunk of a streamed reply
+    stream_chunk_size = 32
+    # Precompiled rulebook written by write_artifact() (None to always build from the sources)
+    artifact_path = None
+
+    _rulebook_lock = threading.Lock()
+
+    @classmethod
+    def build_rulebook(cls):
+        """Return the Rulebook for this chatbot class"""
+        raise NotImplementedError
+
+    @classmethod
+    def rulebook_options(cls):
+        """Return the Rulebook keyword arguments configured on the class"""
+        return {
+            "cache_size": cls.cache_size,
+            "max_input_length": cls.max_input_length,
+            "match_time_budget": cls.match_time_budget,
+            "typo_tolerance": cls.typo_tolerance,
+            "intent_threshold": cls.intent_threshold,
+        }
+
+    @classmethod
+    def runtime_responses(cls):
+        """Return {pattern: replies} of the rules whose replies are computed when the process starts
+
+        Artifacts leave these replies out, so a process loading one answers
+        with its own rather than those of the process that saved it.
+        """
+        return {}
+
+    @classmethod
+    def load_config(cls):
+        """Read the class's config file"""
+        return RulebookConfig.load(cls.config_path)
+
+    @classmethod
+    def load_rulebook(cls):
+        """Return the rulebook saved at artifact_path if it matches the current sources, else build it"""
+        if cls.artifact_path is not None:
+            try:
+                payload = read_artifact(cls.artifact_path, source_fingerprint(cls))
+                return Rulebook.from_artifact_payload(payload, cls.runtime_responses(), **cls.rulebook_options())
+            except (OSError, ArtifactError) as error:
+                print(f" Could not use {cls.artifact_path} ({error}); building the rulebook instead")
+        return cls.build_rulebook()
+
+    @classmethod
+    def write_artifact(cls, path):
+        """Build the rulebook from the sources and save it as an artifact at path; returns it"""
+        rulebook = cls.build_rulebook()
+        write_artifact(path, rulebook.artifact_payload(source_fingerprint(cls), cls.runtime_responses()))
+        return rulebook
+
+    @classmethod
+    def get_rulebook(cls):
+        """Return the shared Rulebook, building it on first use"""
+        rulebook = cls.__dict__.get('_rulebook')
+        if rulebook is None:
+            with cls._rulebook_lock:
+                rulebook = cls.__dict__.get('_rulebook')
+                if rulebook is None:
+                    rulebook = cls.load_rulebook()
+                    cls._rulebook = rulebook
+        return rulebook
+
+    @classmethod
+    def rebuild_rulebook(cls):
+        """Return a new rulebook for the class, re-reading the config file, without swapping it in
+
+        Rules seen before reuse their compiled regex. The new rulebook takes
+        over what it can of the current one (see Rulebook.take_over) and is
+        warmed up (see Rulebook.warm_up), so the first unmatched message after
+        the swap doesn't build its typo corrector or classifier. The artifact,
+        if any, is only used while it still matches the sources.
+        """
+        rulebook = cls.load_rulebook()
+        previous = cls.__dict__.get('_rulebook')
+        if previous is not None:
+            rulebook.take_over(previous)
+        rulebook.warm_up()
+        return rulebook
+
+    @classmethod
+    def swap_rulebook(cls, rulebook):
+        """Make rulebook (from rebuild_rulebook()) the one every chatbot of the class uses
+
+        A single assignment, so a message being answered keeps the rulebook
+        it started with.
+        """
+        cls._rulebook = rulebook
+
+    @classmethod
+    def reload_rulebook(cls):
+        """Rebuild the rulebook (re-reading the config file) and swap it in once it is fully built"""
+        with cls._rulebook_lock:
+            rulebook = cls.rebuild_rulebook()
+            cls.swap_rulebook(rulebook)
+        return rulebook
+
+    def respond(self, rulebook, rule, rng=random, session=None):
+        """Return the reply for the rule a message matched in rulebook (None for no match)"""
+        raise NotImplementedError
+
+    def choose(self, responses, intent, rng=random, session=None):
+        """Pick one of responses for intent (a rule index, FALLBACK or STARTER)
+
+        With a ChatSession, variants the session recently got for the same
+        intent are avoided, and the choice is recorded in its history.
+        """
+        if session is None:
+            return rng.choice(responses)
+        used = session.recent_variants(intent)
+        fresh = [variant for variant in range(len(responses)) if variant not in used]
+        if not fresh:
+            last = next(variant for recorded, variant in session.recent() if recorded == intent)
+            fresh = [variant for variant in range(len(responses)) if variant != last] or [0]
+        variant = rng.choice(fresh)
+        session.record(intent, variant)
+        return responses[variant]
+
+    def response_events(self, user_input, rng=random, session=None, typing=None):
+        """Yield the reply to a message as events: {"typing": True}, then {"chunk": "..."} pieces
+
+        The typing event comes as soon as the winning rule is known, before
+        the reply is picked; typing=None follows SETTINGS["show_typing_indicator"].
+        Joining the chunks gives what get_response() would have returned.
+        """
+        rulebook = self.rulebook
+        rule = rulebook.match_message(user_input)
+        if typing is None:
+            typing = rulebook.settings.get("show_typing_indicator", False)
+        if typing:
+            yield {"typing": True}
+        for chunk in split_reply(self.respond(rulebook, rule, rng, session), self.stream_chunk_size):
+            yield {"chunk": chunk}
+
+    async def stream_response(self, user_input, rng=random, session=None, typing=None):
+        """Async generator of response_events(), yielding to the event loop after every event
+
+        A network front end can write each event out as it arrives, so the
+        first bytes leave before the rest of the reply is produced.
+        """
+        for event in self.response_events(user_input, rng, session, typing):
+            yield event
+            await asyncio.sleep(0)
+
+    def print_response(self, user_input, session=None, prefix=" ChatBot: "):
+        """Print the reply to a message chunk by chunk, after a typing indicator if enabled"""
+        for event in self.response_events(user_input, session=session):
+            if "typing" in event:
+                print(f"{prefix}...", end="\r", flush=True)
+                continue
+            # The first chunk overwrites the typing indicator
+            print(prefix + event["chunk"], end="", flush=True)
+            prefix = ""
+        print()
+
+    def break_suggestion(self, session):
+        """Suggest a break every max_conversation_length turns (from SETTINGS), else None"""
+        limit = self.rulebook.settings.get("max_conversation_length")
+        if limit and session.turns and session.turns % limit == 0:
+            return "We've been chatting for a while - maybe it's a good time for a short break?"
+        return None
+
+    def is_exit_command(self, user_input):
+        """Check whether a message ends the conversation"""
+        return EXIT_PATTERN.search(user_input.lower()) is not None
+
+    def encouragement(self, conversation_count):
+        """Occasional note to encourage continuation, or None"""
+        return None
+
+    def get_responses(self, user_inputs, workers=1, chunksize=256, seed=None):
+        """Yield get_response() for every input, in input order
+
+        Inputs are streamed in chunks of chunksize, so any iterable works and
+        memory stays bounded. With workers > 1 (or None for one per CPU) the
+        chunks are answered by a process pool. When seed is given, every
+        message gets its own random source derived from the seed and its
+        position, so the output is reproducible whatever the worker count.
+        """
+        chunks = _chunks(user_inputs, chunksize)
+        if workers == 1:
+            for first, chunk in chunks:
+                yield from _respond_chunk(type(self), first, chunk, seed)
+            return
+
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(workers) as pool:
+            # Keep a couple of chunks queued per worker without reading ahead further
+            in_flight = workers * 2
+            pending = deque()
+            for first, chunk in chunks:
+                pending.append(pool.submit(_respond_chunk, type(self), first, chunk, seed))
+                if len(pending) >= in_flight:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    @property
+    def rulebook(self):
+        return self.get_rulebook()
+
+    @property
+    def patterns(self):
+        return self.get_rulebook().patterns
+
+    @property
+    def default_responses(self):
+        return self.get_rulebook().default_responses
+
+    @property
+    def conversation_starters(self):
+        return self.get_rulebook().conversation_starters
+
+    @property
+    def matcher(self):
+        return self.get_rulebook().matcher
+
+    def preprocess_input(self, user_input):
+        """Clean and normalize user input for better pattern matching"""
+        return self.get_rulebook().preprocessor(user_input)
+
+    def preprocess_many(self, user_inputs):
+        """Normalize a list of messages in one batch"""
+        return self.get_rulebook().preprocessor.process_many(user_inputs)
+
+    @classmethod
+    def cache_stats(cls):
+        """Return hit/miss/eviction counters of the shared response cache"""
+        return cls.get_rulebook().cache.stats()
+
+    @classmethod
+    def enable_profiling(cls):
+        """Start counting and timing rule matches; returns the MatchProfiler"""
+        rulebook = cls.get_rulebook()
+        if rulebook.profiler is None:
+            rulebook.profiler = MatchProfiler(rulebook.intents, rulebook.patterns)
+        return rulebook.profiler
+
+    @classmethod
+    def disable_profiling(cls):
+        """Stop profiling; returns the detached MatchProfiler, or None"""
+        rulebook = cls.get_rulebook()
+        profiler, rulebook.profiler = rulebook.profiler, None
+        return profiler
+
+    @classmethod
+    def profile_snapshot(cls):
+        """Return the profiler counters as a dict, or None when profiling is off"""
+        profiler = cls.get_rulebook().profiler
+        return profiler.snapshot() if profiler is not None else None
+
+    @classmethod
+    def prometheus_metrics(cls):
+        """Return the profiler counters in Prometheus text format ('' when profiling is off)"""
+        profiler = cls.get_rulebook().profiler
+        if profiler is None:
+            return ''
+        return profiler.prometheus(labels={"bot": cls.__name__})
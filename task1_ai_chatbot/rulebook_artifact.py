@@ -0,0 +1,209 @@
+"""
+Precompiled rulebook artifacts for the rule-based chatbots
+Saves a built rulebook (patterns, keyword index, response tables, typo
+corrector and intent classifier) to one file that later processes load
+instead of rebuilding it
+
+Usage:
+    python rulebook_artifact.py --bot advanced --output advanced.rulebook
+    python server.py --artifact advanced.rulebook
+
+File layout: an 8-byte magic, the format version, the payload length and the
+SHA-256 of the payload, followed by the payload itself (marshal). The payload
+records a fingerprint of the source files the rulebook was built from, so a
+process only uses an artifact that still matches its code and config file.
+
+The file is memory-mapped so it is hashed and unmarshaled without reading it
+into a buffer first; unmarshaling still copies the payload into objects. The
+bulky parts (keyword index shards, typo corrector, classifier) stay marshaled
+bytes until first use or Rulebook.warm_up().
+"""
+
+import argparse
+import hashlib
+import inspect
+import marshal
+import mmap
+import os
+import struct
+import sys
+
+import preprocessing
+import rulebook_config
+
+MAGIC = b'CHATRULE'
+FORMAT_VERSION = 2
+
+# Magic, format version, payload length, SHA-256 of the payload
+HEADER = struct.Struct('<8sHxxQ32s')
+
+
+# Modules every rulebook is built with, besides its chatbot's class hierarchy
+BUILD_MODULES = (preprocessing, rulebook_config)
+
+
+class ArtifactError(ValueError):
+    """An artifact that is corrupt, from another format version or built from other sources"""
+
+
+def index_shard(word):
+    """Return the shard of a saved keyword index that holds word"""
+    return word[:2]
+
+
+def shard_index(index):
+    """Split {keyword: rule indices} into {shard: marshal bytes of that part}, for LazyIndex"""
+    shards = {}
+    for word, rules in index.items():
+        shards.setdefault(index_shard(word), {})[word] = tuple(rules)
+    return {shard: marshal.dumps(part) for shard, part in shards.items()}
+
+
+class LazyIndex:
+    """Read-only keyword index loaded from an artifact one shard at a time
+
+    The index is saved in shards of keywords sharing their first two letters.
+    A shard is unmarshaled the first time a word in it is looked up, so
+    loading an artifact doesn't depend on the number of keywords; load()
+    unpacks everything up front.
+    """
+
+    __slots__ = ('_shards',)
+
+    def __init__(self, shards):
+        self._shards = dict(shards)
+
+    def get(self, word, default=None):
+        """Return the rules listed under word, or default"""
+        shard = self._shards.get(word[:2])
+        if shard is None:
+            return default
+        if shard.__class__ is bytes:
+            shard = self._shards[word[:2]] = marshal.loads(shard)
+        return shard.get(word, default)
+
+    def load(self):
+        """Unpack every shard now instead of on first use"""
+        for key, shard in self._shards.items():
+            if shard.__class__ is bytes:
+                self._shards[key] = marshal.loads(shard)
+
+    def items(self):
+        """Return every (keyword, rules) pair"""
+        self.load()
+        return [item for shard in self._shards.values() for item in shard.items()]
+
+
+def source_files(chatbot_class):
+    """Return the files a chatbot class's rulebook is built from
+
+    Those are its class hierarchy, the preprocessing and config-loading
+    modules (which decide the normalization and intent names), and its
+    config file.
+    """
+    files = []
+    for klass in chatbot_class.__mro__:
+        try:
+            path = inspect.getsourcefile(klass)
+        except TypeError:
+            continue  # built-in, such as object
+        if path is not None and path not in files:
+            files.append(path)
+    for module in BUILD_MODULES:
+        if module.__file__ not in files:
+            files.append(module.__file__)
+    if chatbot_class.config_path is not None:
+        files.append(chatbot_class.config_path)
+    return files
+
+
+def source_fingerprint(chatbot_class):
+    """Return the SHA-256 (hex) of every source file of a chatbot class's rulebook
+
+    Rules computed at run time, rather than written in those files, are not
+    covered.
+    """
+    digest = hashlib.sha256()
+    for path in source_files(chatbot_class):
+        digest.update(os.path.basename(path).encode() + b'\0')
+        try:
+            with open(path, 'rb') as file:
+                digest.update(hashlib.sha256(file.read()).digest())
+        except FileNotFoundError:
+            digest.update(b'missing')
+    return digest.hexdigest()
+
+
+def write_artifact(path, payload):
+    """Write a payload dict (marshal-able values only) to path, replacing any previous file atomically"""
+    data = marshal.dumps(payload)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(data), hashlib.sha256(data).digest())
+    temporary = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(temporary, 'wb') as file:
+            file.write(header)
+            file.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def read_artifact(path, fingerprint=None):
+    """Memory-map an artifact, check its header and hash, and return its payload dict
+
+    With a fingerprint, the payload must have been built from the same
+    sources. Raises ArtifactError for anything unusable and OSError if the
+    file can't be read.
+    """
+    with open(path, 'rb') as file:
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ArtifactError("empty file") from None
+
+    with mapped:
+        if len(mapped) < HEADER.size:
+            raise ArtifactError("truncated header")
+        magic, version, length, digest = HEADER.unpack_from(mapped)
+        if magic != MAGIC:
+            raise ArtifactError("not a rulebook artifact")
+        if version != FORMAT_VERSION:
+            raise ArtifactError(f"format version {version}, expected {FORMAT_VERSION}")
+        if len(mapped) != HEADER.size + length:
+            raise ArtifactError("truncated payload")
+
+        with memoryview(mapped)[HEADER.size:] as data:
+            if hashlib.sha256(data).digest() != digest:
+                raise ArtifactError("content hash mismatch")
+            try:
+                payload = marshal.loads(data)
+            except (EOFError, ValueError, TypeError) as error:
+                raise ArtifactError(f"unreadable payload: {error}") from None
+
+    if fingerprint is not None and payload.get("source") != fingerprint:
+        raise ArtifactError("built from different sources")
+    return payload
+
+
+def main():
+    """Build a rulebook artifact from the command line"""
+    from server import CHATBOTS
+
+    parser = argparse.ArgumentParser(description="Precompile a chatbot's rulebook into an artifact file")
+    parser.add_argument("--bot", choices=sorted(CHATBOTS), default="advanced")
+    parser.add_argument("--config", help="config file with custom rules (default: config.py)")
+    parser.add_argument("--output", help="artifact file to write (default: <bot>.rulebook)")
+    args = parser.parse_args()
+
+    chatbot_class = CHATBOTS[args.bot]
+    if args.config:
+        chatbot_class.config_path = args.config
+    output = args.output or f"{args.bot}.rulebook"
+    rulebook = chatbot_class.write_artifact(output)
+    print(f" Wrote {output}: {len(rulebook.intents)} rules, {os.path.getsize(output)} bytes", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Rulebook configuration for the rule-based chatbots
+Loads config.py (or an equivalent JSON file) and hot-reloads it when it changes
+"""
+
+import json
+import os
+import re
+import runpy
+import threading
+import traceback
+from types import MappingProxyType
+
+# The config.py shipped next to the chatbots
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.py')
+
+# First plain word of a pattern, once escapes such as \b are removed
+INTENT_WORD_PATTERN = re.compile(r'[a-z][a-z0-9_]*')
+
+
+def intent_name(pattern):
+    """Derive an intent name for a config rule from the first word of its pattern"""
+    word = INTENT_WORD_PATTERN.search(re.sub(r'\\.', ' ', pattern.lower()))
+    return word.group() if word else 'custom'
+
+
+class RulebookConfig:
+    """Custom rules, responses, conversation starters and settings from a config file
+
+    A config file is either a Python module like config.py or a JSON object
+    with the same names: CUSTOM_PATTERNS, CUSTOM_RESPONSES,
+    CONVERSATION_STARTERS and SETTINGS. Every name is optional.
+    """
+
+    def __init__(self, custom_patterns=None, custom_responses=None, conversation_starters=None,
+                 settings=None):
+        self.custom_patterns = dict(custom_patterns or {})
+        self.custom_responses = dict(custom_responses or {})
+        self.conversation_starters = conversation_starters or {}
+        self.settings = MappingProxyType(dict(settings or {}))
+
+    @classmethod
+    def load(cls, path=DEFAULT_CONFIG_PATH):
+        """Read a config file; None gives the empty configuration"""
+        if path is None:
+            return cls()
+        if path.endswith('.json'):
+            with open(path, encoding='utf-8') as file:
+                namespace = json.load(file)
+        else:
+            namespace = runpy.run_path(path)
+        return cls(namespace.get('CUSTOM_PATTERNS'), namespace.get('CUSTOM_RESPONSES'),
+                   namespace.get('CONVERSATION_STARTERS'), namespace.get('SETTINGS'))
+
+    def patterns(self, builtin_patterns):
+        """Return the built-in rules followed by the custom ones"""
+        return {**builtin_patterns, **self.custom_patterns}
+
+    def intents(self, builtin_patterns, builtin_intents):
+        """Return the intent names matching patterns(builtin_patterns)"""
+        added = [pattern for pattern in self.custom_patterns if pattern not in builtin_patterns]
+        return tuple(builtin_intents) + tuple(intent_name(pattern) for pattern in added)
+
+    def starters(self, builtin_starters):
+        """Return the built-in conversation starters followed by the configured ones
+
+        CONVERSATION_STARTERS may be a list or a dict of themed lists.
+        """
+        starters = self.conversation_starters
+        if isinstance(starters, dict):
+            starters = [starter for themed in starters.values() for starter in themed]
+        return list(builtin_starters) + [starter for starter in starters if starter not in builtin_starters]
+
+
+def file_signature(path):
+    """Return what identifies one version of a file on disk, or None if it is missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ConfigWatcher:
+    """Reload chatbot rulebooks whenever their config file changes
+
+    Polls the file's modification time and size every interval seconds on a
+    daemon thread. On a change every chatbot class rebuilds its rulebook, and
+    the new rulebooks are swapped in only once all of them are built. If any
+    build fails, the failure is reported and every class keeps its running
+    rulebook until the file changes again.
+    """
+
+    def __init__(self, chatbot_classes, path=None, interval=1.0):
+        self.chatbot_classes = tuple(chatbot_classes)
+        self.path = path or self.chatbot_classes[0].config_path
+        self.interval = interval
+        self.reloads = 0
+        self._signature = file_signature(self.path)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        """Reload the rulebooks if the file changed since the last check; returns True if it did"""
+        signature = file_signature(self.path)
+        if signature == self._signature or signature is None:
+            return False
+        self._signature = signature
+        try:
+            rulebooks = [chatbot_class.rebuild_rulebook() for chatbot_class in self.chatbot_classes]
+        except Exception:
+            print(f" Could not reload {self.path}; keeping the current rulebooks")
+            traceback.print_exc()
+            return False
+        for chatbot_class, rulebook in zip(self.chatbot_classes, rulebooks):
+            chatbot_class.swap_rulebook(rulebook)
+        self.reloads += 1
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        """Start watching in the background; returns self"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop watching and wait for the polling thread to exit"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
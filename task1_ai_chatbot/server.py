@@ -0,0 +1,257 @@
+"""
+Asyncio chat server for the rule-based chatbots
+Hosts many concurrent chat sessions on one process over line-delimited JSON
+
+Protocol: the client sends one JSON object per line, {"message": "..."},
+optionally with a "session" id to resume a conversation paged out to the
+server's session store, and gets one JSON object per line back:
+    {"response": "...", "exit": false}               a normal reply
+    {"response": "...", "exit": false, "note": "..."} a reply with an aside
+    {"response": "...", "exit": true}                farewell; the connection closes
+    {"error": "...", "exit": ...}                    bad request, idle timeout, ...
+
+A request with "stream": true gets its reply as it is produced: a
+{"typing": true} line when SETTINGS["show_typing_indicator"] is on, then
+{"chunk": "..."} lines, then the normal reply object above.
+"""
+
+import argparse
+import asyncio
+import json
+import signal
+
+from advanced_chatbot import AdvancedRuleBasedChatbot
+from chatbot import RuleBasedChatbot
+from rulebook_config import ConfigWatcher
+from session import ChatSession, SessionStore
+
+CHATBOTS = {
+    "advanced": AdvancedRuleBasedChatbot,
+    "basic": RuleBasedChatbot,
+}
+
+
+def encode(payload):
+    """Serialize one protocol message"""
+    return json.dumps(payload).encode() + b"\n"
+
+
+class ChatServer:
+    """Line-delimited JSON chat server; one session per TCP connection
+
+    Every session shares the chatbot class's compiled rulebook and only keeps
+    a small ChatSession of its own. Replies wait for the socket to drain before
+    the next message is read (per-connection backpressure), idle sessions are
+    closed after idle_timeout seconds, and close() says goodbye to every
+    session before shutting down.
+
+    With a session_store, a client that names its session ("session" in a
+    request) gets it back from the store, and the session is paged out to the
+    store when the connection goes idle or closes without a goodbye.
+    """
+
+    def __init__(self, chatbot_class=AdvancedRuleBasedChatbot, host="127.0.0.1", port=8765,
+                 idle_timeout=300, max_message_bytes=64 * 1024, backlog=1024, session_store=None):
+        self.chatbot = chatbot_class()
+        self.session_store = session_store
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.max_message_bytes = max_message_bytes
+        self.backlog = backlog
+        self.sessions = set()
+        self._server = None
+        self._closing = False
+
+    async def start(self, sock=None):
+        """Start accepting connections (on sock if given); returns the bound port
+
+        The rulebook is warmed up first: building the typo corrector or the
+        classifier while answering a message would stall every session.
+        """
+        self.chatbot.rulebook.warm_up()
+        if sock is not None:
+            self._server = await asyncio.start_server(
+                self._handle_session, sock=sock, limit=self.max_message_bytes, backlog=self.backlog)
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_session, self.host, self.port, limit=self.max_message_bytes,
+                backlog=self.backlog)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    def reply(self, message, session):
+        """Answer one message of a ChatSession; returns the payload"""
+        message = message.strip()
+        if not message:
+            return {"response": self.chatbot.empty_input_reply(), "exit": False}
+
+        session.turns += 1
+        if self.chatbot.is_exit_command(message):
+            return {"response": self.chatbot.farewell(session.turns), "exit": True}
+
+        payload = {"response": self.chatbot.get_response(message, session=session), "exit": False}
+        return self._add_note(payload, session)
+
+    async def stream_reply(self, message, session):
+        """Answer one message as it is produced; yields the typing and chunk events, then the payload"""
+        text = message.strip()
+        if not text or self.chatbot.is_exit_command(text):
+            yield self.reply(message, session)
+            return
+
+        session.turns += 1
+        chunks = []
+        async for event in self.chatbot.stream_response(text, session=session):
+            if "chunk" in event:
+                chunks.append(event["chunk"])
+            yield event
+        yield self._add_note({"response": "".join(chunks), "exit": False}, session)
+
+    def _add_note(self, payload, session):
+        """Attach the break suggestion or encouragement for this turn, if any"""
+        note = self.chatbot.break_suggestion(session) or self.chatbot.encouragement(session.turns)
+        if note:
+            payload["note"] = note
+        return payload
+
+    def _resume(self, session_id):
+        """Return the stored session with this id (removing it from the store), or a new one"""
+        if self.session_store is not None and session_id is not None:
+            session = self.session_store.pop(session_id)
+            if session is not None:
+                return session
+        return ChatSession()
+
+    def _page_out(self, session_id, session, finished):
+        """Store an unfinished named session so the client can resume it later"""
+        if self.session_store is not None and session_id is not None and not finished and session.turns:
+            self.session_store.put(session_id, session)
+
+    async def _handle_session(self, reader, writer):
+        """Serve one connection until the user leaves, goes idle or the server stops"""
+        task = asyncio.current_task()
+        self.sessions.add(task)
+        session = None
+        session_id = None
+        finished = False
+        try:
+            while not self._closing:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    writer.write(encode({"error": "idle timeout", "exit": True}))
+                    break
+                except ValueError:
+                    # The line overran max_message_bytes; the stream can't be resynchronized
+                    writer.write(encode({"error": "message too long", "exit": True}))
+                    break
+
+                if not line:
+                    break  # client closed the connection
+
+                try:
+                    request = json.loads(line)
+                    message = request["message"]
+                    if not isinstance(message, str):
+                        raise TypeError
+                except (ValueError, KeyError, TypeError):
+                    writer.write(encode({"error": "expected {\"message\": \"...\"}", "exit": False}))
+                    await writer.drain()
+                    continue
+
+                if session is None:
+                    session_id = request.get("session")
+                    session_id = session_id if isinstance(session_id, str) else None
+                    session = self._resume(session_id)
+                if request.get("stream") is True:
+                    # Flush every event as it comes so the client sees the first bytes early
+                    async for payload in self.stream_reply(message, session):
+                        writer.write(encode(payload))
+                        await writer.drain()
+                else:
+                    payload = self.reply(message, session)
+                    writer.write(encode(payload))
+                    # Don't read the next message until the client has taken this reply
+                    await writer.drain()
+                if payload["exit"]:
+                    finished = True
+                    break
+        except asyncio.CancelledError:
+            # Server shutdown: say goodbye without waiting on a slow client
+            turns = session.turns if session is not None else 0
+            writer.write(encode({"response": self.chatbot.farewell(turns),
+                                 "exit": True, "shutdown": True}))
+        except ConnectionError:
+            pass
+        finally:
+            if session is not None:
+                self._page_out(session_id, session, finished)
+            self.sessions.discard(task)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+
+    async def close(self, grace_period=5):
+        """Stop accepting connections, end every session and wait for them to finish"""
+        self._closing = True
+        if self._server is not None:
+            self._server.close()
+        sessions = list(self.sessions)
+        for session in sessions:
+            session.cancel()
+        if sessions:
+            await asyncio.wait(sessions, timeout=grace_period)
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    async def serve_forever(self, sock=None):
+        """Run until SIGINT/SIGTERM, then shut down gracefully"""
+        await self.start(sock)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # signals are not available on this platform / thread
+        await stop.wait()
+        await self.close()
+
+
+def main():
+    """Run the chat server from the command line"""
+    parser = argparse.ArgumentParser(description="Serve the rule-based chatbot over TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--bot", choices=sorted(CHATBOTS), default="advanced")
+    parser.add_argument("--idle-timeout", type=float, default=300, help="seconds before idle sessions close")
+    parser.add_argument("--config", help="config file with custom rules (default: config.py)")
+    parser.add_argument("--artifact", help="precompiled rulebook to load (see rulebook_artifact.py)")
+    parser.add_argument("--watch", action="store_true", help="reload the rules when the config file changes")
+    parser.add_argument("--session-store", help="dbm file to page idle sessions out to")
+    args = parser.parse_args()
+
+    chatbot_class = CHATBOTS[args.bot]
+    if args.config:
+        chatbot_class.config_path = args.config
+    if args.artifact:
+        chatbot_class.artifact_path = args.artifact
+    store = SessionStore(args.session_store) if args.session_store else None
+    server = ChatServer(chatbot_class, args.host, args.port, idle_timeout=args.idle_timeout,
+                        session_store=store)
+    watcher = ConfigWatcher([chatbot_class]).start() if args.watch else None
+    print(f" Chat server listening on {args.host}:{args.port} ({args.bot} chatbot)")
+    try:
+        asyncio.run(server.serve_forever())
+    finally:
+        if watcher is not None:
+            watcher.stop()
+        if store is not None:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Per-conversation state for the rule-based chatbots
+Compact session objects with a bounded turn history, and a disk store for idle ones
+"""
+
+import dbm
+import struct
+
+# Pseudo-intents recorded for replies that did not come from a rule
+FALLBACK = -1
+STARTER = -2
+# Empty history slot
+NO_INTENT = -2 ** 31
+
+# Variants are stored in one byte; higher variant numbers are remembered as this
+UNKNOWN_VARIANT = 255
+
+# Serialized form: version, turns, next history slot, history size, then the
+# history itself
+HEADER = struct.Struct('<BIHH')
+FORMAT_VERSION = 1
+
+# One history slot: intent (int32) and variant (uint8), little-endian
+SLOT = struct.Struct('<iB')
+
+
+class ChatSession:
+    """State of one conversation: its turn count and a ring buffer of recent replies
+
+    The history remembers the last history_size replies as (intent, variant)
+    pairs, where intent is the rule index (or FALLBACK / STARTER) and variant
+    the position of the chosen reply in that rule's list. The ring buffer is
+    a single bytearray in the serialized layout: it holds no references, so
+    the garbage collector never has to scan it, and paging a session out is
+    a plain copy.
+    """
+
+    __slots__ = ('turns', 'position', 'history')
+
+    def __init__(self, history_size=8):
+        if history_size < 1:
+            raise ValueError(f"history_size must be at least 1, got {history_size}")
+        self.turns = 0
+        self.position = 0
+        self.history = bytearray(SLOT.pack(NO_INTENT, 0) * history_size)
+
+    @property
+    def history_size(self):
+        return len(self.history) // SLOT.size
+
+    def __len__(self):
+        return len(self.recent())
+
+    def record(self, intent, variant):
+        """Remember the reply given this turn"""
+        SLOT.pack_into(self.history, self.position * SLOT.size, intent, min(variant, UNKNOWN_VARIANT))
+        self.position = (self.position + 1) % self.history_size
+
+    def recent(self):
+        """Return the remembered (intent, variant) pairs, most recent first"""
+        size = self.history_size
+        pairs = []
+        for offset in range(1, size + 1):
+            intent, variant = SLOT.unpack_from(self.history, (self.position - offset) % size * SLOT.size)
+            if intent == NO_INTENT:
+                break
+            pairs.append((intent, variant))
+        return pairs
+
+    def recent_variants(self, intent):
+        """Return the set of variants recently used for an intent"""
+        return {variant for recorded, variant in self.recent() if recorded == intent}
+
+    def serialize(self):
+        """Return the session as compact bytes (see deserialize)"""
+        return HEADER.pack(FORMAT_VERSION, self.turns, self.position, self.history_size) + self.history
+
+    @classmethod
+    def deserialize(cls, data):
+        """Rebuild a session from serialize() output"""
+        version, turns, position, size = HEADER.unpack_from(data)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported session format version {version}")
+        if len(data) != HEADER.size + size * SLOT.size or not position < size:
+            raise ValueError("Corrupt session data")
+
+        session = cls.__new__(cls)
+        session.turns = turns
+        session.position = position
+        session.history = bytearray(data[HEADER.size:])
+        return session
+
+
+class SessionStore:
+    """Key-value file (dbm) of serialized sessions, for paging idle sessions out of memory"""
+
+    def __init__(self, path):
+        self.path = path
+        self._db = dbm.open(path, 'c')
+
+    def __len__(self):
+        return len(self._db)
+
+    def __contains__(self, session_id):
+        return session_id in self._db
+
+    def get(self, session_id):
+        """Return the stored session, or None"""
+        data = self._db.get(session_id)
+        return ChatSession.deserialize(data) if data is not None else None
+
+    def put(self, session_id, session):
+        """Store (or replace) a session"""
+        self._db[session_id] = session.serialize()
+
+    def pop(self, session_id):
+        """Remove and return a stored session, or None"""
+        session = self.get(session_id)
+        if session is not None:
+            del self._db[session_id]
+        return session
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,184 @@
+"""
+Typo correction for the rule-based chatbots
+SymSpell-style deletion index over the words the rules look for
+"""
+
+import os
+import re
+from functools import lru_cache
+
+# Words of a regex pattern's source, once escapes such as \b are removed
+PATTERN_WORD = re.compile(r'[a-z]+')
+ESCAPE = re.compile(r'\\.')
+
+# Letter-only tokens of a preprocessed message
+TOKEN = re.compile(r'[a-z]+')
+
+# Everyday English words, one per line; a token that is a word is never "corrected"
+DEFAULT_WORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'english_words.txt')
+
+# Endings of inflected and derived forms, and what to put back to find the word
+# they come from ("studies" -> "study", "making" -> "make")
+SUFFIXES = (
+    ('ies', 'y'), ('ied', 'y'), ('ier', 'y'), ('iest', 'y'), ('ily', 'y'),
+    ('ing', ''), ('ing', 'e'), ('ed', ''), ('ed', 'e'), ('es', ''), ('s', ''),
+    ('ers', ''), ('ers', 'e'), ('er', ''), ('er', 'e'), ('est', ''), ('est', 'e'),
+    ('ly', ''), ('ness', ''), ('ment', ''), ('ful', ''), ('less', ''),
+)
+
+
+@lru_cache(maxsize=None)
+def load_words(path=DEFAULT_WORDS_PATH):
+    """Return the words of a word list file (one per line, # for comments) as a frozenset"""
+    with open(path, encoding='utf-8') as file:
+        return frozenset(line.strip().lower() for line in file if line.strip() and not line.startswith('#'))
+
+
+def is_word(token, words):
+    """Check whether token is in words, or an inflected form of one ("stopped", "cities", "looking")"""
+    if token in words:
+        return True
+    for suffix, ending in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 2:
+            stem = token[:-len(suffix)]
+            if stem + ending in words:
+                return True
+            if len(stem) > 2 and stem[-1] == stem[-2] and stem[:-1] in words:
+                return True  # Doubled consonant: "stopped" -> "stop"
+    return False
+
+
+def pattern_vocabulary(patterns):
+    """Return {word: number of patterns using it} for the plain words in regex patterns"""
+    counts = {}
+    for pattern in patterns:
+        for word in set(PATTERN_WORD.findall(ESCAPE.sub(' ', pattern.lower()))):
+            counts[word] = counts.get(word, 0) + 1
+    return counts
+
+
+def deletes(word, distance):
+    """Return every string made by deleting up to distance characters from word"""
+    found = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        found |= frontier
+    return found
+
+
+def edit_distance(first, second, limit):
+    """Optimal string alignment distance (edits plus adjacent swaps), or limit + 1 if above limit"""
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    previous_previous = None
+    previous = list(range(len(second) + 1))
+    for i, a in enumerate(first, 1):
+        current = [i] + [0] * len(second)
+        for j, b in enumerate(second, 1):
+            cost = a != b
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a == second[j - 2] and first[i - 2] == b:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class SymSpellIndex:
+    """Constant-time spelling correction against a fixed vocabulary
+
+    Every vocabulary word is stored under each string that deleting up to
+    max_distance of its characters produces. A misspelled token finds its
+    candidates by looking up its own deletions, so the cost per token depends
+    on the token's length and not on the size of the vocabulary. Short words
+    are left alone: tokens under min_length characters are never corrected,
+    and only tokens of long_length characters or more may be two edits away.
+
+    Only tokens that are not real words are corrected: words holds a word
+    list (english_words.txt by default), and a token found there, or an
+    inflected form of one, is left as typed. A token is also left alone when
+    several vocabulary words are equally close, since either could be meant.
+    """
+
+    def __init__(self, vocabulary, max_distance=2, min_length=5, long_length=8, words=None):
+        self.vocabulary = dict(vocabulary)
+        self.words = load_words() if words is None else frozenset(words)
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.long_length = long_length
+        # Deletion -> id (position in word_list) of the one word it comes from, or a tuple of ids
+        self.word_list = list(self.vocabulary)
+        index = {}
+        for word_id, word in enumerate(self.word_list):
+            if len(word) < min_length - max_distance:
+                continue
+            for variant in deletes(word, max_distance):
+                index.setdefault(variant, []).append(word_id)
+        self.index = {variant: ids[0] if len(ids) == 1 else tuple(ids) for variant, ids in index.items()}
+
+    # Attributes tables() saves and from_tables() restores
+    TABLES = ('vocabulary', 'word_list', 'max_distance', 'min_length', 'long_length', 'index')
+
+    def tables(self):
+        """Return the deletion index and its settings as a dict of plain values (marshal-able), for from_tables()"""
+        return {name: getattr(self, name) for name in self.TABLES}
+
+    @classmethod
+    def from_tables(cls, tables, words=None):
+        """Return an index with the deletions of tables() output, without computing any"""
+        speller = cls.__new__(cls)
+        for name in cls.TABLES:
+            setattr(speller, name, tables[name])
+        speller.words = load_words() if words is None else frozenset(words)
+        return speller
+
+    def allowed_distance(self, token):
+        """Return how many edits a token of this length may be corrected by"""
+        if len(token) < self.min_length:
+            return 0
+        if len(token) < self.long_length:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    def lookup(self, token):
+        """Return the vocabulary word token is a misspelling of, or None
+
+        None when token is a real word, or when no vocabulary word, or more
+        than one, is closest within the allowed distance.
+        """
+        if token in self.vocabulary:
+            return token
+        if is_word(token, self.words):
+            return None
+        limit = self.allowed_distance(token)
+        if not limit:
+            return None
+
+        best = []
+        best_distance = limit + 1
+        seen = set()
+        index = self.index
+        word_list = self.word_list
+        for variant in deletes(token, limit):
+            word_ids = index.get(variant)
+            if word_ids is None:
+                continue
+            for word_id in (word_ids,) if word_ids.__class__ is int else word_ids:
+                if word_id in seen:
+                    continue
+                seen.add(word_id)
+                word = word_list[word_id]
+                distance = edit_distance(token, word, limit)
+                if distance < best_distance:
+                    best, best_distance = [word], distance
+                elif distance == best_distance:
+                    best.append(word)
+        return best[0] if len(best) == 1 else None
+
+    def correct(self, text):
+        """Return text with every correctable misspelled word replaced"""
+        def replace(match):
+            return self.lookup(match.group()) or match.group()
+        return TOKEN.sub(replace, text)
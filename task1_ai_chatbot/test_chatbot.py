@@ -1,77 +1,41 @@
+import asyncio
+import importlib.util
+import json
+import random
+import re
+import time
+
 from advanced_chatbot import AdvancedRuleBasedChatbot
+from chatbot import RuleBasedChatbot
+from config import CUSTOM_PATTERNS
+from preprocessing import Preprocessor
+from rule_engine import KeywordIndexMatcher, LRUCache, RuleMatcher, extract_keywords
+from server import ChatServer
 
 def test_chatbot_accuracy():
-    """Test the chatbot's pattern matching accuracy"""
-    chatbot = AdvancedRuleBasedChatbot()
-    
-    # Test cases with expected pattern categories
-    test_cases = [
-        # Greetings
-        ("hello", "greeting"),
-        ("hi there", "greeting"),
-        ("good morning", "greeting"),
-        
-        # Personal questions
-        ("how are you", "personal"),
-        ("what's your name", "identity"),
-        ("who are you", "identity"),
-        
-        # Capabilities
-        ("what can you do", "capabilities"),
-        ("help me", "capabilities"),
-        
-        # Emotions
-        ("i feel sad", "emotions"),
-        ("i am happy", "emotions"),
-        
-        # Technology
-        ("artificial intelligence", "tech"),
-        ("machine learning", "tech"),
-        
-        # Thank you
-        ("thank you", "thanks"),
-        ("thanks a lot", "thanks"),
-        
-        # Goodbye
-        ("goodbye", "goodbye"),
-        ("see you later", "goodbye"),
-        
-        # Agreement
-        ("yes", "agreement"),
-        ("okay sure", "agreement"),
-        
-        # Time/Date
-        ("what time is it", "time"),
-        ("current time", "time"),
-        
-        # Weather
-        ("how's the weather", "weather"),
-        ("is it sunny", "weather"),
-    ]
+    """Test that labelled messages match the rule of their intent"""
+    from accuracy_harness import ADVANCED_CASES, LABELLED_CASES, NO_MATCH
     
     print(" Testing Chatbot Accuracy")
     print("=" * 40)
     
     correct_responses = 0
-    total_tests = len(test_cases)
+    total_tests = 0
     
-    for i, (test_input, expected_category) in enumerate(test_cases, 1):
-        response = chatbot.get_response(test_input)
-        
-        # Check if response is not a default/fallback response
-        is_specific_response = response not in chatbot.default_responses and \
-                             response not in chatbot.conversation_starters
-        
-        status = " PASS" if is_specific_response else " FAIL"
-        
-        if is_specific_response:
-            correct_responses += 1
-        
-        print(f"{i:2d}. Input: '{test_input}'")
-        print(f"    Expected: {expected_category} response")
-        print(f"    Response: '{response}'")
-        print(f"    Status: {status}")
-        print()
+    for chatbot_class, test_cases in ((AdvancedRuleBasedChatbot, LABELLED_CASES + ADVANCED_CASES),
+                                      (RuleBasedChatbot, LABELLED_CASES)):
+        rulebook = chatbot_class.get_rulebook()
+        for test_input, expected_intent in test_cases:
+            rule = rulebook.match_message(test_input)
+            matched_intent = rulebook.intents[rule] if rule is not None else None
+            
+            status = " PASS" if matched_intent == expected_intent else " FAIL"
+            if matched_intent == expected_intent:
+                correct_responses += 1
+            total_tests += 1
+            
+            print(f"{chatbot_class.__name__}: '{test_input}' -> {matched_intent or NO_MATCH} "
+                  f"(expected {expected_intent or NO_MATCH}){status}")
     
     accuracy = (correct_responses / total_tests) * 100
     print(f" ACCURACY RESULTS")
@@ -87,8 +51,73 @@ def test_chatbot_accuracy():
     else:
         print("   Grade:  NEEDS IMPROVEMENT")
     
+    assert correct_responses == total_tests, "Every labelled message should match its intent"
     return accuracy
 
+def test_accuracy_harness():
+    """Test the labelled-intent harness: scores, worker pool, corpora and regressions"""
+    import os
+    import tempfile
+    from accuracy_harness import (ADVANCED_CASES, LABELLED_CASES, NO_MATCH, compare_reports, evaluate,
+                                  intent_scores, read_corpus)
+    
+    scores = intent_scores(["greeting", "greeting", None, "time"], ["greeting", "time", None, None])
+    assert scores["greeting"] == {"support": 2, "matched": 1, "correct": 1, "precision": 1.0, "recall": 0.5}
+    assert scores["time"]["precision"] == 0.0 and scores["time"]["recall"] == 0.0
+    assert scores[NO_MATCH]["precision"] == 0.5 and scores[NO_MATCH]["recall"] == 1.0
+    
+    rulebook = AdvancedRuleBasedChatbot.get_rulebook()
+    cases = (LABELLED_CASES + ADVANCED_CASES) * 20 + [("hello", "weather"), ("hello", "no_such_intent")]
+    serial = evaluate(rulebook, cases)
+    pooled = evaluate(rulebook, cases, processes=3, chunk_size=50)
+    assert serial["intents"] == pooled["intents"], "Worker processes should match exactly like one process"
+    assert serial["correct"] == pooled["correct"] == len(cases) - 2
+    assert [mismatch["expected"] for mismatch in pooled["mismatches"]] == ["weather", "no_such_intent"]
+    assert pooled["unknown_intents"] == ["no_such_intent"]
+    assert 0 < pooled["p50_us"] <= pooled["p99_us"]
+    
+    # Corpora are streamed: cases are read a chunk at a time, not all up front
+    import accuracy_harness
+    read = []
+    def streamed():
+        for case in cases:
+            read.append(case)
+            yield case
+    matched_after = []
+    match_messages = accuracy_harness.match_messages
+    def counting_match(rulebook, messages):
+        matched_after.append(len(read))
+        return match_messages(rulebook, messages)
+    accuracy_harness.match_messages = counting_match
+    try:
+        lazy = evaluate(rulebook, streamed(), chunk_size=50)
+    finally:
+        accuracy_harness.match_messages = match_messages
+    assert matched_after[:3] == [100, 100, 150], "Chunks should be read as they are matched"
+    assert lazy["intents"] == serial["intents"] and lazy["mismatches"] == serial["mismatches"]
+    streamed_pool = evaluate(rulebook, iter(cases), processes=3, chunk_size=50)
+    assert streamed_pool["intents"] == serial["intents"] and streamed_pool["cases"] == len(cases)
+    
+    assert compare_reports(serial, serial, threshold=float("inf")) == []
+    worse = evaluate(rulebook, [(message, "greeting") for message, _ in LABELLED_CASES])
+    regressions = compare_reports(serial, worse, threshold=float("inf"))
+    assert regressions[0].startswith("accuracy") and "time: precision 100.00% -> 0.00%" in regressions
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "corpus.jsonl")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write('{"message": "hello", "intent": "greeting", "id": 1}\n\n{"message": "xyzzy", "intent": null}\n')
+        assert list(read_corpus([path])) == [("hello", "greeting"), ("xyzzy", None)]
+        with open(path, "a", encoding="utf-8") as file:
+            file.write('{"message": "unlabelled"}\n')
+        try:
+            list(read_corpus([path]))
+            assert False, "Should have raised ValueError"
+        except ValueError as error:
+            assert str(error).startswith(f"{path}:4:")
+    
+    print("Accuracy harness tests passed")
+
 def test_preprocessing():
     """Test input preprocessing functionality"""
     chatbot = AdvancedRuleBasedChatbot()
@@ -109,6 +138,815 @@ def test_preprocessing():
         status = " PASS" if processed == expected else " FAIL"
         print(f"'{original}' → '{processed}' (Expected: '{expected}') {status}")
 
+def test_preprocessing_pipeline():
+    """Test word-boundary contraction expansion, batch mode and linear cost"""
+    chatbot = AdvancedRuleBasedChatbot()
+    
+    assert chatbot.preprocess_input("  It's   the BANDIT's hat  ") == "it is the bandit's hat", \
+        "Contractions inside other words should be left alone"
+    assert chatbot.preprocess_input("I'm sure\tyou're\nright") == "i am sure you are right"
+    assert RuleBasedChatbot().preprocess_input("  Hello   THERE!!? ") == "hello there"
+    
+    messages = ["I'm here", "  what's\nUP  ", "", "don't stop", "nothing"]
+    assert chatbot.preprocess_many(messages) == [chatbot.preprocess_input(m) for m in messages], \
+        "Batch mode should match one-by-one preprocessing"
+    assert Preprocessor().process_many(["a\x00b", "C"]) == ["a\x00b", "c"], "Separator in input falls back"
+    
+    # Cost should grow linearly with message size
+    timings = []
+    for size in (20_000, 200_000):
+        text = "it's a   thing " * (size // 15)
+        start = time.perf_counter()
+        chatbot.preprocess_input(text)
+        timings.append(time.perf_counter() - start)
+    assert timings[1] < timings[0] * 40, f"Preprocessing should scale linearly, got {timings}"
+    
+    print("Preprocessing pipeline tests passed")
+
+def test_compiled_matcher():
+    """Test that the compiled matcher picks the same rule as scoring each pattern separately"""
+    chatbot = AdvancedRuleBasedChatbot()
+    patterns = list(chatbot.patterns)
+    matcher = RuleMatcher(patterns)
+    
+    def reference_best_match(text):
+        best_rule, best_score = None, 0
+        for index, pattern in enumerate(patterns):
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                score = len(match.group(0)) * (1 - (match.start() / len(text)))
+                if score > best_score:
+                    best_rule, best_score = index, score
+        return best_rule
+    
+    test_inputs = [
+        "hello", "i am happy to see you, hello", "what is the weather today",
+        "thanks, bye", "nothing to see here", "HELLO THERE", "ok then, machine learning",
+        "caf\u00e9 weather", "you are great and i feel good",
+    ]
+    
+    for text in test_inputs:
+        expected = reference_best_match(text)
+        assert matcher.best_match(text) == expected, f"Matcher disagrees on '{text}'"
+    
+    assert matcher.first_match("thanks, bye") == patterns.index(
+        next(p for p in patterns if re.search(p, "thanks, bye"))), "First match should follow rulebook order"
+    assert RuleMatcher([]).best_match("hello") is None, "Empty rulebook should never match"
+    
+    # Past GATE_MAX_RULES the rules are tried without the combined regex: same winners
+    from rule_engine import GATE_MAX_RULES
+    patterns = patterns + [rf'\b(filler{number}|word{number} \w+)\b' for number in range(GATE_MAX_RULES)]
+    matcher = RuleMatcher(patterns)
+    for text in test_inputs + ["say word7 twice", "filler3 hello", "filler99"]:
+        assert matcher.best_match(text) == reference_best_match(text), f"Ungated matcher disagrees on '{text}'"
+    
+    print("Compiled matcher tests passed")
+
+def test_keyword_index():
+    """Test that the keyword index only narrows the candidates, never changes the result"""
+    assert extract_keywords(r'\b(hello|hi|good morning)\b.*') == {"hello", "hi", "good"}
+    assert extract_keywords(r'\b(i feel|i am (sad|happy))\b') == {"i"}
+    assert extract_keywords(r'\b(work|job)s?') is None, "Open-ended words cannot be indexed"
+    assert extract_keywords(r'hello') is None, "Rules without a leading \\b cannot be indexed"
+    
+    patterns = list(AdvancedRuleBasedChatbot().patterns) + list(RuleBasedChatbot().patterns) + \
+        list(CUSTOM_PATTERNS) + [r'\bfoo\d+', r'\b(work|job)s?']
+    linear = RuleMatcher(patterns)
+    indexed = KeywordIndexMatcher(patterns)
+    
+    test_inputs = [
+        "hello", "how's it going", "i am sad about my jobs", "foo42 is not a word",
+        "THANKS for the music", "\u017forry, what is the weather", "nothing relevant at all",
+        "caf\u00e9 and a good book", "",
+    ]
+    
+    for text in test_inputs:
+        assert indexed.best_match(text) == linear.best_match(text), f"Best match differs on '{text}'"
+        assert indexed.first_match(text) == linear.first_match(text), f"First match differs on '{text}'"
+    
+    print("Keyword index tests passed")
+
+def test_shared_rulebook():
+    """Test that chatbot instances share one read-only rulebook"""
+    first, second = AdvancedRuleBasedChatbot(), AdvancedRuleBasedChatbot()
+    
+    assert first.rulebook is second.rulebook, "Instances should share the compiled rulebook"
+    assert RuleBasedChatbot().rulebook is not first.rulebook, "Each chatbot class has its own rulebook"
+    assert not hasattr(first, "__dict__"), "Instances should carry no per-instance state"
+    
+    try:
+        first.patterns["new rule"] = ["response"]
+        assert False, "Shared patterns should be read-only"
+    except TypeError:
+        pass
+    
+    print("Shared rulebook tests passed")
+
+def test_batch_responses():
+    """Test that batch responses keep input order and are reproducible with a seed"""
+    chatbot = AdvancedRuleBasedChatbot()
+    messages = ["hello", "what is the weather", "blah blah", "thanks", "goodbye"] * 40
+    
+    serial = list(chatbot.get_responses(messages, seed=7, chunksize=16))
+    parallel = list(chatbot.get_responses(iter(messages), workers=2, seed=7, chunksize=16))
+    
+    assert len(serial) == len(messages), "Every input should get a response"
+    assert serial == parallel, "Seeded output should not depend on the worker count"
+    assert serial[2] in chatbot.default_responses + chatbot.conversation_starters
+    assert serial[0] in chatbot.patterns[next(iter(chatbot.patterns))], "Order should follow the inputs"
+    assert list(RuleBasedChatbot().get_responses([])) == [], "Empty batches yield nothing"
+    
+    print("Batch response tests passed")
+
+def test_chat_server():
+    """Test concurrent sessions, exit handling and idle timeouts on the chat server"""
+    async def send(reader, writer, message):
+        writer.write(json.dumps({"message": message}).encode() + b"\n")
+        await writer.drain()
+        return json.loads(await reader.readline())
+    
+    async def scenario():
+        server = ChatServer(port=0, idle_timeout=0.5)
+        port = await server.start()
+        chatbot = server.chatbot
+        rulebook = chatbot.rulebook
+        assert rulebook.speller is not None and rulebook.classifier is not None, "start() should warm up"
+        
+        long_reader, long_writer = await asyncio.open_connection("127.0.0.1", port)
+        short_reader, short_writer = await asyncio.open_connection("127.0.0.1", port)
+        
+        # Interleave two sessions; each keeps its own turn count
+        for turn in range(6):
+            reply = await send(long_reader, long_writer, "hello there")
+            assert not reply["exit"] and reply["response"] not in chatbot.default_responses
+        reply = await send(short_reader, short_writer, "bye")
+        assert reply == {"response": chatbot.farewell(1), "exit": True}, reply
+        reply = await send(long_reader, long_writer, "bye")
+        assert reply == {"response": chatbot.farewell(7), "exit": True}, reply
+        
+        # Bad requests are reported without ending the session
+        idle_reader, idle_writer = await asyncio.open_connection("127.0.0.1", port)
+        idle_writer.write(b"not json\n")
+        assert "error" in json.loads(await idle_reader.readline())
+        
+        # An idle session is closed by the server
+        reply = json.loads(await idle_reader.readline())
+        assert reply == {"error": "idle timeout", "exit": True}, reply
+        assert await idle_reader.readline() == b"", "Idle session should be closed"
+        
+        # Shutdown says goodbye to sessions that are still open
+        open_reader, open_writer = await asyncio.open_connection("127.0.0.1", port)
+        await send(open_reader, open_writer, "thanks")
+        await server.close()
+        reply = json.loads(await open_reader.readline())
+        assert reply["exit"] and reply["shutdown"], reply
+        
+        for writer in (long_writer, short_writer, idle_writer, open_writer):
+            writer.close()
+    
+    asyncio.run(scenario())
+    print("Chat server tests passed")
+
+def test_response_cache():
+    """Test the LRU cache and that repeated messages skip the matcher"""
+    cache = LRUCache(maxsize=2)
+    cache.put("hi", 0)
+    cache.put("thanks", 1)
+    assert cache.get("hi") == 0, "Cached value should be returned"
+    cache.put("bye", 2)  # evicts "thanks", the least recently used
+    assert cache.get("thanks") is LRUCache.MISSING, "Least recently used entry should be evicted"
+    assert cache.stats()["evictions"] == 1 and cache.stats()["hits"] == 1
+    cache.resize(1)
+    assert len(cache) == 1 and cache.get("bye") == 2, "Resizing keeps the most recent entries"
+    
+    chatbot = AdvancedRuleBasedChatbot()
+    rulebook = chatbot.rulebook
+    rulebook.cache.clear()
+    for _ in range(3):
+        response = chatbot.get_response("Thanks")
+        assert response in chatbot.patterns[r'\b(thank you|thanks|appreciate|grateful|thx)\b']
+    chatbot.get_response("blah blah")
+    chatbot.get_response("blah blah")
+    
+    stats = chatbot.cache_stats()
+    assert stats["hits"] == 3 and stats["misses"] == 2, stats
+    assert rulebook.match("thanks") == rulebook.matcher.best_match("thanks")
+    
+    print("Response cache tests passed")
+
+def test_pathological_inputs():
+    """Test that megabyte-sized messages are truncated and answered quickly"""
+    chatbot = AdvancedRuleBasedChatbot()
+    rulebook = chatbot.rulebook
+    megabyte = 1024 * 1024
+    inputs = [
+        "hi" + " " * megabyte + "there",
+        "hello " * (megabyte // 6),
+        "it's " * (megabyte // 5),
+        "lorem ipsum dolor " * (megabyte // 18),
+    ]
+    
+    for user_input in inputs:
+        rulebook.cache.clear()
+        start = time.perf_counter()
+        response = chatbot.get_response(user_input)
+        elapsed = time.perf_counter() - start
+        assert isinstance(response, str) and response, "Every message should get a reply"
+        assert elapsed < 0.5, f"1 MB message took {elapsed:.3f}s"
+    
+    assert rulebook.match_message("hello " * megabyte) == rulebook.match("hello " * 100), \
+        "Matching should only see the first max_input_length characters"
+    assert rulebook.match_message("blah " * megabyte + "thanks") is None, \
+        "Keywords past the input limit should be ignored"
+    
+    # A message whose time budget runs out is neither cached nor classified
+    from rule_engine import Rulebook
+    rules = dict(chatbot.patterns)
+    rulebook = Rulebook(rules, ["default"], match_time_budget=0.0)
+    unbounded = Rulebook(rules, ["default"], match_time_budget=None)
+    messages = ["hello there", "is it snowing outside", "wether"]
+    assert None not in [unbounded.match(message) for message in messages], \
+        "Without a budget these are classified and corrected"
+    assert [rulebook.match(message) for message in messages][1:] == [None, None]
+    assert rulebook.match_many(messages)[1:] == [None, None]
+    assert len(rulebook.cache) == 0, "Results cut short by the budget should not be cached"
+    
+    print("Pathological input tests passed")
+
+def test_match_profiling():
+    """Test per-rule profiling counters and their exports"""
+    chatbot = AdvancedRuleBasedChatbot()
+    assert chatbot.profile_snapshot() is None and chatbot.prometheus_metrics() == ""
+    chatbot.rulebook.cache.clear()
+    
+    profiler = chatbot.enable_profiling()
+    try:
+        messages = ["Hello there", "What's the weather like?", "Hello there", "blah blah"]
+        for message in messages:
+            chatbot.get_response(message, random.Random(0))
+        
+        snapshot = chatbot.profile_snapshot()
+        rules = {rule["intent"]: rule for rule in snapshot["rules"]}
+        assert snapshot["messages"] == 4 and snapshot["fallbacks"] == 1
+        assert snapshot["fallback_rate"] == 0.25
+        assert rules["greeting"]["hits"] == 2, "Cached answers still count as hits"
+        assert rules["greeting"]["evaluations"] == 1, "Cached answers evaluate no rules"
+        assert rules["weather"]["hits"] == 1 and rules["food"]["evaluations"] == 0
+        assert sum(rule["hits"] for rule in snapshot["rules"]) + snapshot["fallbacks"] == 4
+        
+        metrics = chatbot.prometheus_metrics()
+        assert 'chatbot_messages_total{bot="AdvancedRuleBasedChatbot"} 4' in metrics
+        assert 'chatbot_rule_hits_total{bot="AdvancedRuleBasedChatbot",intent="greeting",rule="0"} 2' in metrics
+        assert "# TYPE chatbot_rule_seconds_total counter" in metrics
+    finally:
+        assert chatbot.disable_profiling() is profiler
+    assert chatbot.rulebook.profiler is None
+    
+    print("Match profiling tests passed")
+
+def test_early_exit_scoring():
+    """Test that bounded best-match scoring skips rules without changing any winner"""
+    import sys
+    from benchmark import FILLER_WORDS, chat_traffic, exhaustive_best_match, fit_to_length
+    from profiling import MatchProfiler
+    from rule_engine import ProfiledMatcher, max_match_length
+    
+    assert max_match_length(r'\b(hi|hello)\b') == 5
+    assert max_match_length(r'\bgood (morning|night)\b') == 12
+    assert max_match_length(r'\bi feel .*') == sys.maxsize, "Open-ended rules have no bound"
+    
+    for matcher_class in (RuleMatcher, KeywordIndexMatcher):
+        # Equal scores go to the rule listed first, whatever order the bounds suggest
+        assert matcher_class([r'\bab\b', r'\bab\b.*']).best_match("ab") == 0
+        assert matcher_class([r'\bcd\b', r'\bab\b', r'\bab\b']).best_match("ab cd") == 1
+        assert matcher_class([r'x*', r'\bab\b']).best_match("ab") == 1, "Empty matches never win"
+    
+    # Ties and overlapping matches, both with too few candidates to rank and with enough
+    from rule_engine import EARLY_EXIT_MIN_CANDIDATES
+    overlapping = [r'\bgood\b', r'\bmorning\b', r'\bgood morning\b', r'\b(good|fine) morning\b',
+                   r'\bmorning every\w*', r'\bgood morning everyone\b', r'\bgood\b.*', r'\bmorning\b']
+    texts = ["good morning", "good morning everyone", "well good morning everybody", "morning good",
+             "fine morning everyone", "morning morning"]
+    for rules in (overlapping[:EARLY_EXIT_MIN_CANDIDATES - 1], overlapping, overlapping[::-1]):
+        for matcher_class in (RuleMatcher, KeywordIndexMatcher):
+            matcher = matcher_class(rules)
+            for text in texts:
+                assert matcher.best_match(text) == exhaustive_best_match(matcher, text), (rules, text)
+    
+    patterns = list(AdvancedRuleBasedChatbot().patterns) + list(CUSTOM_PATTERNS)
+    traffic = chat_traffic(patterns, 300, seed=4)
+    traffic += [fit_to_length(message, 400, FILLER_WORDS) for message in traffic[:50]]
+    for matcher_class in (RuleMatcher, KeywordIndexMatcher):
+        matcher = matcher_class(patterns)
+        profiler = MatchProfiler(range(len(patterns)), patterns)
+        profiled = ProfiledMatcher(matcher, profiler)
+        candidates = 0
+        for text in traffic:
+            assert profiled.best_match(text) == exhaustive_best_match(matcher, text), f"Winner differs on '{text}'"
+            found = matcher._candidates(text)
+            candidates += len(found[1]) if found else 0
+        assert sum(profiler.evaluations) < candidates, "Some rules should be ruled out by their bounds"
+    
+    print("Early-exit scoring tests passed")
+
+def test_benchmark_suite():
+    """Test the throughput benchmark report and its regression check"""
+    from benchmark import benchmark_suite, compare_reports, sized_corpus
+    
+    assert all(len(message) == 250 for message in sized_corpus(250, 20))
+    report = benchmark_suite(lengths=(1, 100), synthetic_sizes=(50,), message_count=20)
+    results = report["results"]
+    assert len(results) == 3 * 2 * 2, "One cell per rulebook, chatbot and length"
+    assert {result["rulebook"] for result in results} == {"builtin", "config", "config+50"}
+    for result in results:
+        assert result["p50_us"] <= result["p95_us"] <= result["p99_us"]
+        assert result["msgs_per_sec"] > 0
+    assert json.loads(json.dumps(report)) == report, "Reports should round-trip through JSON"
+    
+    assert compare_reports(report, report) == []
+    slower = json.loads(json.dumps(report))
+    slower["results"][0]["msgs_per_sec"] /= 2
+    regressions = compare_reports(report, slower, threshold=0.2)
+    assert len(regressions) == 1 and regressions[0].startswith(results[0]["name"])
+    
+    print("Benchmark suite tests passed")
+
+def test_config_reload():
+    """Test loading rules from a config file and hot-reloading it"""
+    import os
+    import tempfile
+    from rule_engine import compile_rule
+    from rulebook_config import ConfigWatcher, intent_name
+    
+    assert intent_name(r'\b(sports|football)\b') == "sports"
+    assert "sports" in AdvancedRuleBasedChatbot().rulebook.intents, "config.py rules should be loaded"
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "rules.json")
+        
+        def write_config(version, patterns, starters, frequency=0.3):
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump({"CUSTOM_PATTERNS": patterns, "CONVERSATION_STARTERS": starters,
+                           "SETTINGS": {"conversation_starter_frequency": frequency}}, file)
+            # Distinct modification times, however fast the test runs
+            os.utime(path, ns=(0, version * 10 ** 9))
+        
+        write_config(1, {r'\b(chess|checkmate)\b': ["Chess is a great game!"]}, ["Any news?"])
+        
+        class ReloadingChatbot(AdvancedRuleBasedChatbot):
+            __slots__ = ()
+            config_path = path
+        
+        chatbot = ReloadingChatbot()
+        watcher = ConfigWatcher([ReloadingChatbot])
+        assert chatbot.get_response("let's play chess") == "Chess is a great game!"
+        assert "Any news?" in chatbot.conversation_starters
+        assert chatbot.rulebook.intents[-1] == "chess"
+        old_rulebook = chatbot.rulebook
+        old_rulebook.warm_up()
+        
+        # Settings-only change: same rules, so the warm cache, typo corrector and classifier survive
+        write_config(2, {r'\b(chess|checkmate)\b': ["Chess is a great game!"]}, ["Any news?"], 1.0)
+        assert watcher.check() and not watcher.check(), "Each change should reload once"
+        assert chatbot.rulebook is not old_rulebook and chatbot.rulebook.cache is old_rulebook.cache
+        assert chatbot.rulebook.speller is old_rulebook.speller is not None
+        assert chatbot.rulebook.classifier is old_rulebook.classifier is not None
+        assert chatbot.rulebook.settings["conversation_starter_frequency"] == 1.0
+        
+        # New rule: only the new pattern needs compiling
+        misses = compile_rule.cache_info().misses
+        write_config(3, {r'\b(chess|checkmate)\b': ["Chess is a great game!"],
+                      r'\b(poker|blackjack)\b': ["Feeling lucky?"]}, ["Any news?"], 1.0)
+        assert watcher.check()
+        assert chatbot.get_response("a game of poker") == "Feeling lucky?"
+        assert chatbot.get_response("checkmate") == "Chess is a great game!"
+        assert compile_rule.cache_info().misses == misses + 1, "Unchanged rules should not be recompiled"
+        assert chatbot.rulebook.cache is not old_rulebook.cache, "Changed rules start a fresh cache"
+        assert chatbot.rulebook.speller not in (None, old_rulebook.speller), "Reloads should warm up"
+        
+        # A broken config keeps the running rulebook
+        current = chatbot.rulebook
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("{not json")
+        os.utime(path, ns=(0, 4 * 10 ** 9))
+        assert not watcher.check() and chatbot.rulebook is current
+        
+        # Classes reload together: if the second one's config is broken, neither switches
+        write_config(5, {r'\b(chess|checkmate)\b': ["Chess is a great game!"]}, ["Any news?"])
+        other_path = os.path.join(directory, "other.json")
+        with open(other_path, "w", encoding="utf-8") as file:
+            json.dump({"CUSTOM_PATTERNS": {r'\b(golf)\b': ["Fore!"]}}, file)
+        
+        class OtherChatbot(RuleBasedChatbot):
+            __slots__ = ()
+            config_path = other_path
+        
+        watcher = ConfigWatcher([ReloadingChatbot, OtherChatbot], path=path)
+        current, other_current = ReloadingChatbot.get_rulebook(), OtherChatbot.get_rulebook()
+        with open(other_path, "w", encoding="utf-8") as file:
+            file.write("{not json")
+        write_config(6, {r'\b(chess|checkmate)\b': ["Chess is a great game!"],
+                      r'\b(tennis)\b': ["Anyone for tennis?"]}, ["Any news?"])
+        assert not watcher.check()
+        assert ReloadingChatbot.get_rulebook() is current and OtherChatbot.get_rulebook() is other_current
+        assert chatbot.get_response("tennis") != "Anyone for tennis?", "A half-applied reload leaked through"
+        
+        with open(other_path, "w", encoding="utf-8") as file:
+            json.dump({"CUSTOM_PATTERNS": {r'\b(golf)\b': ["Fore!"]}}, file)
+        write_config(7, {r'\b(chess|checkmate)\b': ["Chess is a great game!"],
+                      r'\b(tennis)\b': ["Anyone for tennis?"]}, ["Any news?"])
+        assert watcher.check() and chatbot.get_response("tennis") == "Anyone for tennis?"
+        assert OtherChatbot.get_rulebook() is not other_current
+    
+    print("Config reload tests passed")
+
+def test_typo_tolerance():
+    """Test that misspelled rule words are corrected only for unmatched messages"""
+    from spelling import SymSpellIndex, edit_distance
+    
+    assert edit_distance("wether", "weather", 2) == 1
+    assert edit_distance("thnaks", "thanks", 2) == 1, "Adjacent swaps count as one edit"
+    assert edit_distance("hello", "goodbye", 2) == 3
+    
+    speller = SymSpellIndex({"weather": 1, "temperature": 1, "thanks": 2, "hello": 1})
+    assert speller.lookup("tempreture") == "temperature"
+    assert speller.lookup("wether") == "weather"
+    assert speller.lookup("helo") is None, "Short tokens are left alone"
+    assert speller.lookup("think") is None, "Common words are never corrected"
+    assert speller.correct("the wether today") == "the weather today"
+    assert SymSpellIndex({"later": 1, "hater": 1}, words=()).lookup("dater") is None, "Ambiguous tokens stay"
+    
+    chatbot = AdvancedRuleBasedChatbot()
+    rulebook = chatbot.rulebook
+    rulebook.cache.clear()
+    assert rulebook.intents[rulebook.match_message("What's the wether like?")] == "weather"
+    assert rulebook.intents[rulebook.match_message("thnaks a lot")] == "thanks"
+    assert rulebook.match_message("do you think so") is None
+    
+    class StrictChatbot(AdvancedRuleBasedChatbot):
+        __slots__ = ()
+        typo_tolerance = False
+        intent_threshold = None
+    
+    assert StrictChatbot().rulebook.match_message("What's the wether like?") is None
+    
+    # Real words are never rewritten into rule words ("water" -> "later" would say goodbye)
+    class SpellingOnlyChatbot(AdvancedRuleBasedChatbot):
+        __slots__ = ()
+        intent_threshold = None
+    
+    rulebook = SpellingOnlyChatbot().rulebook
+    for message in ["I need water", "she is a hater", "looking forward to the weekend",
+                    "we painted the fence yesterday", "please pass the salt"]:
+        assert rulebook.get_speller().correct(rulebook.preprocessor(message)) == rulebook.preprocessor(message)
+        assert rulebook.match_message(message) is None, f"'{message}' should not match any rule"
+    
+    print("Typo tolerance tests passed")
+
+def test_intent_fallback():
+    """Test the fallback classifier for messages no rule matches"""
+    from intent_classifier import IntentClassifier, example_phrases
+    
+    assert example_phrases(r'\b(how are you|how\'s it going)\b') == ["how are you", "how s it going"]
+    assert example_phrases(r'\b(i feel|i am (sad|happy))\b') == ["i feel", "i am", "sad", "happy"]
+    
+    classifier = IntentClassifier([["weather", "rain"], ["food", "cooking"]], threshold=0.4)
+    assert classifier.classify("is it raining") == 0
+    assert classifier.classify("lovely home cooked meal") == 1
+    assert classifier.classify("asdf") is None, "Unrelated messages stay below the threshold"
+    texts = ["raining again", "cooked", "zzz", ""]
+    assert classifier.classify_many(texts) == [classifier.classify(text) for text in texts]
+    
+    chatbot = AdvancedRuleBasedChatbot()
+    rulebook = chatbot.rulebook
+    rulebook.cache.clear()
+    assert rulebook.matcher.best_match("is it snowing outside") is None
+    assert rulebook.intents[rulebook.match_message("is it snowing outside")] == "weather"
+    assert rulebook.intents[rulebook.match_message("computers are so cool")] == "tech"
+    assert rulebook.match_message("qwerty zxcvb") is None
+    
+    messages = ["hello", "is it snowing outside", "qwerty zxcvb", "thanks"]
+    rulebook.cache.clear()
+    assert rulebook.match_many(messages) == [rulebook.match_message(message) for message in messages]
+    
+    # DEFAULT_THRESHOLD is the most accurate threshold on the fallback cases
+    from accuracy_harness import FALLBACK_CASES, evaluate
+    from intent_classifier import DEFAULT_THRESHOLD
+    rulebook = AdvancedRuleBasedChatbot.build_rulebook()
+    assert all(rulebook.matcher.best_match(rulebook.preprocessor(message)) is None for message, _ in FALLBACK_CASES)
+    accuracy = {}
+    for threshold in (0.4, 0.5, DEFAULT_THRESHOLD, 0.6, 0.7):
+        rulebook.get_classifier().threshold = threshold
+        accuracy[threshold] = evaluate(rulebook, FALLBACK_CASES)["accuracy"]
+    assert max(accuracy.values()) == accuracy[DEFAULT_THRESHOLD], accuracy
+    rulebook.get_classifier().threshold = DEFAULT_THRESHOLD
+    for message in ("looking forward to the weekend", "booking a flight", "the train was late"):
+        assert rulebook.match_message(message) is None, f"'{message}' should not be classified"
+    
+    print("Intent fallback tests passed")
+
+def test_intent_matrix_scoring():
+    """Test that batch classification by matrix product agrees with classify()"""
+    import math
+    import pytest
+    pytest.importorskip("numpy")
+    import intent_classifier
+    from intent_classifier import IntentClassifier, example_phrases
+    
+    # Everywhere, including messages scoring exactly the threshold; with scipy
+    # the product is sparse, then dense numpy is checked too
+    patterns = AdvancedRuleBasedChatbot.get_rulebook().matcher.patterns
+    texts = ["is it snowing outside", "computers are so cool", "i could eat", "rainy weekend trip",
+             "my job is tiring", "qwerty zxcvb", "robots learning to cook", ""]
+    scorers = [intent_classifier.sparse, None] if intent_classifier.sparse is not None else [None]
+    saved_sparse = intent_classifier.sparse
+    try:
+        for scorer in scorers:
+            intent_classifier.sparse = scorer
+            classifier = IntentClassifier([example_phrases(pattern) for pattern in patterns])
+            assert classifier._phrase_matrix() is not None, "the matrix path must run"
+            assert classifier.classify_many(texts) == [classifier.classify(text) for text in texts]
+            for text in texts[:5]:
+                score = max(classifier.scores(text).values())
+                for threshold in (score, math.nextafter(score, 1.0), math.nextafter(score, 0.0)):
+                    classifier.threshold = threshold
+                    assert classifier.classify_many([text]) == [classifier.classify(text)], (text, threshold)
+    finally:
+        intent_classifier.sparse = saved_sparse
+    
+    print("Intent matrix scoring tests passed")
+
+def test_chat_sessions():
+    """Test session history, non-repeating replies, break suggestions and paging out"""
+    import os
+    import tempfile
+    from session import FALLBACK, ChatSession, SessionStore
+    
+    session = ChatSession(history_size=3)
+    assert session.recent() == []
+    for intent, variant in [(0, 1), (4, 0), (FALLBACK, 2), (7, 1)]:
+        session.record(intent, variant)
+    assert session.recent() == [(7, 1), (FALLBACK, 2), (4, 0)], "Oldest turn should be overwritten"
+    assert not hasattr(session, "__dict__")
+    for size in (0, -1):
+        try:
+            ChatSession(history_size=size)
+            assert False, f"history_size={size} should be rejected"
+        except ValueError:
+            pass
+    
+    session.turns = 12
+    data = session.serialize()
+    assert len(data) == 9 + 3 * 5, "Header plus 5 bytes per remembered turn"
+    restored = ChatSession.deserialize(data)
+    assert restored.turns == 12 and restored.recent() == session.recent()
+    
+    chatbot = AdvancedRuleBasedChatbot()
+    session = ChatSession()
+    greetings = chatbot.patterns[r'\b(hello|hi|hey|greetings|good morning|good afternoon|good evening)\b.*']
+    replies = [chatbot.get_response("hello", random.Random(seed), session) for seed in range(3)]
+    assert sorted(replies) == sorted(greetings), "A session should get every variant before a repeat"
+    assert chatbot.get_response("hello", random.Random(0), session) != replies[-1]
+    
+    session.turns = chatbot.rulebook.settings["max_conversation_length"]
+    assert chatbot.break_suggestion(session), "Long conversations should be told to take a break"
+    session.turns += 1
+    assert chatbot.break_suggestion(session) is None
+    
+    with tempfile.TemporaryDirectory() as directory:
+        with SessionStore(os.path.join(directory, "sessions")) as store:
+            store.put("alice", session)
+            assert "alice" in store and store.get("alice").recent() == session.recent()
+            assert store.pop("alice").turns == session.turns and store.get("alice") is None
+            
+            async def scenario():
+                server = ChatServer(port=0, session_store=store)
+                port = await server.start()
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                for message in ("hello", "thanks"):
+                    writer.write(json.dumps({"message": message, "session": "bob"}).encode() + b"\n")
+                    await writer.drain()
+                    await reader.readline()
+                writer.close()
+                await writer.wait_closed()
+                for _ in range(100):
+                    if "bob" in store:
+                        break
+                    await asyncio.sleep(0.01)
+                assert store.get("bob").turns == 2, "A dropped session should be paged out"
+                
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(json.dumps({"message": "bye", "session": "bob"}).encode() + b"\n")
+                await writer.drain()
+                reply = json.loads(await reader.readline())
+                assert reply == {"response": server.chatbot.farewell(3), "exit": True}, reply
+                writer.close()
+                await server.close()
+                assert "bob" not in store, "Finished sessions are not kept"
+            
+            asyncio.run(scenario())
+    
+    print("Chat session tests passed")
+
+def test_transcript_replay():
+    """Test the streaming replay pipeline over mixed JSONL and text lines"""
+    import io
+    from replay import parse_records, replay, write_results
+    
+    transcript = [
+        ("log", 1, "hello there"),
+        ("log", 2, '{"id": 7, "message": "What\'s the weather?"}'),
+        ("log", 3, "   "),
+        ("log", 4, '{"id": 8}'),
+        ("log", 5, '"thanks!"'),
+    ]
+    records = parse_records(iter(transcript))
+    assert next(records) == ("log", 1, {"message": "hello there"}), "Records should stream lazily"
+    
+    chatbot = AdvancedRuleBasedChatbot()
+    results = list(replay(parse_records(iter(transcript)), chatbot, seed=3))
+    assert [result["line"] for result in results] == [1, 2, 4, 5], "Blank lines are skipped"
+    assert [result.get("intent") for result in results] == ["greeting", "weather", None, "thanks"]
+    assert results[1]["id"] == 7 and "error" in results[2]
+    assert results[0]["response"] in chatbot.patterns[chatbot.rulebook.matcher.patterns[results[0]["rule"]]]
+    assert all(result["total_us"] >= result["match_us"] >= 0 for result in results if "rule" in result)
+    
+    again = list(replay(parse_records(iter(transcript)), chatbot, seed=3))
+    assert [result.get("response") for result in again] == [result.get("response") for result in results]
+    
+    output = io.StringIO()
+    assert write_results(iter(results), output) == 4
+    assert [json.loads(line)["line"] for line in output.getvalue().splitlines()] == [1, 2, 4, 5]
+    
+    print("Transcript replay tests passed")
+
+def test_streaming_responses():
+    """Test chunked replies, the typing indicator and the server's streaming mode"""
+    from rule_engine import split_reply
+    
+    reply = "Hello there! I'm doing great, thanks for asking. How about you?"
+    chunks = list(split_reply(reply, 16))
+    assert "".join(chunks) == reply, "Chunks should join back into the reply"
+    assert len(chunks) > 1 and all(len(chunk) <= 16 for chunk in chunks[:-1])
+    assert list(split_reply("", 16)) == []
+    
+    chatbot = AdvancedRuleBasedChatbot()
+    events = list(chatbot.response_events("hello there", random.Random(5), typing=True))
+    assert events[0] == {"typing": True}, "The typing event should come first"
+    streamed = "".join(event["chunk"] for event in events[1:])
+    assert streamed == chatbot.get_response("hello there", random.Random(5))
+    assert "typing" not in next(chatbot.response_events("hello", typing=False))
+    
+    async def collect():
+        return [event async for event in chatbot.stream_response("what's the weather?", random.Random(2))]
+    events = asyncio.run(collect())
+    assert "".join(event["chunk"] for event in events if "chunk" in event) == \
+        chatbot.get_response("what's the weather?", random.Random(2))
+    
+    async def scenario():
+        server = ChatServer(port=0)
+        port = await server.start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b'{"message": "hello there", "stream": true}\n')
+        lines = []
+        while not lines or "response" not in lines[-1]:
+            lines.append(json.loads(await reader.readline()))
+        assert all("chunk" in line for line in lines[:-1]) and len(lines) > 1
+        assert "".join(line["chunk"] for line in lines[:-1]) == lines[-1]["response"]
+        
+        writer.write(b'{"message": "bye", "stream": true}\n')
+        assert json.loads(await reader.readline())["exit"] is True
+        writer.close()
+        await server.close()
+    asyncio.run(scenario())
+    
+    print("Streaming response tests passed")
+
+def test_prefork_server():
+    """Test that forked workers answer on the shared socket and crashed ones are replaced"""
+    import os
+    import signal
+    import socket
+    from prefork_server import PreforkServer
+    
+    def ask(port, message):
+        with socket.create_connection(("127.0.0.1", port), timeout=5) as client:
+            client.sendall(json.dumps({"message": message}).encode() + b"\n")
+            return json.loads(client.makefile().readline())
+    
+    server = PreforkServer(RuleBasedChatbot, port=0, workers=2, restart_delay=0)
+    port = server.start()
+    try:
+        assert len(server.workers) == 2
+        assert ask(port, "hello")["response"], "A worker should answer"
+        
+        crashed = next(iter(server.workers))
+        os.kill(crashed, signal.SIGKILL)
+        deadline = time.time() + 5
+        while not server.reap() and time.time() < deadline:
+            time.sleep(0.01)
+        assert server.restarts == 1 and crashed not in server.workers and len(server.workers) == 2
+        assert sorted(slot for slot, _ in server.workers.values()) == [0, 1]
+        for _ in range(4):
+            assert ask(port, "thank you")["exit"] is False
+    finally:
+        server.stop()
+    assert not server.workers, "stop() should reap every worker"
+    
+    print("Pre-forked server tests passed")
+
+def test_rulebook_artifact():
+    """Test saving a rulebook as a precompiled artifact and loading it back"""
+    import contextlib
+    import io
+    import os
+    import tempfile
+    import advanced_chatbot
+    from rulebook_artifact import ArtifactError, LazyIndex, read_artifact, source_files, source_fingerprint
+    
+    with tempfile.TemporaryDirectory() as directory:
+        config = os.path.join(directory, "rules.json")
+        with open(config, "w", encoding="utf-8") as file:
+            json.dump({"CUSTOM_PATTERNS": {r'\b(chess|checkmate)\b': ["Chess is a great game!"]}}, file)
+        path = os.path.join(directory, "bot.rulebook")
+        
+        class BuiltChatbot(AdvancedRuleBasedChatbot):
+            __slots__ = ()
+            config_path = config
+        
+        class PrecompiledChatbot(BuiltChatbot):
+            __slots__ = ()
+            artifact_path = path
+        
+        built = BuiltChatbot.write_artifact(path)
+        loaded = PrecompiledChatbot.get_rulebook()
+        assert isinstance(loaded.matcher.index, LazyIndex), "The artifact should be used"
+        assert loaded.patterns == built.patterns and loaded.intents == built.intents
+        assert loaded.responses == built.responses and loaded.settings == built.settings
+        assert loaded.conversation_starters == built.conversation_starters
+        messages = ["hello there", "what's your name?", "I can't sleep", "let's play checkmate", "xyzzy", ""]
+        for message in messages:
+            assert loaded.match_message(message) == built.match_message(message), f"Match differs on '{message}'"
+        assert PrecompiledChatbot().get_response("chess?") == "Chess is a great game!"
+        built_index = sorted((word, tuple(rules)) for word, rules in built.matcher.index.items())
+        assert sorted(loaded.matcher.index.items()) == built_index
+        
+        # The typo corrector and classifier come from the artifact: warming up rebuilds neither
+        import rule_engine
+        def rebuild(*args):
+            raise AssertionError("warm_up() should not rebuild from the rules")
+        originals = rule_engine.pattern_vocabulary, rule_engine.example_phrases
+        rule_engine.pattern_vocabulary = rule_engine.example_phrases = rebuild
+        try:
+            loaded.warm_up()
+        finally:
+            rule_engine.pattern_vocabulary, rule_engine.example_phrases = originals
+        assert loaded.speller.index == built.speller.index
+        assert loaded.classifier.idf == built.classifier.idf
+        for message in ["the wether today", "is it snowing outside", "qwerty zxcvb"]:
+            processed = built.preprocessor(message)
+            assert loaded.speller.correct(processed) == built.speller.correct(processed)
+            assert loaded.classifier.classify(processed) == built.classifier.classify(processed)
+        
+        # Replies fixed when a process starts are not saved, but taken from the loading process
+        time_rule = list(built.patterns).index(advanced_chatbot.TIME_PATTERN)
+        assert read_artifact(path)["responses"][time_rule] == ()
+        saved_replies = advanced_chatbot.PATTERNS[advanced_chatbot.TIME_PATTERN]
+        advanced_chatbot.PATTERNS[advanced_chatbot.TIME_PATTERN] = ["I was started around 09:41 AM!"]
+        try:
+            assert PrecompiledChatbot.reload_rulebook().responses[time_rule] == ("I was started around 09:41 AM!",)
+        finally:
+            advanced_chatbot.PATTERNS[advanced_chatbot.TIME_PATTERN] = saved_replies
+        files = [os.path.basename(file) for file in source_files(PrecompiledChatbot)]
+        assert "preprocessing.py" in files and "rulebook_config.py" in files
+        
+        # Damaged and foreign files are refused
+        fingerprint = source_fingerprint(PrecompiledChatbot)
+        assert read_artifact(path, fingerprint)["source"] == fingerprint
+        with open(path, "rb") as file:
+            data = bytearray(file.read())
+        data[-10] ^= 0xFF
+        corrupt = os.path.join(directory, "corrupt.rulebook")
+        with open(corrupt, "wb") as file:
+            file.write(data)
+        for bad_path, fingerprint in ((corrupt, None), (path, "0" * 64)):
+            try:
+                read_artifact(bad_path, fingerprint)
+                assert False, "Should have raised ArtifactError"
+            except ArtifactError:
+                pass
+        
+        # Once the config changes, the stale artifact is ignored
+        with open(config, "w", encoding="utf-8") as file:
+            json.dump({"CUSTOM_PATTERNS": {r'\b(poker)\b': ["Feeling lucky?"]}}, file)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            rebuilt = PrecompiledChatbot.reload_rulebook()
+        assert "building the rulebook instead" in output.getvalue()
+        assert not isinstance(rebuilt.matcher.index, LazyIndex)
+        assert PrecompiledChatbot().get_response("poker night") == "Feeling lucky?"
+    
+    print("Rulebook artifact tests passed")
+
 def interactive_test():
     """Interactive testing mode"""
     print("\n Interactive Test Mode")
@@ -146,6 +984,31 @@ def main():
     # Test preprocessing
     test_preprocessing()
     
+    test_preprocessing_pipeline()
+    
+    # Test compiled matcher
+    test_compiled_matcher()
+    test_keyword_index()
+    test_shared_rulebook()
+    test_batch_responses()
+    test_chat_server()
+    test_response_cache()
+    test_pathological_inputs()
+    test_match_profiling()
+    test_early_exit_scoring()
+    test_accuracy_harness()
+    test_benchmark_suite()
+    test_config_reload()
+    test_typo_tolerance()
+    test_intent_fallback()
+    if importlib.util.find_spec("numpy") is not None:
+        test_intent_matrix_scoring()
+    test_chat_sessions()
+    test_transcript_replay()
+    test_streaming_responses()
+    test_prefork_server()
+    test_rulebook_artifact()
+    
     # Ask for interactive testing
     print(f"\n{'='*50}")
     choice = input("Would you like to run interactive tests? (y/n): ").lower()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the Tic-Tac-Toe AI engines
+Compares nodes per second and move time of the list and bitboard engines,
+with and without the transposition table and symmetry reduction, and of
+solved-table lookups
+
+Usage:
+    python benchmark.py --positions 200 --repeat 3
+"""
+
+import argparse
+import random
+import time
+
+from bitboard_ai import BitboardTicTacToeAI
+from solved_table import load_solved_table
+from tic_tac_toe_ai import TicTacToeAI
+
+ENGINES = {"list": TicTacToeAI, "bitboard": BitboardTicTacToeAI}
+
+
+def random_positions(count, seed=0):
+    """Return count distinct unfinished boards with the AI to move, taken from random games"""
+    rng = random.Random(seed)
+    game = TicTacToeAI()
+    positions = []
+    while len(positions) < count:
+        board = [' '] * 9
+        player = rng.choice([game.human, game.ai])
+        while not (game.is_winner(board, game.human) or game.is_winner(board, game.ai)
+                   or game.is_board_full(board)):
+            if player == game.ai and board not in positions:
+                positions.append(list(board))
+            board[rng.choice(game.get_available_moves(board))] = player
+            player = game.ai if player == game.human else game.human
+    return positions[:count]
+
+
+def time_engine(engine, table_size, positions, repeat=3, solved=False, symmetry=True):
+    """Best of repeat runs of get_best_move() over every position, each on a fresh engine
+
+    The engine searches every move unless solved is true, when it answers
+    from the solved-positions table. Returns (seconds, nodes searched).
+    """
+    best = None
+    for _ in range(repeat):
+        game = engine(table_size, symmetry)
+        if not solved:
+            game.solved_table_path = None
+        began = time.perf_counter()
+        for board in positions:
+            game.board = list(board)
+            game.get_best_move()
+        elapsed = time.perf_counter() - began
+        if best is None or elapsed < best[0]:
+            best = (elapsed, game.nodes)
+    return best
+
+
+def benchmark_engines(position_count=200, repeat=3, table_size=1 << 14, seed=0):
+    """Measure every engine with and without the transposition table, and solved-table lookups
+
+    Each is measured on the empty board and on random positions, and the
+    list engine also without symmetry reduction. The lookups are left out
+    when there is no solved-positions table.
+    """
+    workloads = {
+        "empty board": [[' '] * 9],
+        f"{position_count} positions": random_positions(position_count, seed),
+    }
+    runs = [("list", TicTacToeAI, size, False, False) for size in (0, table_size)]
+    runs += [(name, engine, size, False, True) for name, engine in ENGINES.items() for size in (0, table_size)]
+    if load_solved_table(TicTacToeAI.solved_table_path, TicTacToeAI.position_values) is not None:
+        runs.append(("list", TicTacToeAI, "solved", True, True))
+
+    results = []
+    for workload, positions in workloads.items():
+        for name, engine, table, solved, symmetry in runs:
+            seconds, nodes = time_engine(engine, 0 if solved else table, positions, repeat, solved, symmetry)
+            results.append({
+                "workload": workload,
+                "engine": name,
+                "table": table,
+                "symmetry": symmetry,
+                "nodes": nodes,
+                "seconds": seconds,
+                "nodes_per_sec": nodes / seconds,
+                "us_per_move": seconds / len(positions) * 1e6,
+            })
+    return results
+
+
+def print_results(results):
+    """Print the benchmark results as a table, with the speedup over the plain list engine
+
+    The plain list engine is the first result of each workload: no table
+    and no symmetry reduction.
+    """
+    baseline = {}
+    for result in results:
+        baseline.setdefault(result["workload"], result["seconds"])
+    print(f"{'workload':>15} | {'engine':>8} | {'table':>6} | {'sym':>3} | {'nodes':>9} | {'nodes/sec':>10} | "
+          f"{'us/move':>10} | {'speedup':>9}")
+    print("-" * 94)
+    for result in results:
+        speedup = baseline[result["workload"]] / result["seconds"]
+        symmetry = "yes" if result["symmetry"] else "no"
+        print(f"{result['workload']:>15} | {result['engine']:>8} | {result['table']:>6} | {symmetry:>3} | "
+              f"{result['nodes']:>9} | {result['nodes_per_sec']:10.0f} | {result['us_per_move']:10.1f} | "
+              f"{speedup:8.1f}x")
+
+
+def main():
+    """Run the engine benchmark from the command line"""
+    parser = argparse.ArgumentParser(description="Benchmark the Tic-Tac-Toe AI engines")
+    parser.add_argument("--positions", type=int, default=200, help="random positions to solve")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (best is kept)")
+    parser.add_argument("--table-size", type=int, default=1 << 14, help="transposition table slots")
+    args = parser.parse_args()
+
+    print(" TIC-TAC-TOE ENGINE BENCHMARK")
+    print("=" * 94)
+    print_results(benchmark_engines(args.positions, args.repeat, args.table_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Bitboard Tic-Tac-Toe AI
+Same Minimax with Alpha-Beta pruning as TicTacToeAI, searched on integer bitmasks
+"""
+
+from operator import xor
+
+from symmetry import distinct_moves
+from tic_tac_toe_ai import EXACT, LOWER, UPPER, TicTacToeAI
+
+# Bit i is square i (0-8, row by row)
+FULL = (1 << 9) - 1
+SQUARE_BITS = [1 << square for square in range(9)]
+
+WIN_MASKS = [
+    0b000000111, 0b000111000, 0b111000000,  # Rows
+    0b001001001, 0b010010010, 0b100100100,  # Columns
+    0b100010001, 0b001010100,               # Diagonals
+]
+
+# WINNING[mask] is true when the squares in mask complete a line, so a win
+# test is one lookup
+WINNING = bytes(any(mask & line == line for line in WIN_MASKS) for mask in range(1 << 9))
+
+
+class BitboardTicTacToeAI(TicTacToeAI):
+    """TicTacToeAI that searches on one 9-bit mask per side instead of the list of strings
+
+    The board, the game loop and get_best_move() behave exactly as in
+    TicTacToeAI, including tie-breaking and the transposition table; only
+    the search runs on bitmasks, with win tests by table lookup and moves
+    taken from the empty-square mask without allocating a list.
+    """
+
+    def board_masks(self, board):
+        """Return (AI mask, human mask) of a list board"""
+        ai = human = 0
+        for square, spot in enumerate(board):
+            if spot == self.ai:
+                ai |= SQUARE_BITS[square]
+            elif spot == self.human:
+                human |= SQUARE_BITS[square]
+        return ai, human
+
+    def player_mask(self, board, player):
+        """Return the mask of the squares player holds on a list board"""
+        mask = 0
+        for square, spot in enumerate(board):
+            if spot == player:
+                mask |= SQUARE_BITS[square]
+        return mask
+
+    def is_winner(self, board, player):
+        """Check if a player has won"""
+        return bool(WINNING[self.player_mask(board, player)])
+
+    def minimax(self, board, depth, is_maximizing, alpha, beta, keys=None):
+        """Minimax score of a list board (see TicTacToeAI.minimax), searched on bitmasks"""
+        ai, human = self.board_masks(board)
+        if keys is None:
+            keys = self.position_keys(board, is_maximizing)
+        return self.search(ai, human, depth, is_maximizing, alpha, beta, keys)
+
+    def search(self, ai, human, depth, is_maximizing, alpha, beta, keys):
+        """Minimax with Alpha-Beta pruning on bitmasks; returns the best score for the position"""
+        self.nodes += 1
+        # Terminal states
+        if WINNING[ai]:
+            return 10 - depth  # Prefer faster wins
+        if WINNING[human]:
+            return depth - 10  # Prefer slower losses
+        empty = FULL & ~(ai | human)
+        if not empty:
+            return 0  # Draw
+
+        key = min(keys)
+        # Flags are judged against the window before the table narrows it: a
+        # search that fails against a narrowed bound has found exactly that bound
+        original_alpha, original_beta = alpha, beta
+        entry = self.probe(key, depth)
+        if entry is not None:
+            score, flag = entry
+            if flag == EXACT:
+                return score
+            if flag == LOWER:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if beta <= alpha:
+                return score
+
+        # Squares in ascending order, like get_available_moves()
+        remaining = empty
+        move_keys = self.move_keys
+        if is_maximizing:  # AI's turn (maximize)
+            best = float('-inf')
+            while remaining:
+                bit = remaining & -remaining
+                remaining ^= bit
+                square = bit.bit_length() - 1
+                score = self.search(ai | bit, human, depth + 1, False, alpha, beta,
+                                    tuple(map(xor, keys, move_keys[square][0])))
+                if score > best:
+                    best = score
+                    if score > alpha:
+                        alpha = score
+                        if beta <= alpha:  # Alpha-Beta pruning
+                            break
+        else:  # Human's turn (minimize)
+            best = float('inf')
+            while remaining:
+                bit = remaining & -remaining
+                remaining ^= bit
+                square = bit.bit_length() - 1
+                score = self.search(ai, human | bit, depth + 1, True, alpha, beta,
+                                    tuple(map(xor, keys, move_keys[square][1])))
+                if score < best:
+                    best = score
+                    if score < beta:
+                        beta = score
+                        if beta <= alpha:  # Alpha-Beta pruning
+                            break
+
+        if best <= original_alpha:
+            flag = UPPER
+        elif best >= original_beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.store(key, depth, best, flag, empty.bit_count())
+        return best
+
+    def get_best_move(self):
+        """Find the best move for AI using Minimax"""
+        solved = self.solved_move()
+        if solved is not None:
+            return solved
+
+        best_score = float('-inf')
+        best_move = -1
+        position_values = self.position_values
+
+        self.generation += 1
+        ai, human = self.board_masks(self.board)
+        keys = self.position_keys(self.board, True)
+        # Symmetric moves are skipped, as in TicTacToeAI.get_best_move()
+        for move in distinct_moves(self.board, self.symmetries):
+            score = self.search(ai | SQUARE_BITS[move], human, 0, False, float('-inf'), float('inf'),
+                                tuple(map(xor, keys, self.move_keys[move][0])))
+
+            # Add small position preference for tie-breaking
+            adjusted_score = score + position_values[move] * 0.01
+
+            if adjusted_score > best_score:
+                best_score = adjusted_score
+                best_move = move
+
+        return best_move
+
+
+def main():
+    """Entry point of the program"""
+    game = BitboardTicTacToeAI()
+    game.play_game()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+N x N, K-in-a-row AI
+Minimax with Alpha-Beta pruning for any board size and win length (4x4,
+5x5 four-in-a-row, 15x15 five-in-a-row, ...), searched by iterative
+deepening within a time budget
+
+Usage:
+    python generalized_ai.py --size 15 --win-length 5 --time-limit 2
+"""
+
+import argparse
+import time
+
+# A win on the ply-th move of a search scores WIN - ply (a loss ply - WIN),
+# preferring faster wins like 10 - depth in TicTacToeAI. Far above any
+# evaluate() score.
+WIN = 10 ** 9
+
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]  # Rows, columns, both diagonals
+
+
+def line_masks(size, win_length):
+    """Return the bitmask of every run of win_length squares on a size x size board (bit row * size + column)"""
+    lines = []
+    for row in range(size):
+        for column in range(size):
+            for row_step, column_step in DIRECTIONS:
+                end_row = row + row_step * (win_length - 1)
+                end_column = column + column_step * (win_length - 1)
+                if 0 <= end_row < size and 0 <= end_column < size:
+                    lines.append(sum(1 << (row + row_step * i) * size + column + column_step * i
+                                     for i in range(win_length)))
+    return lines
+
+
+def neighbourhood_masks(size, reach):
+    """Return, for every square, the mask of the squares at most reach rows and columns away"""
+    masks = []
+    for square in range(size * size):
+        row, column = divmod(square, size)
+        masks.append(sum(1 << r * size + c
+                         for r in range(max(0, row - reach), min(size, row + reach + 1))
+                         for c in range(max(0, column - reach), min(size, column + reach + 1))))
+    return masks
+
+
+class _OutOfTime(Exception):
+    """Raised inside the search when the time budget runs out"""
+
+
+class GeneralizedTicTacToeAI:
+    """Tic-Tac-Toe AI for a size x size board where win_length in a row wins
+
+    The board is a list of ' ', 'X' and 'O' as in TicTacToeAI, searched on
+    one bitmask per side. Positions at the depth cutoff are scored by
+    counting the runs of win_length squares only one side holds (each
+    worth 10 ** (pieces - 1)); the score is updated move by move from the
+    runs through the square played. Only squares within reach of a piece
+    are tried, most promising first. get_best_move() deepens the search
+    one ply at a time and returns the best move of the deepest search that
+    finished within time_limit seconds.
+    """
+
+    def __init__(self, size=3, win_length=3, time_limit=1.0, reach=2):
+        if not 1 <= win_length <= size:
+            raise ValueError(f"win_length must be between 1 and the board size {size}, not {win_length}")
+        self.size = size
+        self.win_length = win_length
+        self.time_limit = time_limit  # seconds per move, or None to search to the end
+        self.board = [' '] * (size * size)
+        self.human = 'X'
+        self.ai = 'O'
+        self.nodes = 0  # positions the search has visited
+        self.completed_depth = 0  # plies of the deepest finished search of the last move
+        self.deadline = None
+
+        self.full = (1 << size * size) - 1
+        self.lines = line_masks(size, win_length)
+        self.lines_through = [[line for line in self.lines if line >> square & 1] for square in range(size * size)]
+        # Tie-breaking preference: squares on more lines first (center > corners > edges on 3x3)
+        self.position_values = tuple(len(lines) for lines in self.lines_through)
+        self.near = neighbourhood_masks(size, reach)
+        middle = {(size - 1) // 2, size // 2}
+        self.center = sum(1 << row * size + column for row in middle for column in middle)
+        # weights[pieces] is what a run held by one side with that many pieces is worth
+        self.weights = [0] + [10 ** (pieces - 1) for pieces in range(1, win_length)]
+
+    def player_mask(self, board, player):
+        """Return the mask of the squares player holds on a list board"""
+        mask = 0
+        for square, spot in enumerate(board):
+            if spot == player:
+                mask |= 1 << square
+        return mask
+
+    def is_winner(self, board, player):
+        """Check if a player has won"""
+        mask = self.player_mask(board, player)
+        return any(mask & line == line for line in self.lines)
+
+    def is_board_full(self, board):
+        """Check if the board is full"""
+        return ' ' not in board
+
+    def get_available_moves(self, board):
+        """Get list of available positions"""
+        return [i for i, spot in enumerate(board) if spot == ' ']
+
+    def evaluate(self, ai, human):
+        """Heuristic score of a position for the AI: its open runs minus the human's, or +-WIN once a side has won"""
+        weights = self.weights
+        score = 0
+        for line in self.lines:
+            ai_pieces = ai & line
+            human_pieces = human & line
+            if ai_pieces == line:
+                return WIN
+            if human_pieces == line:
+                return -WIN
+            if ai_pieces and not human_pieces:
+                score += weights[ai_pieces.bit_count()]
+            elif human_pieces and not ai_pieces:
+                score -= weights[human_pieces.bit_count()]
+        return score
+
+    def move_gain(self, square, own, other):
+        """How much playing square raises the mover's evaluate() score, or WIN if it completes a run"""
+        weights = self.weights
+        last = self.win_length - 1
+        gain = 0
+        for line in self.lines_through[square]:
+            if other & line:
+                if not own & line:
+                    gain += weights[(other & line).bit_count()]  # Blocks the opponent's run
+                continue
+            pieces = (own & line).bit_count()
+            if pieces == last:
+                return WIN
+            gain += weights[pieces + 1] - weights[pieces]
+        return gain
+
+    def ordered_moves(self, own, other, candidates):
+        """Return (gain, square) for every square in candidates, the largest gain (then position value) first"""
+        position_values = self.position_values
+        moves = []
+        while candidates:
+            bit = candidates & -candidates
+            candidates ^= bit
+            square = bit.bit_length() - 1
+            moves.append((self.move_gain(square, own, other), square))
+        moves.sort(key=lambda move: (-move[0], -position_values[move[1]], move[1]))
+        return moves
+
+    def search(self, ai, human, near, ply, depth, is_maximizing, alpha, beta, evaluation):
+        """Minimax with Alpha-Beta pruning to depth more plies; returns the best score for the position
+
+        ply numbers the move made from this position (the root's moves
+        are ply 1), evaluation is the evaluate() score of the position and
+        near the squares within reach of a piece.
+        """
+        self.nodes += 1
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise _OutOfTime
+        candidates = near & ~(ai | human)
+        if not candidates:
+            return 0  # Draw: every square is taken
+        if depth == 0:
+            return evaluation
+
+        if is_maximizing:  # AI's turn (maximize)
+            moves = self.ordered_moves(ai, human, candidates)
+            if moves[0][0] == WIN:
+                return WIN - ply  # Prefer faster wins
+            best = float('-inf')
+            for gain, square in moves:
+                score = self.search(ai | 1 << square, human, near | self.near[square], ply + 1, depth - 1,
+                                    False, alpha, beta, evaluation + gain)
+                if score > best:
+                    best = score
+                    if score > alpha:
+                        alpha = score
+                        if beta <= alpha:  # Alpha-Beta pruning
+                            break
+        else:  # Human's turn (minimize)
+            moves = self.ordered_moves(human, ai, candidates)
+            if moves[0][0] == WIN:
+                return ply - WIN  # Prefer slower losses
+            best = float('inf')
+            for gain, square in moves:
+                score = self.search(ai, human | 1 << square, near | self.near[square], ply + 1, depth - 1,
+                                    True, alpha, beta, evaluation - gain)
+                if score < best:
+                    best = score
+                    if score < beta:
+                        beta = score
+                        if beta <= alpha:  # Alpha-Beta pruning
+                            break
+        return best
+
+    def get_best_move(self, time_limit=None, max_depth=None):
+        """Find the best move for AI by iterative deepening
+
+        Searches one ply deeper at a time until the game is solved,
+        max_depth is reached or time_limit seconds (self.time_limit when
+        not given) run out, then returns the best move of the deepest
+        finished search. Equal scores go to the higher position value,
+        then the lower square. Returns -1 on a full board.
+        """
+        if time_limit is None:
+            time_limit = self.time_limit
+        ai = self.player_mask(self.board, self.ai)
+        human = self.player_mask(self.board, self.human)
+        occupied = ai | human
+        empty_squares = (self.full & ~occupied).bit_count()
+        self.completed_depth = 0
+        if not empty_squares:
+            return -1
+
+        near = 0
+        for square in range(self.size * self.size):
+            if occupied >> square & 1:
+                near |= self.near[square]
+        if not near:
+            near = self.center  # Empty board: open in the middle
+        moves = self.ordered_moves(ai, human, near & ~occupied)
+        best_move = moves[0][1]
+        if moves[0][0] == WIN:
+            self.completed_depth = 1
+            return best_move  # Win at once
+
+        evaluation = self.evaluate(ai, human)
+        position_values = self.position_values
+        if abs(evaluation) == WIN:
+            # The game is already over, so every move scores the same, as in
+            # TicTacToeAI: take the highest position value
+            return max(self.get_available_moves(self.board),
+                       key=lambda square: (position_values[square], -square))
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+        depth_limit = empty_squares if max_depth is None else min(max_depth, empty_squares)
+        try:
+            for depth in range(1, depth_limit + 1):
+                scores = {}
+                best_score = float('-inf')
+                for gain, square in moves:
+                    # A window just below the best score so far gives the exact
+                    # score of every move that ties it, for tie-breaking
+                    scores[square] = self.search(ai | 1 << square, human, near | self.near[square], 2, depth - 1,
+                                                 False, best_score - 1, float('inf'), evaluation + gain)
+                    best_score = max(best_score, scores[square])
+                best_move = max(scores, key=lambda square: (scores[square], position_values[square], -square))
+                self.completed_depth = depth
+                if abs(best_score) >= WIN - depth:
+                    break  # The game is decided within the horizon; deeper searches find nothing new
+                # Best first next time: the ordering that makes Alpha-Beta pruning effective
+                moves.sort(key=lambda move: (-scores[move[1]], -position_values[move[1]], move[1]))
+        except _OutOfTime:
+            pass
+        finally:
+            self.deadline = None
+        return best_move
+
+    def print_board(self):
+        """Display the current board state"""
+        size = self.size
+        width = len(str(size * size))
+        print("\n Current Board:")
+        for row in range(size):
+            print(" " + " | ".join(self.board[row * size:(row + 1) * size]) + " ")
+            if row < size - 1:
+                print("-" * (4 * size - 1))
+        print(f"\n Positions (1-{size * size}):")
+        for row in range(size):
+            print(" " + " | ".join(f"{square + 1:>{width}}" for square in range(row * size, (row + 1) * size)) + " ")
+            if row < size - 1:
+                print("-" * ((width + 3) * size - 1))
+        print()
+
+    def make_human_move(self):
+        """Handle human player's move"""
+        squares = self.size * self.size
+        while True:
+            try:
+                position = int(input(f"Enter your move (1-{squares}): ")) - 1
+                if 0 <= position < squares and self.board[position] == ' ':
+                    self.board[position] = self.human
+                    break
+                else:
+                    print(f"Invalid move! Choose an empty position (1-{squares}).")
+            except ValueError:
+                print(f"Please enter a valid number (1-{squares}).")
+
+    def make_ai_move(self):
+        """Handle AI player's move"""
+        print("AI is thinking...")
+        move = self.get_best_move()
+        self.board[move] = self.ai
+        print(f"AI chooses position {move + 1} (searched {self.completed_depth} plies ahead)")
+
+    def check_game_over(self):
+        """Check if game is over and return winner"""
+        if self.is_winner(self.board, self.human):
+            return 'human'
+        elif self.is_winner(self.board, self.ai):
+            return 'ai'
+        elif self.is_board_full(self.board):
+            return 'draw'
+        return None
+
+    def play_game(self):
+        """Main game loop"""
+        print(f"=== {self.size}x{self.size} TIC-TAC-TOE AI, {self.win_length} IN A ROW WINS ===")
+        print("You are X, AI is O")
+
+        while True:
+            first = input("\nWho goes first? (h)uman or (a)i: ").lower()
+            if first in ['h', 'human']:
+                current_player = 'human'
+                break
+            elif first in ['a', 'ai']:
+                current_player = 'ai'
+                break
+            else:
+                print("Please enter 'h' for human or 'a' for AI")
+
+        while True:
+            self.print_board()
+            if current_player == 'human':
+                self.make_human_move()
+                current_player = 'ai'
+            else:
+                self.make_ai_move()
+                current_player = 'human'
+
+            result = self.check_game_over()
+            if result:
+                self.print_board()
+                if result == 'human':
+                    print("Congratulations! You won!")
+                elif result == 'ai':
+                    print("AI wins! Better luck next time!")
+                else:
+                    print("It's a draw!")
+                break
+
+        if input("\nPlay again? (y/n): ").lower().startswith('y'):
+            self.board = [' '] * (self.size * self.size)
+            self.play_game()
+
+
+def main():
+    """Entry point of the program"""
+    parser = argparse.ArgumentParser(description="Play N x N Tic-Tac-Toe, K in a row, against the AI")
+    parser.add_argument("--size", type=int, default=3, help="squares per side")
+    parser.add_argument("--win-length", type=int, default=3, help="pieces in a row that win")
+    parser.add_argument("--time-limit", type=float, default=1.0, help="seconds the AI may think per move")
+    args = parser.parse_args()
+
+    game = GeneralizedTicTacToeAI(args.size, args.win_length, args.time_limit)
+    game.play_game()
+
+if __name__ == "__main__":
+    main()
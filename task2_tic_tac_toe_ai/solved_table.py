@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Precomputed perfect-play table for the Tic-Tac-Toe AI
+Solves every board once and stores the AI's best moves and score for each
+
+Usage:
+    python solved_table.py                      # writes solved_positions.bin
+    python solved_table.py --output table.bin
+
+Only one board of every set of rotations and reflections is stored: the one
+with the smallest code ai | human << 9 (see symmetry.canonical_code). A
+lookup turns the board into that form, finds its entry in a dict and maps
+the moves back. Every board is covered, not only the 5,478 legal positions,
+since callers may hand the AI any board. An entry holds the moves with the
+best score and that score (10 - plies to a win, plies - 10 to a loss, 0 for
+a draw); the move get_best_move() picks among them is the one with the
+highest position value, then the lowest square.
+
+File layout: magic, format version, entry count, the tie-break
+position_values the table was built with, the CRC-32 of the payload, then
+the payload: the entries as little-endian uint32, zlib-compressed.
+"""
+
+import argparse
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+from symmetry import INVERSE, MASK_SYMMETRIES, canonical_code
+
+MAGIC = b'TTTSOLVE'
+FORMAT_VERSION = 2
+HEADER = struct.Struct('<8sHI9bxI')
+
+SQUARES = 9
+FULL = (1 << SQUARES) - 1
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solved_positions.bin")
+
+# Entry bits, from the top: the board's canonical code, the mask of every
+# move with the best score, and that score plus SCORE_OFFSET
+CODE_SHIFT = 14
+MOVES_SHIFT = 5
+SCORE_BITS = 0x1F
+SCORE_OFFSET = 16
+
+_loaded = {}
+
+
+def board_masks(board, ai, human):
+    """Return (AI mask, human mask) of a list board"""
+    ai_mask = human_mask = 0
+    for square, spot in enumerate(board):
+        if spot == ai:
+            ai_mask |= 1 << square
+        elif spot == human:
+            human_mask |= 1 << square
+    return ai_mask, human_mask
+
+
+class SolvedTable:
+    """Best moves and score of every board up to symmetry, with the AI to move"""
+
+    def __init__(self, entries, position_values):
+        self.position_values = tuple(position_values)
+        self.positions = {entry >> CODE_SHIFT: entry & ((1 << CODE_SHIFT) - 1) for entry in entries}
+        # CHOSEN[moves] is the move get_best_move() takes among equally scored moves
+        self.chosen = [max(range(SQUARES), key=lambda square: (moves >> square & 1, position_values[square],
+                                                               -square))
+                       for moves in range(1 << SQUARES)]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _entry(self, board, ai, human):
+        """Return (best moves mask in the board's orientation, score), or None for a full board"""
+        ai_mask, human_mask = board_masks(board, ai, human)
+        if ai_mask | human_mask == FULL:
+            return None
+        code, t = canonical_code(ai_mask, human_mask)
+        entry = self.positions[code]
+        return MASK_SYMMETRIES[INVERSE[t]][entry >> MOVES_SHIFT], (entry & SCORE_BITS) - SCORE_OFFSET
+
+    def best_move(self, board, ai, human):
+        """Return the move get_best_move() makes on a board (-1 when it is full)"""
+        entry = self._entry(board, ai, human)
+        return self.chosen[entry[0]] if entry is not None else -1
+
+    def lookup(self, board, ai, human):
+        """Return (chosen move or -1, every move with the best score, that score or None)"""
+        entry = self._entry(board, ai, human)
+        if entry is None:
+            return -1, [], None
+        moves, score = entry
+        return self.chosen[moves], [square for square in range(SQUARES) if moves >> square & 1], score
+
+
+def solve_positions():
+    """Return the table entries of every board up to symmetry, as a sorted array of uint32
+
+    Scores are the exact minimax scores TicTacToeAI computes (a winner
+    checked before a full board, the AI's win before the human's).
+    Symmetric positions share one memo entry.
+    """
+    from bitboard_ai import WINNING
+
+    scores = {}
+
+    def score(ai, human, ai_to_move):
+        # Minimax score at depth 0; a score one ply deeper is one closer to 0
+        key = (canonical_code(ai, human)[0], ai_to_move)
+        known = scores.get(key)
+        if known is not None:
+            return known
+        if WINNING[ai]:
+            result = 10
+        elif WINNING[human]:
+            result = -10
+        elif ai | human == FULL:
+            result = 0
+        else:
+            children = []
+            for square in range(SQUARES):
+                bit = 1 << square
+                if (ai | human) & bit:
+                    continue
+                child = score(ai | bit, human, False) if ai_to_move else score(ai, human | bit, True)
+                children.append(child - 1 if child > 0 else child + 1 if child < 0 else 0)
+            result = max(children) if ai_to_move else min(children)
+        scores[key] = result
+        return result
+
+    entries = array('I')
+    for ai in range(1 << SQUARES):
+        for human in range(1 << SQUARES):
+            if ai & human or ai | human == FULL:
+                continue
+            code = ai | human << SQUARES
+            if canonical_code(ai, human)[0] != code:
+                continue
+            move_scores = {square: score(ai | 1 << square, human, False)
+                           for square in range(SQUARES) if not (ai | human) >> square & 1}
+            best_score = max(move_scores.values())
+            moves = sum(1 << square for square, move_score in move_scores.items() if move_score == best_score)
+            entries.append(code << CODE_SHIFT | moves << MOVES_SHIFT | best_score + SCORE_OFFSET)
+    return array('I', sorted(entries))
+
+
+def write_solved_table(path, entries, position_values):
+    """Write table entries to path, replacing any previous file atomically"""
+    if sys.byteorder != 'little':
+        entries = array('I', entries)
+        entries.byteswap()
+    payload = zlib.compress(entries.tobytes(), 9)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(entries), *position_values, zlib.crc32(payload))
+    temporary = f"{path}.tmp{os.getpid()}"
+    with open(temporary, 'wb') as file:
+        file.write(header)
+        file.write(payload)
+    os.replace(temporary, path)
+
+
+def read_solved_table(path):
+    """Read a table file; raises ValueError if it is damaged or from another format version"""
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        raise ValueError("truncated header")
+    magic, version, count, *position_values, checksum = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a solved-positions table")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"format version {version}, expected {FORMAT_VERSION}")
+    payload = data[HEADER.size:]
+    if zlib.crc32(payload) != checksum:
+        raise ValueError("checksum mismatch")
+    entries = array('I')
+    entries.frombytes(zlib.decompress(payload))
+    if sys.byteorder != 'little':
+        entries.byteswap()
+    if len(entries) != count:
+        raise ValueError("truncated payload")
+    return SolvedTable(entries, position_values)
+
+
+def load_solved_table(path, position_values):
+    """Return the table at path, read once per process, or None if it is missing or unusable
+
+    A table built with other tie-break position_values is unusable, since
+    its moves would differ from what the search picks.
+    """
+    key = (path, tuple(position_values))
+    if key not in _loaded:
+        try:
+            table = read_solved_table(path)
+        except FileNotFoundError:
+            table = None
+        except (OSError, ValueError, zlib.error) as error:
+            print(f"Ignoring solved-positions table {path}: {error}", file=sys.stderr)
+            table = None
+        if table is not None and table.position_values != tuple(position_values):
+            table = None
+        _loaded[key] = table
+    return _loaded[key]
+
+
+def main():
+    """Generate the solved-positions table from the command line"""
+    from tic_tac_toe_ai import TicTacToeAI
+
+    parser = argparse.ArgumentParser(description="Solve every Tic-Tac-Toe board and save the best moves")
+    parser.add_argument("--output", default=DEFAULT_PATH, help="table file to write")
+    args = parser.parse_args()
+
+    entries = solve_positions()
+    write_solved_table(args.output, entries, TicTacToeAI.position_values)
+    print(f"Wrote {args.output}: {len(entries)} boards solved, {os.path.getsize(args.output)} bytes")
+
+
+if __name__ == "__main__":
+    main()
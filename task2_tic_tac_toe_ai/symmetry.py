@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Board symmetries for the Tic-Tac-Toe AI
+The 8 rotations and reflections of the 3x3 board, as square permutations and
+as lookup tables over 9-bit masks
+
+A symmetry is a tuple perm with perm[square] the square it moves to. Boards
+related by a symmetry have the same minimax score, and the center > corner >
+edge tie-break values are the same on both, so the AI only needs to search
+one of them and can map the answer back.
+"""
+
+
+def _rotate(square):
+    """Square reached by turning the board a quarter turn clockwise"""
+    row, column = divmod(square, 3)
+    return column * 3 + (2 - row)
+
+
+def _mirror(square):
+    """Square reached by flipping the board left to right"""
+    row, column = divmod(square, 3)
+    return row * 3 + (2 - column)
+
+
+def _symmetries():
+    perms = []
+    perm = tuple(range(9))
+    for _ in range(4):
+        perms.append(perm)
+        perms.append(tuple(_mirror(square) for square in perm))
+        perm = tuple(_rotate(square) for square in perm)
+    return perms
+
+
+# Identity first
+SYMMETRIES = _symmetries()
+IDENTITY = (SYMMETRIES[0],)
+
+# INVERSE[t] is the index of the symmetry that undoes SYMMETRIES[t]
+INVERSE = [SYMMETRIES.index(tuple(perm.index(square) for square in range(9))) for perm in SYMMETRIES]
+
+# MASK_SYMMETRIES[t][mask] is mask with every square moved by SYMMETRIES[t]
+MASK_SYMMETRIES = [[sum(1 << perm[square] for square in range(9) if mask >> square & 1) for mask in range(1 << 9)]
+                   for perm in SYMMETRIES]
+
+
+def canonical_code(ai, human):
+    """Return (code, t): the smallest ai | human << 9 over all symmetries, and the symmetry giving it"""
+    best = None
+    for t, table in enumerate(MASK_SYMMETRIES):
+        code = table[ai] | table[human] << 9
+        if best is None or code < best:
+            best, best_t = code, t
+    return best, best_t
+
+
+def distinct_moves(board, symmetries=SYMMETRIES):
+    """Return the empty squares of a list board, leaving out moves symmetric to an earlier one
+
+    Only symmetries that map the board onto itself count, so every move left
+    out gives the same position (and score) as the lower square kept in its
+    place.
+    """
+    fixing = [perm for perm in symmetries if all(board[perm[square]] == board[square] for square in range(9))]
+    return [square for square in range(9)
+            if board[square] == ' ' and all(perm[square] >= square for perm in fixing)]
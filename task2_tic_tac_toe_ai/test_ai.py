@@ -4,60 +4,78 @@ Test suite for Tic-Tac-Toe AI
 Verifies the AI's correctness and unbeatable nature
 """
 
+from benchmark import random_positions
+from bitboard_ai import BitboardTicTacToeAI
 from tic_tac_toe_ai import TicTacToeAI
 
+# Every test runs against each engine
+ENGINES = [TicTacToeAI, BitboardTicTacToeAI]
+
+def searching(engine, table_size=1 << 14, symmetry=True):
+    """Return an engine that always searches, ignoring the solved-positions table"""
+    game = engine(table_size, symmetry)
+    game.solved_table_path = None
+    return game
+
+def each_game():
+    """Yield a fresh game of every engine, answering from the solved-positions table and by searching"""
+    for engine in ENGINES:
+        yield engine()
+        yield searching(engine)
+
 def test_winning_detection():
     """Test that the AI correctly detects winning conditions"""
-    game = TicTacToeAI()
+    for engine in ENGINES:
+        game = engine()
     
-    # Test horizontal win
-    game.board = ['X', 'X', 'X', ' ', ' ', ' ', ' ', ' ', ' ']
-    assert game.is_winner(game.board, 'X'), "Should detect horizontal win"
+        # Test horizontal win
+        game.board = ['X', 'X', 'X', ' ', ' ', ' ', ' ', ' ', ' ']
+        assert game.is_winner(game.board, 'X'), "Should detect horizontal win"
     
-    # Test vertical win
-    game.board = ['O', ' ', ' ', 'O', ' ', ' ', 'O', ' ', ' ']
-    assert game.is_winner(game.board, 'O'), "Should detect vertical win"
+        # Test vertical win
+        game.board = ['O', ' ', ' ', 'O', ' ', ' ', 'O', ' ', ' ']
+        assert game.is_winner(game.board, 'O'), "Should detect vertical win"
     
-    # Test diagonal win
-    game.board = ['X', ' ', ' ', ' ', 'X', ' ', ' ', ' ', 'X']
-    assert game.is_winner(game.board, 'X'), "Should detect diagonal win"
+        # Test diagonal win
+        game.board = ['X', ' ', ' ', ' ', 'X', ' ', ' ', ' ', 'X']
+        assert game.is_winner(game.board, 'X'), "Should detect diagonal win"
     
     print("Winning detection tests passed")
 
 def test_ai_blocks_immediate_threats():
     """Test that AI blocks immediate winning moves"""
-    game = TicTacToeAI()
+    for game in each_game():
     
-    # Human has two X's in a row, AI should block
-    game.board = ['X', 'X', ' ', ' ', ' ', ' ', ' ', ' ', ' ']
-    best_move = game.get_best_move()
-    assert best_move == 2, f"AI should block at position 2, but chose {best_move}"
+        # Human has two X's in a row, AI should block
+        game.board = ['X', 'X', ' ', ' ', ' ', ' ', ' ', ' ', ' ']
+        best_move = game.get_best_move()
+        assert best_move == 2, f"AI should block at position 2, but chose {best_move}"
     
-    # Test vertical threat
-    game.board = ['X', ' ', ' ', 'X', ' ', ' ', ' ', ' ', ' ']
-    best_move = game.get_best_move()
-    assert best_move == 6, f"AI should block at position 6, but chose {best_move}"
+        # Test vertical threat
+        game.board = ['X', ' ', ' ', 'X', ' ', ' ', ' ', ' ', ' ']
+        best_move = game.get_best_move()
+        assert best_move == 6, f"AI should block at position 6, but chose {best_move}"
     
     print("Threat blocking tests passed")
 
 def test_ai_takes_winning_moves():
     """Test that AI takes immediate winning opportunities"""
-    game = TicTacToeAI()
+    for game in each_game():
     
-    # AI has two O's in a row, should complete the win
-    game.board = ['O', 'O', ' ', ' ', ' ', ' ', ' ', ' ', ' ']
-    best_move = game.get_best_move()
-    assert best_move == 2, f"AI should win at position 2, but chose {best_move}"
+        # AI has two O's in a row, should complete the win
+        game.board = ['O', 'O', ' ', ' ', ' ', ' ', ' ', ' ', ' ']
+        best_move = game.get_best_move()
+        assert best_move == 2, f"AI should win at position 2, but chose {best_move}"
     
     print("Winning move tests passed")
 
 def test_center_preference():
     """Test that AI prefers center on empty board"""
-    game = TicTacToeAI()
+    for game in each_game():
     
-    # On empty board, center (position 4) is optimal
-    best_move = game.get_best_move()
-    assert best_move == 4, f"AI should prefer center (4), but chose {best_move}"
+        # On empty board, center (position 4) is optimal
+        best_move = game.get_best_move()
+        assert best_move == 4, f"AI should prefer center (4), but chose {best_move}"
     
     print("Center preference test passed")
 
@@ -70,9 +88,7 @@ def test_ai_never_loses():
     # Test various opening moves by human
     human_openings = [0, 1, 2, 3, 4, 5, 6, 7, 8]  # All possible first moves
     
-    for opening in human_openings:
-        game = TicTacToeAI()
-        
+    for game, opening in ((game, opening) for opening in human_openings for game in each_game()):
         # Human makes opening move
         game.board[opening] = game.human
         
@@ -117,6 +133,216 @@ def test_ai_never_loses():
     
     return True
 
+def test_transposition_table():
+    """Test that the transposition table saves work without changing any move"""
+    # A tiny table shared by every position, so entries collide and get
+    # reused at other depths
+    plain = searching(TicTacToeAI, table_size=0)
+    engines = [searching(engine, table_size=64) for engine in ENGINES]
+    for board in random_positions(150):
+        plain.board = list(board)
+        expected = plain.get_best_move()
+        for cached in engines:
+            cached.board = list(board)
+            assert cached.get_best_move() == expected, f"Table changed the move on {board}"
+            assert cached.board == board, "The board should be left as it was"
+    
+    plain = searching(TicTacToeAI, table_size=0)
+    plain.get_best_move()
+    for engine in ENGINES:
+        game = searching(engine)
+        game.get_best_move()
+        assert game.nodes * 2 < plain.nodes, "The empty board should need far fewer nodes with a table"
+        nodes = game.nodes
+        game.get_best_move()
+        assert game.nodes - nodes <= 9, "A repeated search should be answered from the table"
+        assert game.position_key(game.board, True) != game.position_key(game.board, False)
+        
+        try:
+            engine(table_size=1000)
+            assert False, "Should have raised ValueError"
+        except ValueError:
+            pass
+    
+    print("Transposition table tests passed")
+
+def test_bitboard_engine():
+    """Test that the bitboard engine searches exactly the tree the list engine does"""
+    from bitboard_ai import WINNING
+    
+    game = TicTacToeAI()
+    for mask in range(1 << 9):
+        board = ['X' if mask >> square & 1 else ' ' for square in range(9)]
+        assert bool(WINNING[mask]) == game.is_winner(board, 'X'), f"Wrong win test for {board}"
+    
+    for table_size in (0, 1 << 14):
+        lists = searching(TicTacToeAI, table_size)
+        bits = searching(BitboardTicTacToeAI, table_size)
+        for board in random_positions(40, seed=1):
+            lists.board = list(board)
+            bits.board = list(board)
+            assert bits.get_best_move() == lists.get_best_move()
+            assert bits.nodes == lists.nodes, "Both engines should visit the same positions"
+            
+            score = lists.minimax(list(board), 0, True, float('-inf'), float('inf'))
+            assert bits.minimax(list(board), 0, True, float('-inf'), float('inf')) == score
+    
+    print("Bitboard engine tests passed")
+
+def test_solved_table():
+    """Test that the solved-positions table gives exactly the moves the search picks"""
+    import contextlib
+    import io
+    import os
+    import tempfile
+    from solved_table import load_solved_table, read_solved_table, solve_positions, write_solved_table
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "solved.bin")
+        write_solved_table(path, solve_positions(), TicTacToeAI.position_values)
+        table = read_solved_table(path)
+        
+        search = searching(BitboardTicTacToeAI)
+        boards = random_positions(300, seed=2) + [['X', 'X', ' ', ' ', ' ', ' ', ' ', ' ', ' '], ['X'] * 9]
+        for board in boards:
+            search.board = list(board)
+            move, moves, score = table.lookup(board, search.ai, search.human)
+            assert move == search.get_best_move(), f"Table move differs on {board}"
+            if move != -1:
+                assert move in moves
+                board = list(board)
+                board[move] = search.ai
+                assert score == search.minimax(board, 0, False, float('-inf'), float('inf'))
+        assert table.lookup([' '] * 9, 'O', 'X') == (4, list(range(9)), 0), "Every opening draws"
+        
+        # Engines answer from the table without searching
+        for engine in ENGINES:
+            game = engine()
+            game.solved_table_path = path
+            game.board = ['X', ' ', ' ', ' ', 'O', ' ', ' ', ' ', 'X']
+            assert game.get_best_move() == table.best_move(game.board, game.ai, game.human)
+            assert game.nodes == 0
+        
+        # A missing, damaged or differently tie-broken table falls back to search
+        with open(path, "rb") as file:
+            data = bytearray(file.read())
+        data[-5] ^= 0xFF
+        damaged = os.path.join(directory, "damaged.bin")
+        with open(damaged, "wb") as file:
+            file.write(data)
+        with contextlib.redirect_stderr(io.StringIO()) as errors:
+            assert load_solved_table(damaged, TicTacToeAI.position_values) is None
+        assert "checksum mismatch" in errors.getvalue()
+        assert load_solved_table(path, (1,) * 9) is None
+        game = TicTacToeAI()
+        game.solved_table_path = os.path.join(directory, "missing.bin")
+        assert game.get_best_move() == 4 and game.nodes > 0
+    
+    print("Solved table tests passed")
+
+def test_symmetry():
+    """Test that rotated and reflected positions are searched once, with unchanged moves"""
+    from bitboard_ai import WIN_MASKS
+    from symmetry import INVERSE, MASK_SYMMETRIES, SYMMETRIES, canonical_code, distinct_moves
+    
+    assert len(set(SYMMETRIES)) == 8
+    for t, table in enumerate(MASK_SYMMETRIES):
+        assert sorted(table[line] for line in WIN_MASKS) == sorted(WIN_MASKS), "Lines should map to lines"
+        assert all(MASK_SYMMETRIES[INVERSE[t]][table[mask]] == mask for mask in range(1 << 9))
+    for ai, human in [(0b000000001, 0b000010000), (0b100000010, 0b000001100)]:
+        codes = {canonical_code(table[ai], table[human])[0] for table in MASK_SYMMETRIES}
+        assert len(codes) == 1, "Every orientation of a board should have the same canonical code"
+    
+    assert distinct_moves([' '] * 9) == [0, 1, 4], "Only a corner, an edge and the center differ"
+    assert distinct_moves(['X', ' ', ' ', ' ', ' ', ' ', ' ', ' ', ' ']) == [1, 2, 4, 5, 8]
+    
+    for engine in ENGINES:
+        plain = searching(engine, symmetry=False)
+        game = searching(engine)
+        for board in random_positions(100, seed=3):
+            plain.board = list(board)
+            game.board = list(board)
+            assert game.get_best_move() == plain.get_best_move(), f"Symmetry changed the move on {board}"
+        
+        plain = searching(engine, symmetry=False)
+        plain.get_best_move()
+        game = searching(engine)
+        game.get_best_move()
+        assert game.nodes * 4 < plain.nodes, "Symmetry should cut the empty-board search several times"
+        
+        # The mirror image of a searched position is answered from the table,
+        # with the move mapped to the mirrored board
+        game.board = ['X', 'O', ' ', ' ', ' ', ' ', ' ', ' ', ' ']
+        plain.board = [' ', 'O', 'X', ' ', ' ', ' ', ' ', ' ', ' ']
+        game.get_best_move()
+        nodes = game.nodes
+        game.board = list(plain.board)
+        assert game.get_best_move() == plain.get_best_move()
+        assert game.nodes - nodes <= 9
+    
+    print("Symmetry tests passed")
+
+def test_generalized_engine():
+    """Test the N x N, K-in-a-row engine on 3x3 against the exact search and on larger boards"""
+    import time
+    from generalized_ai import GeneralizedTicTacToeAI, line_masks
+    
+    assert [len(line_masks(n, k)) for n, k in [(3, 3), (4, 4), (5, 4), (15, 5)]] == [8, 10, 28, 572]
+    
+    # Searched to the end, 3x3 moves score as well as the original engine's
+    game = GeneralizedTicTacToeAI(time_limit=None)
+    search = searching(BitboardTicTacToeAI)
+    for board in random_positions(100, seed=4) + [[' '] * 9]:
+        game.board = list(board)
+        search.board = list(board)
+        scores = []
+        for move in (game.get_best_move(), search.get_best_move()):
+            board = list(search.board)
+            board[move] = search.ai
+            scores.append(search.minimax(board, 0, False, float('-inf'), float('inf')))
+        assert scores[0] == scores[1], f"Generalized engine misplays {search.board}"
+    
+    # Takes a win, blocks a threat and tells a win on every board size
+    for size, win_length in [(4, 4), (5, 4), (15, 5)]:
+        game = GeneralizedTicTacToeAI(size, win_length, time_limit=2.0)
+        row = size // 2 * size
+        line = list(range(row, row + win_length - 1))
+        game.board[line[0]:line[-1] + 1] = ['X'] * (win_length - 1)
+        game.board[row - size:row - size + win_length - 1] = ['O'] * (win_length - 1)
+        move = game.get_best_move()
+        game.board[move] = game.ai
+        assert game.check_game_over() == 'ai', f"AI should win at once on {size}x{size}"
+        
+        game.board[move] = ' '
+        game.board[row - size] = ' '
+        move = game.get_best_move()
+        assert move == line[-1] + 1, f"AI should block {win_length} in a row on {size}x{size}"
+        game.board[move] = game.ai
+        assert game.check_game_over() is None
+        
+        diagonal = [square * (size + 1) for square in range(win_length)]
+        game.board = [' '] * (size * size)
+        for square in diagonal:
+            game.board[square] = 'X'
+        assert game.is_winner(game.board, 'X') and not game.is_winner(game.board, 'O')
+    
+    # A board that is already won or lost gets a move, as from the 3x3 engine
+    game = GeneralizedTicTacToeAI(3, 3, time_limit=None)
+    for board in ['XXX O   O', 'OOOXX X  ']:
+        game.board = list(board)
+        search.board = list(board)
+        assert game.get_best_move() == search.get_best_move(), f"Decided board {board!r} mishandled"
+    
+    # Iterative deepening returns within the time budget with a searched move
+    game = GeneralizedTicTacToeAI(15, 5, time_limit=0.3)
+    game.board[7 * 15 + 7] = 'X'
+    began = time.perf_counter()
+    move = game.get_best_move()
+    assert time.perf_counter() - began < 1.0, "Search should stop when the time budget runs out"
+    assert game.board[move] == ' ' and game.completed_depth >= 1
+    
+    print("Generalized engine tests passed")
+
 def run_all_tests():
     """Run all test functions"""
     print("=== TESTING TIC-TAC-TOE AI ===\n")
@@ -127,6 +353,11 @@ def run_all_tests():
         test_ai_takes_winning_moves()
         test_center_preference()
         test_ai_never_loses()
+        test_transposition_table()
+        test_bitboard_engine()
+        test_solved_table()
+        test_symmetry()
+        test_generalized_engine()
         
         print("\nALL TESTS PASSED!")
         print("The AI is working correctly and is unbeatable!")
@@ -4,11 +4,126 @@ Tic-Tac-Toe AI with Minimax Algorithm and Alpha-Beta Pruning
 A minimal, unbeatable AI implementation
 """
 
+import random
+from operator import xor
+
+from solved_table import DEFAULT_PATH, load_solved_table
+from symmetry import IDENTITY, SYMMETRIES, distinct_moves
+
+# Zobrist keys: one random 64-bit number per (square, role), role 0 being the
+# AI and 1 the human, plus one for "AI to move". A position's key is the XOR
+# of the keys of its pieces, so placing or removing a piece is a single XOR.
+_zobrist_rng = random.Random(0x7A0B)
+ZOBRIST = [[_zobrist_rng.getrandbits(64) for role in range(2)] for square in range(9)]
+AI_TO_MOVE = _zobrist_rng.getrandbits(64)
+
+
+def move_keys(symmetries):
+    """Return keys[square][role]: what a move XORs into the key of the position under each symmetry
+
+    Under symmetry perm, a piece on square counts as a piece on perm[square].
+    Symmetric positions get the same set of keys, so the smallest one
+    identifies a position up to symmetry.
+    """
+    return [[tuple(ZOBRIST[perm[square]][role] ^ AI_TO_MOVE for perm in symmetries) for role in range(2)]
+            for square in range(9)]
+
+
+SYMMETRIC_MOVE_KEYS = move_keys(SYMMETRIES)
+PLAIN_MOVE_KEYS = move_keys(IDENTITY)
+
+# Transposition table entry flags: the stored score is exact, a lower bound
+# (the search failed high) or an upper bound (it failed low)
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
 class TicTacToeAI:
-    def __init__(self):
+    # Position preferences for tie-breaking (center > corners > edges)
+    position_values = (3, 2, 3, 2, 5, 2, 3, 2, 3)  # Center=5, Corners=3, Edges=2
+    # Precomputed best moves written by solved_table.py (None to always search)
+    solved_table_path = DEFAULT_PATH
+    
+    def __init__(self, table_size=1 << 14, symmetry=True):
         self.board = [' '] * 9  # 3x3 board represented as 1D list
         self.human = 'X'
         self.ai = 'O'
+        self.nodes = 0  # positions minimax has visited
+        # Treat rotated and reflected positions as one: the table shares their
+        # entries and get_best_move() skips symmetric moves
+        self.symmetries = SYMMETRIES if symmetry else IDENTITY
+        self.move_keys = SYMMETRIC_MOVE_KEYS if symmetry else PLAIN_MOVE_KEYS
+        self.clear_table(table_size)
+    
+    def clear_table(self, table_size=None):
+        """Empty the transposition table, optionally resizing it (a power of two, or 0 to disable it)"""
+        if table_size is None:
+            table_size = len(self.table)
+        if table_size & (table_size - 1):
+            raise ValueError(f"table_size must be a power of two or 0, not {table_size}")
+        # Slots of (key, score, flag, empty squares, generation), indexed by key & table_mask
+        self.table = [None] * table_size
+        self.table_mask = table_size - 1
+        self.generation = 0
+    
+    def position_keys(self, board, ai_to_move):
+        """Zobrist keys of a position under each symmetry; minimax updates them as it makes moves"""
+        keys = [AI_TO_MOVE if ai_to_move else 0] * len(self.symmetries)
+        for square, spot in enumerate(board):
+            if spot == self.ai or spot == self.human:
+                role = 0 if spot == self.ai else 1
+                for index, perm in enumerate(self.symmetries):
+                    keys[index] ^= ZOBRIST[perm[square]][role]
+        return tuple(keys)
+    
+    def position_key(self, board, ai_to_move):
+        """Transposition table key of a position: the same for every rotation and reflection of it"""
+        return min(self.position_keys(board, ai_to_move))
+    
+    def probe(self, key, depth):
+        """Return (score, flag) stored for a position reached at depth, or None
+        
+        Wins and losses are stored relative to the position (10 minus the
+        plies to the end), so they are converted back to this depth. A bound
+        only says which side of 0 it lies on if the game is decided, so a
+        shifted bound never claims more than "draw or better/worse". An
+        entry found is marked as part of the current search, so the
+        replacement policy keeps it.
+        """
+        if not self.table:
+            return None
+        slot = key & self.table_mask
+        entry = self.table[slot]
+        if entry is None or entry[0] != key:
+            return None
+        if entry[4] != self.generation:
+            self.table[slot] = entry[:4] + (self.generation,)
+        stored, flag = entry[1], entry[2]
+        if stored > 0:
+            score = stored - depth
+            if flag == UPPER:
+                score = max(score, 0)
+        elif stored < 0:
+            score = stored + depth
+            if flag == LOWER:
+                score = min(score, 0)
+        else:
+            score = 0
+        return score, flag
+    
+    def store(self, key, depth, score, flag, empty_squares):
+        """Save a searched position, keeping the entry with the larger subtree when slots collide
+        
+        Entries not used since an earlier get_best_move call are always replaced.
+        """
+        if not self.table:
+            return
+        slot = key & self.table_mask
+        entry = self.table[slot]
+        if (entry is not None and entry[0] != key and entry[4] == self.generation
+                and entry[3] > empty_squares):
+            return
+        stored = score + depth if score > 0 else score - depth if score < 0 else 0
+        self.table[slot] = (key, stored, flag, empty_squares, self.generation)
     
     def print_board(self):
         """Display the current board state"""
@@ -43,11 +158,16 @@ class TicTacToeAI:
         """Get list of available positions"""
         return [i for i, spot in enumerate(board) if spot == ' ']
     
-    def minimax(self, board, depth, is_maximizing, alpha, beta):
+    def minimax(self, board, depth, is_maximizing, alpha, beta, keys=None):
         """
         Minimax algorithm with Alpha-Beta pruning
         Returns the best score for the current position
+        
+        Positions already searched, or a rotation or reflection of them, are
+        answered from the transposition table. keys are the position_keys()
+        of the board (computed when not given).
         """
+        self.nodes += 1
         # Terminal states
         if self.is_winner(board, self.ai):
             return 10 - depth  # Prefer faster wins
@@ -56,40 +176,80 @@ class TicTacToeAI:
         if self.is_board_full(board):
             return 0  # Draw
         
+        if keys is None:
+            keys = self.position_keys(board, is_maximizing)
+        key = min(keys)
+        # Flags are judged against the window before the table narrows it: a
+        # search that fails against a narrowed bound has found exactly that bound
+        original_alpha, original_beta = alpha, beta
+        entry = self.probe(key, depth)
+        if entry is not None:
+            score, flag = entry
+            if flag == EXACT:
+                return score
+            if flag == LOWER:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if beta <= alpha:
+                return score
+        
+        moves = self.get_available_moves(board)
+        move_keys = self.move_keys
         if is_maximizing:  # AI's turn (maximize)
             max_eval = float('-inf')
-            for move in self.get_available_moves(board):
+            for move in moves:
                 board[move] = self.ai
-                eval_score = self.minimax(board, depth + 1, False, alpha, beta)
+                eval_score = self.minimax(board, depth + 1, False, alpha, beta,
+                                          tuple(map(xor, keys, move_keys[move][0])))
                 board[move] = ' '  # Undo move
                 max_eval = max(max_eval, eval_score)
                 alpha = max(alpha, eval_score)
                 if beta <= alpha:  # Alpha-Beta pruning
                     break
-            return max_eval
+            best = max_eval
         else:  # Human's turn (minimize)
             min_eval = float('inf')
-            for move in self.get_available_moves(board):
+            for move in moves:
                 board[move] = self.human
-                eval_score = self.minimax(board, depth + 1, True, alpha, beta)
+                eval_score = self.minimax(board, depth + 1, True, alpha, beta,
+                                          tuple(map(xor, keys, move_keys[move][1])))
                 board[move] = ' '  # Undo move
                 min_eval = min(min_eval, eval_score)
                 beta = min(beta, eval_score)
                 if beta <= alpha:  # Alpha-Beta pruning
                     break
-            return min_eval
+            best = min_eval
+        
+        if best <= original_alpha:
+            flag = UPPER
+        elif best >= original_beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.store(key, depth, best, flag, len(moves))
+        return best
     
     def get_best_move(self):
         """Find the best move for AI using Minimax"""
+        solved = self.solved_move()
+        if solved is not None:
+            return solved
+        
         best_score = float('-inf')
         best_move = -1
+        position_values = self.position_values
         
-        # Position preferences for tie-breaking (center > corners > edges)
-        position_values = [3, 2, 3, 2, 5, 2, 3, 2, 3]  # Center=5, Corners=3, Edges=2
-        
-        for move in self.get_available_moves(self.board):
+        # Scores stay in the table for later moves of the game; the generation
+        # only tells the replacement policy which entries are from this search
+        self.generation += 1
+        keys = self.position_keys(self.board, True)
+        # A move symmetric to a lower one scores the same and has the same
+        # position value, so it could never be picked over it
+        for move in distinct_moves(self.board, self.symmetries):
             self.board[move] = self.ai
-            score = self.minimax(self.board, 0, False, float('-inf'), float('inf'))
+            score = self.minimax(self.board, 0, False, float('-inf'), float('inf'),
+                                 tuple(map(xor, keys, self.move_keys[move][0])))
             self.board[move] = ' '  # Undo move
             
             # Add small position preference for tie-breaking
@@ -101,6 +261,15 @@ class TicTacToeAI:
         
         return best_move
     
+    def solved_move(self):
+        """Return the precomputed best move for the board, or None when there is no usable table"""
+        if self.solved_table_path is None:
+            return None
+        table = load_solved_table(self.solved_table_path, self.position_values)
+        if table is None:
+            return None
+        return table.best_move(self.board, self.ai, self.human)
+    
     def make_human_move(self):
         """Handle human player's move"""
         while True: